@@ -2,22 +2,46 @@
 """
 docx_to_md.py
 Converts a .docx to Markdown, extracting images into ./media
+Images are named by the SHA-256 of their bytes, so identical images (re-runs,
+logos shared across documents) are stored once and never rewritten.
 Usage: python docx_to_md.py input.docx output.md
 """
 import sys
 import os
-import uuid
+import hashlib
 import mammoth
 from markdownify import markdownify as md
 
-def convert(input_path, output_path):
-    os.makedirs("media", exist_ok=True)
+CHUNK_SIZE = 64 * 1024
+
+def _chunks(image):
+    with image.open() as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            yield chunk
+
+def save_image(image, media_dir="media"):
+    """Stores an embedded image as <media_dir>/<sha256>.<ext> and returns its path.
+
+    The image is hashed in one streamed pass; bytes are only written (streamed
+    to a temp file, then renamed) when no file with that hash exists yet.
+    """
+    digest = hashlib.sha256()
+    for chunk in _chunks(image):
+        digest.update(chunk)
+    ext = image.content_type.split("/")[-1].split("+")[0]
+    filename = f"{media_dir}/{digest.hexdigest()}.{ext}"
+    if not os.path.exists(filename):
+        tmp = f"{filename}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            for chunk in _chunks(image):
+                f.write(chunk)
+        os.replace(tmp, filename)
+    return filename
+
+def convert(input_path, output_path, media_dir="media"):
+    os.makedirs(media_dir, exist_ok=True)
     def convert_image(image):
-        ext = image.content_type.split("/")[-1]
-        filename = f"media/{uuid.uuid4().hex}.{ext}"
-        with open(filename, "wb") as f:
-            f.write(image.read())
-        return {"src": filename}
+        return {"src": save_image(image, media_dir)}
 
     with open(input_path, "rb") as docx_file:
         result = mammoth.convert_to_html(
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Batch DOCX -> Markdown converter with a content-hash manifest.
+
+Usage:
+    python batch_convert.py docs/                     # every .docx under docs/
+    python batch_convert.py "plans/VAL_*.docx" -j 8   # a glob, 8 worker processes
+    python batch_convert.py docs/ --converter mammoth --out-dir md/ --force
+
+Behavior:
+ - Converts documents in parallel with the chosen converter. `server` (the
+   default) starts one `pandoc server` process and feeds it documents from a
+   thread pool (see pandoc_server.py); if that is unavailable it falls back to
+   `pandoc` (pandoc_convert.py in worker processes). `mammoth` uses
+   convert_docx_to_md.py in worker processes.
+ - Records the SHA-256 of every successfully converted DOCX in a JSON manifest
+   (default `.docx_manifest.json` in the output directory, or the current
+   directory). A DOCX whose hash, converter and output file match the manifest
+   is skipped, so re-running over an unchanged folder does no conversions.
+ - Writes each output next to its input, or under --out-dir mirroring the
+   input tree. Exits non-zero if any document failed.
+"""
+import os
+import sys
+import glob
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from pandoc_server import PandocServer
+
+MANIFEST_NAME = '.docx_manifest.json'
+CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_documents(sources) -> list:
+    """Expands directories (recursively) and globs into a sorted list of .docx paths."""
+    found = set()
+    for source in sources:
+        p = Path(source)
+        if p.is_dir():
+            matches = p.rglob('*.docx')
+        else:
+            matches = (Path(m) for m in glob.glob(source, recursive=True))
+        for m in matches:
+            # Skip Word lock files such as ~$VAL_DCN_OCS_CPM.docx
+            if m.suffix.lower() == '.docx' and not m.name.startswith('~$') and m.is_file():
+                found.add(m.resolve())
+    return sorted(found)
+
+
+def output_path(docx: Path, out_dir, root: Path) -> Path:
+    if out_dir is None:
+        return docx.with_suffix('.md')
+    try:
+        rel = docx.relative_to(root)
+    except ValueError:
+        rel = Path(docx.name)
+    return Path(out_dir).resolve() / rel.with_suffix('.md')
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path: Path, manifest: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def convert_one(converter: str, docx: str, out: str) -> str:
+    """Worker entry point: converts one document and returns the backend used."""
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    try:
+        if converter == 'mammoth':
+            import convert_docx_to_md
+            convert_docx_to_md.convert(Path(docx), Path(out))
+            return 'mammoth'
+        import pandoc_convert
+        return pandoc_convert.convert(Path(docx), Path(out))
+    except SystemExit:
+        # convert_docx_to_md exits when its dependencies are missing
+        raise RuntimeError(f'{converter} converter dependencies are not installed')
+
+
+def convert_with_server(server: PandocServer, docx: str, out: str) -> str:
+    """Thread-pool entry point: converts one document on the shared pandoc server."""
+    markdown = server.convert_file(Path(docx))
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    Path(out).write_text(markdown, encoding='utf-8')
+    return 'pandoc server'
+
+
+def plan(docs, manifest: dict, manifest_dir: Path, converter: str, out_dir, root: Path, force=False):
+    """Returns (to_convert, skipped) where to_convert is [(key, docx, out, digest)]."""
+    to_convert, skipped = [], []
+    for docx in docs:
+        key = os.path.relpath(docx, manifest_dir)
+        out = output_path(docx, out_dir, root)
+        digest = file_hash(docx)
+        entry = manifest.get(key)
+        if (not force and entry and entry.get('sha256') == digest and entry.get('converter') == converter
+                and out.exists()):
+            skipped.append(key)
+        else:
+            to_convert.append((key, docx, out, digest))
+    return to_convert, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert many DOCX files to Markdown in parallel.')
+    parser.add_argument('sources', nargs='+', help='directories, .docx files or glob patterns')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--converter', choices=('server', 'pandoc', 'mammoth'), default='server')
+    parser.add_argument('--out-dir', help='write outputs here (mirroring the input tree) instead of next to inputs')
+    parser.add_argument('--manifest', help=f'manifest path (default: {MANIFEST_NAME} in the output directory)')
+    parser.add_argument('--force', action='store_true', help='convert even if the manifest says nothing changed')
+    args = parser.parse_args(argv)
+
+    docs = find_documents(args.sources)
+    if not docs:
+        print('No .docx files found.', file=sys.stderr)
+        return 2
+    root = Path(os.path.commonpath([str(d.parent) for d in docs]))
+    manifest_path = Path(args.manifest or Path(args.out_dir or '.') / MANIFEST_NAME).resolve()
+    manifest = load_manifest(manifest_path)
+    # The server and the pandoc CLI produce the same output, so they share manifest entries
+    converter = 'pandoc' if args.converter == 'server' else args.converter
+    to_convert, skipped = plan(docs, manifest, manifest_path.parent, converter, args.out_dir, root,
+                               args.force)
+    for key in skipped:
+        print(f'Unchanged: {key}')
+
+    server = None
+    if to_convert and args.converter == 'server':
+        try:
+            server = PandocServer().start()
+        except RuntimeError as e:
+            print(f'[INFO] pandoc server not used: {e}')
+
+    failed = 0
+    try:
+        if to_convert:
+            jobs = max(1, min(args.jobs, len(to_convert)))
+            pool = ThreadPoolExecutor(max_workers=jobs) if server else ProcessPoolExecutor(max_workers=jobs)
+            with pool:
+                if server:
+                    futures = {pool.submit(convert_with_server, server, str(docx), str(out)): (key, docx, out, digest)
+                               for key, docx, out, digest in to_convert}
+                else:
+                    futures = {pool.submit(convert_one, converter, str(docx), str(out)): (key, docx, out, digest)
+                               for key, docx, out, digest in to_convert}
+                for future in as_completed(futures):
+                    key, docx, out, digest = futures[future]
+                    try:
+                        backend = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f'[ERROR] {key}: {e}', file=sys.stderr)
+                        continue
+                    manifest[key] = {
+                        'sha256': digest,
+                        'converter': converter,
+                        'backend': backend,
+                        'output': os.path.relpath(out, manifest_path.parent),
+                        'converted_at': datetime.now().isoformat(timespec='seconds'),
+                    }
+                    # Saved after every success so an interrupted batch keeps its progress
+                    save_manifest(manifest_path, manifest)
+                    print(f'Wrote ({backend}): {out}')
+    finally:
+        if server:
+            server.close()
+
+    print(f'{len(to_convert) - failed} converted, {len(skipped)} unchanged, {failed} failed')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
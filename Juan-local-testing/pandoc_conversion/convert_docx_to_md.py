@@ -19,8 +19,9 @@ except ImportError:
     sys.exit(2)
 
 
-def convert(docx_path: Path) -> Path:
-    out_md = docx_path.with_suffix('.md')
+def convert(docx_path: Path, out_md: Path = None) -> Path:
+    if out_md is None:
+        out_md = docx_path.with_suffix('.md')
     with docx_path.open('rb') as f:
         result = mammoth.convert_to_html(f)
         html = result.value  # The generated HTML
@@ -10,9 +10,9 @@ Behavior:
  - Writes output as the same basename with `.md` in the same directory as the input DOCX.
  - Exits with non-zero code on error and prints helpful diagnostics.
 """
-import os
 import sys
 import shutil
+import subprocess
 from pathlib import Path
 
 
@@ -35,9 +35,27 @@ def convert_with_cli(input_path: Path, output_path: Path) -> None:
         raise RuntimeError('pandoc CLI not found on PATH; install pandoc or install pypandoc')
 
     cmd = [pandoc, '-s', str(input_path), '-t', 'gfm', '-o', str(output_path)]
-    rc = os.system(' '.join(f'"{c}"' for c in cmd))
-    if rc != 0:
-        raise RuntimeError(f'pandoc CLI failed with exit code {rc}')
+    # No shell: arguments are passed as-is and stderr comes back with the error
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f'pandoc CLI failed with exit code {proc.returncode}: {proc.stderr.strip()}')
+
+
+def convert(input_path: Path, output_path: Path) -> str:
+    """Converts with pypandoc, falling back to the pandoc CLI; returns the backend used."""
+    # Try pypandoc first
+    try:
+        convert_with_pypandoc(input_path, output_path)
+        return 'pypandoc'
+    except Exception as e:
+        print(f'[INFO] pypandoc not used: {e}')
+
+    # Fallback to CLI
+    try:
+        convert_with_cli(input_path, output_path)
+    except Exception as e:
+        raise RuntimeError(f'pandoc CLI not available or failed: {e}')
+    return 'pandoc CLI'
 
 
 def main():
@@ -52,22 +70,12 @@ def main():
 
     out = inp.with_suffix('.md')
 
-    # Try pypandoc first
-    try:
-        convert_with_pypandoc(inp, out)
-        print(f'Wrote (pypandoc): {out}')
-        return
-    except Exception as e:
-        print(f'[INFO] pypandoc not used: {e}')
-
-    # Fallback to CLI
     try:
-        convert_with_cli(inp, out)
-        print(f'Wrote (pandoc CLI): {out}')
-        return
+        backend = convert(inp, out)
     except Exception as e:
-        print(f'[ERROR] pandoc CLI not available or failed: {e}', file=sys.stderr)
+        print(f'[ERROR] {e}', file=sys.stderr)
         sys.exit(1)
+    print(f'Wrote ({backend}): {out}')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Long-running pandoc backend for batch conversion.
+
+Starts one local `pandoc server` process (pandoc >= 3.0) and sends documents to
+it over its HTTP JSON API on 127.0.0.1. Output comes back in memory and errors
+come back as PandocError with pandoc's messages, so a batch pays the pandoc
+startup cost once instead of once per document.
+
+Usage:
+    from pandoc_server import PandocServer
+
+    with PandocServer() as server:
+        markdown = server.convert_file(Path('VAL_DCN_OCS_CPM.docx'))
+
+The server handles requests concurrently, so one instance can be shared by a
+thread pool. PandocServer raises RuntimeError from start() when pandoc is
+missing or was built without server support; callers fall back to
+pandoc_convert.py in that case.
+"""
+import json
+import time
+import base64
+import shutil
+import socket
+import subprocess
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BINARY_FORMATS = {'docx', 'odt', 'epub', 'pptx', 'xlsx'}
+
+
+class PandocError(RuntimeError):
+    """A conversion pandoc rejected; carries the HTTP status and pandoc's messages."""
+
+    def __init__(self, message, status=None, messages=None, document=None):
+        super().__init__(message)
+        self.status = status
+        self.messages = messages or []
+        self.document = document
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class PandocServer:
+    def __init__(self, pandoc=None, port=None, timeout=120, startup_timeout=10.0):
+        self.pandoc = pandoc or shutil.which('pandoc')
+        self.port = port
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.proc = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}/'
+
+    def start(self) -> 'PandocServer':
+        if not self.pandoc:
+            raise RuntimeError('pandoc CLI not found on PATH; install pandoc 3.0 or newer')
+        self.port = self.port or _free_port()
+        cmd = [self.pandoc, 'server', '--port', str(self.port), '--timeout', str(self.timeout)]
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.PIPE)
+        except OSError as e:
+            raise RuntimeError(f'could not start pandoc server: {e}')
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                err = self.proc.stderr.read().decode(errors='replace').strip()
+                raise RuntimeError(f'pandoc server exited with code {self.proc.returncode}: {err}')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        self.close()
+        raise RuntimeError(f'pandoc server did not start within {self.startup_timeout}s')
+
+    def close(self) -> None:
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc.stderr.close()
+            self.proc = None
+
+    def __enter__(self):
+        return self.start() if self.proc is None else self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def convert(self, data: bytes, from_format='docx', to_format='gfm', standalone=True, document=None) -> str:
+        """Converts a document held in memory and returns pandoc's output text."""
+        if self.proc is None:
+            raise RuntimeError('pandoc server is not running')
+        text = base64.b64encode(data).decode('ascii') if from_format in BINARY_FORMATS else data.decode('utf-8')
+        body = json.dumps({'text': text, 'from': from_format, 'to': to_format, 'standalone': standalone})
+        request = urllib.request.Request(self.url, data=body.encode('utf-8'), method='POST',
+                                         headers={'Content-Type': 'application/json', 'Accept': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout + 5) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', errors='replace').strip()
+            raise PandocError(f'pandoc server returned HTTP {e.code}: {detail}', status=e.code, document=document)
+        except (urllib.error.URLError, OSError) as e:
+            raise PandocError(f'pandoc server request failed: {e}', document=document)
+        except ValueError as e:
+            raise PandocError(f'pandoc server sent invalid JSON: {e}', document=document)
+
+        if 'error' in payload:
+            raise PandocError(payload['error'], messages=payload.get('messages'), document=document)
+        messages = payload.get('messages') or []
+        errors = [m for m in messages if m.get('verbosity') == 'ERROR']
+        if errors:
+            raise PandocError(errors[0].get('message', 'conversion failed'), messages=messages, document=document)
+        output = payload.get('output', '')
+        if payload.get('base64'):
+            output = base64.b64decode(output).decode('utf-8')
+        return output
+
+    def convert_file(self, input_path: Path, to_format='gfm') -> str:
+        from_format = input_path.suffix.lstrip('.').lower() or 'docx'
+        return self.convert(input_path.read_bytes(), from_format, to_format, document=str(input_path))
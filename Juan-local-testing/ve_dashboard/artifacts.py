@@ -0,0 +1,240 @@
+"""
+artifacts.py
+
+Disk usage of a verification environment and of the build outputs that pile
+up next to its sources: compiled simulator databases (simv.daidir, csrc,
+xcelium.d), shared objects, waveforms, Verdi logs and results/<run>
+directories. On real IP these take GBs.
+
+The tree is walked breadth first with os.scandir. The directories of each
+level are listed in parallel on the I/O pool (`io_workers`), so a deep
+simv.daidir does not hold up the rest of the tree. Sizes are the space files
+take on disk (st_blocks, like du) and are summed bottom-up into every
+directory.
+
+Paths are classified by ARTIFACT_RULES, with the `artifact_rules` setting
+checked first. A matching directory is reported as one artifact covering its
+whole subtree, and it is deleted as one.
+"""
+import os
+import stat
+import shutil
+from fnmatch import fnmatchcase
+from functools import partial
+
+from metrics import count, phase
+from settings import get_setting
+from workers import parallel_map
+
+# (pattern, kind), first match wins. A pattern without '/' matches a file or
+# directory name at any depth; one with '/' matches the project-relative path
+# segment by segment from the project root ('/*.log' is a top-level log only).
+# Generic names such as *.log and *.key are anchored or spelled out, so
+# checked-in golden logs and keys elsewhere in the tree are never artifacts.
+ARTIFACT_RULES = [
+    ('results/*', 'results'),
+    ('simv.daidir', 'compile'),
+    ('*.daidir', 'compile'),
+    ('csrc', 'compile'),
+    ('simv', 'compile'),
+    ('xcelium.d', 'compile'),
+    ('INCA_libs', 'compile'),
+    ('*.so', 'compile'),
+    ('*.o', 'compile'),
+    ('*.vvp', 'compile'),
+    ('vc_hdrs.h', 'compile'),
+    ('*.fsdb', 'waves'),
+    ('*.vpd', 'waves'),
+    ('*.vcd', 'waves'),
+    ('*.shm', 'waves'),
+    ('verdiLog', 'debug'),
+    ('DVEfiles', 'debug'),
+    ('novas_dump.log', 'debug'),
+    ('ucli.key', 'debug'),
+    ('/*.log', 'logs'),
+]
+
+
+def artifact_rules(config=None):
+    """Configured rules (`artifact_rules`: [[pattern, kind], ...]) followed by the built-in ones."""
+    extra = get_setting('artifact_rules', config) or []
+    return [tuple(rule) for rule in extra] + ARTIFACT_RULES
+
+
+def _matches(rel, pattern):
+    if '/' not in pattern:
+        return fnmatchcase(rel.rsplit('/', 1)[-1], pattern)
+    parts, pattern_parts = rel.split('/'), pattern.lstrip('/').split('/')
+    return len(parts) == len(pattern_parts) and all(map(fnmatchcase, parts, pattern_parts))
+
+
+def classify(rel, rules=ARTIFACT_RULES):
+    """Returns the artifact kind of a project-relative path, or None for sources."""
+    for pattern, kind in rules:
+        if _matches(rel, pattern):
+            return kind
+    return None
+
+
+def artifact_kind(rel, rules=ARTIFACT_RULES):
+    """Like classify, but also matches paths inside an artifact directory (results/run1/sim.log)."""
+    parts = rel.split('/')
+    for i in range(1, len(parts) + 1):
+        kind = classify('/'.join(parts[:i]), rules)
+        if kind:
+            return kind
+    return None
+
+
+def _disk_bytes(st):
+    blocks = getattr(st, 'st_blocks', None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def _scan_dir(item, rules):
+    """Lists one directory: its own files' usage, its subdirectories and the artifacts found in it."""
+    full, rel, inside, own = item
+    files, newest = 0, 0.0
+    subdirs, found = [], []
+    try:
+        with os.scandir(full) as it:
+            entries = list(it)
+    except OSError as e:
+        return rel, own, 0, 0.0, [], [], str(e)
+    for entry in entries:
+        child = f'{rel}/{entry.name}' if rel else entry.name
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        kind = None if inside else classify(child, rules)
+        if stat.S_ISDIR(st.st_mode):
+            subdirs.append((entry.path, child, inside or bool(kind), _disk_bytes(st)))
+            if kind:
+                found.append({'path': child, 'kind': kind, 'is_dir': True})
+            continue
+        size = _disk_bytes(st)
+        own += size
+        files += 1
+        newest = max(newest, st.st_mtime)
+        if kind:
+            found.append({'path': child, 'kind': kind, 'is_dir': False,
+                          'bytes': size, 'files': 1, 'mtime': st.st_mtime})
+    return rel, own, files, newest, subdirs, found, None
+
+
+def disk_usage(project_path, config=None, workers=None):
+    """Walks project_path and returns its per-directory usage and classified artifacts.
+
+    Returns a dict with total_bytes, total_files, dirs ({rel: {bytes, files,
+    mtime}} for every directory, '' being the project itself), artifacts (path,
+    kind, is_dir, bytes, files, mtime; largest first), by_kind totals and
+    errors.
+    """
+    rules = artifact_rules(config)
+    scan = partial(_scan_dir, rules=rules)
+    dirs, order, artifacts, errors = {}, [], [], []
+    try:
+        frontier = [(project_path, '', False, _disk_bytes(os.stat(project_path)))]
+    except OSError as e:
+        frontier, errors = [], [str(e)]
+    with phase('disk_usage'):
+        while frontier:
+            next_frontier = []
+            for rel, own, files, newest, subdirs, found, error in parallel_map(scan, frontier, workers=workers):
+                dirs[rel] = [own, files, newest]
+                order.append(rel)
+                artifacts += found
+                next_frontier += subdirs
+                if error:
+                    errors.append(error)
+            frontier = next_frontier
+        # Deeper directories come later in breadth-first order, so one reverse pass sums every subtree
+        for rel in reversed(order[1:]):
+            parent = dirs[rel.rpartition('/')[0]]
+            usage = dirs[rel]
+            parent[0] += usage[0]
+            parent[1] += usage[1]
+            parent[2] = max(parent[2], usage[2])
+    count('files_scanned', dirs[''][1] if '' in dirs else 0)
+
+    for artifact in artifacts:
+        if artifact['is_dir']:
+            artifact['bytes'], artifact['files'], artifact['mtime'] = dirs[artifact['path']]
+    artifacts.sort(key=lambda a: (-a['bytes'], a['path']))
+    by_kind = {}
+    for artifact in artifacts:
+        totals = by_kind.setdefault(artifact['kind'], {'bytes': 0, 'count': 0})
+        totals['bytes'] += artifact['bytes']
+        totals['count'] += 1
+    root = dirs.get('', [0, 0, 0.0])
+    return {'project_path': project_path,
+            'total_bytes': root[0],
+            'total_files': root[1],
+            'artifact_bytes': sum(a['bytes'] for a in artifacts),
+            'dirs': {rel: {'bytes': u[0], 'files': u[1], 'mtime': u[2]} for rel, u in dirs.items()},
+            'artifacts': artifacts,
+            'by_kind': by_kind,
+            'errors': errors}
+
+
+def largest_dirs(usage, limit=20, max_depth=2):
+    """The biggest directories at most max_depth levels below the project, largest first."""
+    dirs = [(rel, u) for rel, u in usage['dirs'].items() if rel and rel.count('/') < max_depth]
+    dirs.sort(key=lambda item: (-item[1]['bytes'], item[0]))
+    return [dict(u, path=rel) for rel, u in dirs[:limit]]
+
+
+def _remove(full):
+    try:
+        if os.path.isdir(full) and not os.path.islink(full):
+            shutil.rmtree(full)
+        else:
+            os.remove(full)
+        return None
+    except OSError as e:
+        return str(e)
+
+
+def delete_artifacts(project_path, rel_paths, config=None, workers=None):
+    """Deletes artifact files and whole artifact directories, several at a time.
+
+    Only paths inside project_path that are (or lie inside) a classified
+    artifact are touched, so sources can never be removed this way. Returns
+    (deleted, errors): deleted is a list of (full_path, was_dir) and errors maps
+    each rejected or failed path to the reason.
+    """
+    rules = artifact_rules(config)
+    root = os.path.abspath(project_path)
+    targets, errors = [], {}
+    for rel in dict.fromkeys(rel_paths):
+        full = os.path.abspath(os.path.join(root, rel))
+        rel = os.path.relpath(full, root).replace(os.sep, '/')
+        if full == root or os.path.commonpath([root, full]) != root:
+            errors[rel] = 'outside the project'
+        elif not os.path.lexists(full):
+            errors[rel] = 'not found'
+        elif artifact_kind(rel, rules) is None:
+            errors[rel] = 'not a build artifact'
+        else:
+            targets.append(full)
+    # A path inside another selected directory goes away with it
+    targets = [t for t in targets if not any(t.startswith(other + os.sep) for other in targets)]
+    kinds = [os.path.isdir(t) and not os.path.islink(t) for t in targets]
+    with phase('delete'):
+        results = parallel_map(_remove, targets, workers=workers, min_items=2)
+    deleted = []
+    for full, was_dir, error in zip(targets, kinds, results):
+        if error:
+            errors[os.path.relpath(full, root)] = error
+        else:
+            deleted.append((full, was_dir))
+    return deleted, errors
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024:
+            return f'{n:.0f} {unit}' if unit == 'B' else f'{n:.1f} {unit}'
+        n /= 1024
+    return f'{n:.1f} TB'
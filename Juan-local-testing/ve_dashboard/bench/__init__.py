@@ -0,0 +1,12 @@
+"""
+bench
+
+Benchmarks for the dashboard's scan, parse, search, usage and include
+operations against generated SystemVerilog trees. synth.py writes a synthetic
+verification project of a chosen size; run_bench.py times each operation cold
+and warm and writes the results as JSON that can be compared across runs.
+
+Usage (from ve_dashboard/):
+    python3 -m bench --modules 500 --classes 2000 --output bench.json
+    python3 -m bench --compare baseline.json
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from bench.run_bench import main
+
+sys.exit(main())
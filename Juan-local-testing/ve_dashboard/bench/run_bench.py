@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+run_bench.py
+
+Times the dashboard's per-request operations on a synthetic (or existing)
+project, cold and warm, and writes the timings as JSON.
+
+Each operation is measured in two states:
+
+    operation               cold                                    warm
+    perform_text_search     walk the tree, then search              search a prebuilt snapshot
+    parse_sv_file           parse every .sv/.v file                 look every file up in a populated component index
+    build_component_index   scan and parse the whole tree           scan with a populated component index
+    count_component_usages  walk the tree, then count usages        count usages over a prebuilt snapshot
+    find_includes           tools/find_includes.py scan_project     build_include_graph with a snapshot and a populated
+                                                                    include cache
+
+"Cold" is a first request with an empty cache directory: no snapshot and no
+on-disk index. "Warm" uses the snapshot and indexes the dashboard keeps between
+requests; they are built once before timing starts, in a temporary directory. The OS page cache is only dropped between cold samples with
+--drop-caches (Linux, root). Every sample is repeated --repeat times and the
+median is what --compare checks.
+
+Usage (from ve_dashboard/):
+    python3 -m bench [--modules N] [--classes M] [--include-depth D] [--lines L] [--repeat R]
+    python3 -m bench --project /path/to/env --ops perform_text_search find_includes
+    python3 -m bench --output new.json --compare baseline.json --threshold 1.25
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+from datetime import datetime
+
+# Allow running as a script from bench/ while sharing the dashboard's modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench.synth import add_arguments, generate_project, generation_params
+from component_index import COMPONENTS_VERSION
+from include_graph import DIRECTIVES_VERSION, build_include_graph, include_dirs
+from scanner import SV_EXTS, build_component_index, parse_sv_file, perform_text_search, scan_project_tree
+from signature_cache import SignatureCache
+from tools.find_includes import scan_project as find_includes_scan
+from usage_finder import count_component_usages
+from workers import default_workers
+
+FORMAT_VERSION = 1
+DEFAULT_QUERY = 'always_ff'
+USAGE_NAMES = 20
+OPERATIONS = ('perform_text_search', 'parse_sv_file', 'build_component_index', 'count_component_usages',
+              'find_includes')
+
+
+def drop_page_cache():
+    """Flushes the Linux page cache so cold samples read from disk; returns False when not permitted."""
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return True
+    except OSError:
+        return False
+
+
+class Bench:
+    """Holds the project under test plus the warm state shared by the warm samples."""
+
+    def __init__(self, project_path, cache_root, query=DEFAULT_QUERY, use_regex=False):
+        self.project_path = project_path
+        self.cache_root = cache_root
+        self.query = query
+        self.use_regex = use_regex
+        self.snapshot = scan_project_tree(project_path)
+        self.sv_files = [(rel, entry) for rel, entry in self.snapshot.iter_files(SV_EXTS)]
+        names = sorted(self.snapshot.component_index())
+        step = max(1, len(names) // USAGE_NAMES)
+        self.usage_names = names[::step][:USAGE_NAMES]
+        self.incdirs = include_dirs(project_path)
+        self.components = self._filled_index('components', COMPONENTS_VERSION,
+                                             lambda index: scan_project_tree(project_path, index=index))
+        self.includes = self._filled_index('includes', DIRECTIVES_VERSION, lambda index: build_include_graph(
+            project_path, self.snapshot, index, incdirs=self.incdirs))
+
+    def _filled_index(self, name, version, fill):
+        index = SignatureCache(os.path.join(self.cache_root, f'warm.{name}.sqlite'), version)
+        fill(index)
+        return index
+
+    def close(self):
+        self.components.close()
+        self.includes.close()
+
+    # One method per (operation, state); each returns a count so results can be sanity-checked
+
+    def perform_text_search_cold(self):
+        return len(perform_text_search(self.project_path, self.query, self.use_regex)[0])
+
+    def perform_text_search_warm(self):
+        return len(perform_text_search(self.project_path, self.query, self.use_regex, snapshot=self.snapshot)[0])
+
+    def parse_sv_file_cold(self):
+        return sum(len(parse_sv_file(entry['path'])) for _, entry in self.sv_files)
+
+    def parse_sv_file_warm(self):
+        return sum(len(self.components.lookup(rel, entry['mtime'], entry['size']) or ())
+                   for rel, entry in self.sv_files)
+
+    def build_component_index_cold(self):
+        return len(build_component_index(self.project_path))
+
+    def build_component_index_warm(self):
+        snapshot = scan_project_tree(self.project_path, index=self.components)
+        return len(build_component_index(self.project_path, snapshot))
+
+    def count_component_usages_cold(self):
+        return sum(map(len, count_component_usages(self.project_path, self.usage_names).values()))
+
+    def count_component_usages_warm(self):
+        return sum(map(len, count_component_usages(self.project_path, self.usage_names, self.snapshot).values()))
+
+    def find_includes_cold(self):
+        return _edge_count(find_includes_scan(self.project_path))
+
+    def find_includes_warm(self):
+        return _edge_count(build_include_graph(self.project_path, self.snapshot, self.includes, incdirs=self.incdirs))
+
+
+def _edge_count(graph):
+    return sum(len(edges) for edges in graph.includes.values())
+
+
+def measure(func, repeat, before=None):
+    samples, result = [], None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'samples': samples,
+        'result_count': result,
+    }
+
+
+def run(bench, operations=OPERATIONS, repeat=3, drop_caches=False, progress=None):
+    """Returns {operation: {cold: timing, warm: timing}}; timings are in seconds."""
+    dropped = {'ok': drop_caches}
+
+    def before_cold():
+        if dropped['ok']:
+            dropped['ok'] = drop_page_cache()
+
+    results = {}
+    for op in operations:
+        results[op] = {
+            'cold': measure(getattr(bench, f'{op}_cold'), repeat, before_cold),
+            'warm': measure(getattr(bench, f'{op}_warm'), repeat),
+        }
+        if progress:
+            progress(op, results[op])
+    return results, dropped['ok']
+
+
+def compare(current, baseline, threshold):
+    """Returns [(operation, state, baseline_median, current_median, ratio, regressed)] for shared entries."""
+    rows = []
+    for op, states in current['results'].items():
+        for state, timing in states.items():
+            old = baseline.get('results', {}).get(op, {}).get(state)
+            if not old:
+                continue
+            ratio = timing['median'] / old['median'] if old['median'] else float('inf')
+            rows.append((op, state, old['median'], timing['median'], ratio, ratio > threshold))
+    return rows
+
+
+def tree_stats(snapshot):
+    return {
+        'files': len(snapshot.files),
+        'bytes': sum(entry['size'] for entry in snapshot.files.values()),
+        'sv_files': sum(1 for _ in snapshot.iter_files(SV_EXTS)),
+        'components': len(snapshot.components),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dashboard operations on a synthetic SystemVerilog tree.')
+    add_arguments(parser)
+    parser.add_argument('--project', help='benchmark this existing tree instead of generating one')
+    parser.add_argument('--keep', metavar='DIR', help='generate the tree into DIR and keep it')
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=3, help='samples per operation and state')
+    parser.add_argument('--query', default=DEFAULT_QUERY, help='text search query')
+    parser.add_argument('--regex', action='store_true', help='treat --query as a regular expression')
+    parser.add_argument('--drop-caches', action='store_true', help='drop the OS page cache before cold samples')
+    parser.add_argument('--output', '-o', help='write the JSON results here (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare medians against an earlier results file')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='fail when a median is more than this many times the baseline')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print('Could not read baseline:', e, file=sys.stderr)
+            return 2
+
+    work = tempfile.mkdtemp(prefix='ve_bench_')
+    try:
+        params = None
+        if args.project:
+            project_path = os.path.abspath(args.project)
+            if not os.path.isdir(project_path):
+                print('Project path not found:', args.project, file=sys.stderr)
+                return 2
+        else:
+            params = generation_params(args)
+            project_path = os.path.abspath(args.keep or os.path.join(work, 'project'))
+            stats = generate_project(project_path, **params)
+            print(f"Generated {stats['files']} files ({stats['bytes'] / 1e6:.1f} MB) in {project_path}",
+                  file=sys.stderr)
+        cache_root = os.path.join(work, 'cache')
+        os.makedirs(cache_root)
+
+        bench = Bench(project_path, cache_root, args.query, args.regex)
+
+        def progress(op, timing):
+            print(f"{op:<24} cold {timing['cold']['median'] * 1000:9.1f} ms   "
+                  f"warm {timing['warm']['median'] * 1000:9.1f} ms", file=sys.stderr)
+
+        try:
+            results, dropped = run(bench, args.ops, max(1, args.repeat), args.drop_caches, progress)
+        finally:
+            bench.close()
+        report = {
+            'version': FORMAT_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'host': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'io_workers': default_workers('io'),
+                'cpu_workers': default_workers('cpu'),
+                'page_cache_dropped': dropped,
+            },
+            'params': params,
+            'project': project_path if args.project or args.keep else None,
+            'tree': tree_stats(bench.snapshot),
+            'query': {'text': args.query, 'regex': args.regex, 'usage_names': len(bench.usage_names)},
+            'repeat': max(1, args.repeat),
+            'results': results,
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if baseline is None:
+        return 0
+    if baseline.get('params') != report['params'] or baseline.get('tree') != report['tree']:
+        print('Warning: the baseline was measured on a different tree', file=sys.stderr)
+    rows = compare(report, baseline, args.threshold)
+    for op, state, old, new, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{op:<24} {state:<5} {old * 1000:9.1f} ms -> {new * 1000:9.1f} ms  x{ratio:.2f}{flag}',
+              file=sys.stderr)
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+synth.py
+
+Generates a synthetic SystemVerilog verification tree for benchmarks:
+
+    Makefile                    +incdir+include
+    include/defs_<k>.svh        a chain of `include_depth` headers, each including the next
+    rtl/mod_<i>.sv              `modules` modules forming a binary instantiation tree under mod_0
+    tb/synth_pkg_<f>.sv         `classes` UVM classes, `classes_per_file` per file; every
+                                fourth one is a test, the rest are components that extend
+                                and reference earlier classes
+    tb/tb_top.sv                the top module: instantiates mod_0 and calls run_test
+
+Every source file is padded with plausible statements to about `lines` lines.
+The output only depends on the arguments, so two runs with the same seed
+produce byte-identical trees.
+
+Usage:
+    python3 synth.py /tmp/synth --modules 200 --classes 800 --include-depth 4 --lines 300
+"""
+import os
+import random
+import argparse
+
+DEFAULTS = {
+    'modules': 100,
+    'classes': 400,
+    'include_depth': 3,
+    'lines': 200,
+    'classes_per_file': 4,
+    'seed': 0,
+}
+
+
+def _write(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    text = '\n'.join(lines) + '\n'
+    with open(path, 'w') as f:
+        f.write(text)
+    return len(text)
+
+
+def _module(i, modules, lines, rng):
+    children = [c for c in (2 * i + 1, 2 * i + 2) if c < modules]
+    out = [
+        '`include "defs_0.svh"',
+        f'// Synthetic RTL block {i}',
+        f'module mod_{i} (',
+        '    input  logic        clk,',
+        '    input  logic        rst_n,',
+        '    input  logic [31:0] din,',
+        '    output logic [31:0] dout',
+        ');',
+        '    logic [31:0] stage_q;',
+    ]
+    for c in children:
+        out += [f'    logic [31:0] child_{c}_dout;',
+                f'    mod_{c} u_mod_{c} (.clk(clk), .rst_n(rst_n), .din(stage_q), .dout(child_{c}_dout));']
+    n = 0
+    while len(out) < lines - 2:
+        out += [
+            f'    // stage {n}: mixes the input with constant {rng.randrange(1 << 16)}',
+            '    always_ff @(posedge clk or negedge rst_n) begin',
+            "        if (!rst_n) stage_q <= 32'd0;",
+            f"        else stage_q <= din ^ 32'h{rng.randrange(1 << 32):08x};",
+            '    end',
+        ]
+        n += 1
+    out += ['    assign dout = stage_q;' if not children else
+            '    assign dout = ' + ' ^ '.join(f'child_{c}_dout' for c in children) + ';',
+            'endmodule']
+    return out
+
+
+def _class_name(j):
+    return f'synth_test_{j}' if j % 4 == 3 else f'synth_comp_{j}'
+
+
+def _class(j, rng):
+    name = _class_name(j)
+    earlier_comps = [k for k in range(j) if k % 4 != 3]
+    earlier_tests = [k for k in range(j) if k % 4 == 3]
+    if j % 4 == 3:
+        parent = _class_name(rng.choice(earlier_tests)) if earlier_tests and rng.random() < 0.5 else 'uvm_test'
+    else:
+        parent = _class_name(rng.choice(earlier_comps)) if earlier_comps and rng.random() < 0.5 else 'uvm_component'
+    members = [_class_name(k) for k in rng.sample(earlier_comps, min(3, len(earlier_comps)))]
+    out = [f'class {name} extends {parent};', f'    `uvm_component_utils({name})']
+    out += [f'    {m} m_{m};' for m in members]
+    out += [
+        f'    function new(string name = "{name}", uvm_component parent = null);',
+        '        super.new(name, parent);',
+        '    endfunction',
+        '    virtual function void build_phase(uvm_phase phase);',
+        '        super.build_phase(phase);',
+    ]
+    out += [f'        m_{m} = {m}::type_id::create("m_{m}", this);' for m in members]
+    out += ['    endfunction']
+    return out
+
+
+def _pad_class(out, target, rng):
+    n = 0
+    while len(out) < target - 1:
+        out += [
+            f'    virtual task step_{n}();',
+            f'        int value = {rng.randrange(1000)};',
+            f'        `uvm_info(get_type_name(), $sformatf("step {n} value=%0d", value), UVM_HIGH)',
+            '    endtask',
+        ]
+        n += 1
+    out.append('endclass')
+    return out
+
+
+def generate_project(root, modules=DEFAULTS['modules'], classes=DEFAULTS['classes'],
+                     include_depth=DEFAULTS['include_depth'], lines=DEFAULTS['lines'],
+                     classes_per_file=DEFAULTS['classes_per_file'], seed=DEFAULTS['seed']):
+    """Writes the tree under root and returns its stats: files, bytes, modules, classes and tests."""
+    rng = random.Random(seed)
+    stats = {'files': 0, 'bytes': 0, 'modules': modules, 'classes': classes,
+             'tests': sum(1 for j in range(classes) if j % 4 == 3)}
+
+    def write(rel, out):
+        stats['files'] += 1
+        stats['bytes'] += _write(os.path.join(root, rel), out)
+
+    write('Makefile', ['INCDIRS = +incdir+include',
+                       'compile:',
+                       '\tvcs -sverilog -ntb_opts uvm $(INCDIRS) -f files.f'])
+    for k in range(max(1, include_depth)):
+        out = [f'`ifndef SYNTH_DEFS_{k}_SVH', f'`define SYNTH_DEFS_{k}_SVH']
+        if k + 1 < include_depth:
+            out.append(f'`include "defs_{k + 1}.svh"')
+        out += [f'`define SYNTH_CONST_{k}_{n} {rng.randrange(1 << 16)}' for n in range(max(1, lines // 10))]
+        out.append('`endif')
+        write(f'include/defs_{k}.svh', out)
+
+    for i in range(modules):
+        write(f'rtl/mod_{i}.sv', _module(i, modules, lines, rng))
+
+    per_file = max(1, classes_per_file)
+    for f, start in enumerate(range(0, classes, per_file)):
+        out = ['`include "defs_0.svh"', '`include "uvm_macros.svh"', 'import uvm_pkg::*;', '']
+        block = range(start, min(classes, start + per_file))
+        for j in block:
+            out = _pad_class(out + _class(j, rng), len(out) + lines // len(block), rng)
+            out.append('')
+        write(f'tb/synth_pkg_{f}.sv', out)
+
+    top = ['`include "defs_0.svh"', 'module tb_top;', '    logic clk = 0, rst_n = 0;',
+           '    logic [31:0] din, dout;', '    always #5 clk = ~clk;']
+    if modules:
+        top.append('    mod_0 dut (.clk(clk), .rst_n(rst_n), .din(din), .dout(dout));')
+    top += ['    initial run_test();', 'endmodule']
+    write('tb/tb_top.sv', top)
+    return stats
+
+
+def add_arguments(parser):
+    parser.add_argument('--modules', type=int, default=DEFAULTS['modules'], help='number of RTL modules')
+    parser.add_argument('--classes', type=int, default=DEFAULTS['classes'], help='number of UVM classes')
+    parser.add_argument('--include-depth', type=int, default=DEFAULTS['include_depth'],
+                        help='length of the `include chain')
+    parser.add_argument('--lines', type=int, default=DEFAULTS['lines'], help='approximate lines per source file')
+    parser.add_argument('--classes-per-file', type=int, default=DEFAULTS['classes_per_file'])
+    parser.add_argument('--seed', type=int, default=DEFAULTS['seed'], help='random seed for the generated content')
+
+
+def generation_params(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic SystemVerilog verification tree.')
+    parser.add_argument('root')
+    add_arguments(parser)
+    args = parser.parse_args()
+    stats = generate_project(args.root, **generation_params(args))
+    print(f"Wrote {stats['files']} files ({stats['bytes'] / 1e6:.1f} MB): {stats['modules']} modules, "
+          f"{stats['classes']} classes ({stats['tests']} tests) under {args.root}")
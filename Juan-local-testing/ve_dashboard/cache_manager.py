@@ -0,0 +1,224 @@
+"""
+cache_manager.py
+
+Per-environment in-memory state for the dashboard, kept within a memory
+budget. For each environment the dashboard has served, the manager holds
+its current ProjectSnapshot (with the design graph), its watcher when
+watching is on, and open handles on its component and search indexes.
+
+The entries are kept in least-recently-used order. Each one has an
+estimated size (see estimate_bytes). Once the total goes over
+`cache_memory_mb`, the least recently used environments are evicted.
+Eviction closes their indexes, stops their watchers and drops their include
+graph. Nothing is lost by this: the SQLite indexes under
+cache_dir hold every parsed file, including the ones a watcher re-parsed,
+which it writes back to the component index as it goes. The next request for
+an evicted environment reopens them and re-reads only the files that changed.
+An entry whose environment now points at another project path is torn down
+the same way before it is replaced. The
+environment being served is never evicted, even if it alone is over the
+budget.
+"""
+import threading
+from collections import OrderedDict
+
+import shared_cache
+from component_index import open_component_index
+from include_graph import forget_include_graph
+from metrics import cache_result, count
+from scanner import scan_project_tree
+from search_index import index_candidates, open_search_index
+from settings import get_setting
+from watcher import start_watcher
+
+# Measured with tracemalloc on synthetic trees (bench/synth.py): one file entry,
+# and one component together with its share of the design graph's edges
+FILE_BYTES = 500
+COMPONENT_BYTES = 2200
+# An open SQLite connection's page cache (the default cache_size is 2 MiB)
+SQLITE_BYTES = 2 * 1024 * 1024
+
+
+def estimate_bytes(snapshot, index=None, search=None):
+    """Approximate memory held for one environment."""
+    size = 0
+    if snapshot is not None:
+        size += len(snapshot.files) * FILE_BYTES + len(snapshot.components) * COMPONENT_BYTES
+    if index is not None:
+        size += SQLITE_BYTES + index.cached_bytes()
+    if search is not None:
+        size += SQLITE_BYTES
+    return size
+
+
+class _Entry:
+    def __init__(self, env_id, project_path):
+        self.env_id = env_id
+        self.project_path = project_path
+        self.lock = threading.Lock()
+        self.search_lock = threading.Lock()
+        self.snapshot = None
+        self.watcher = None
+        self.index = None
+        self.search = None
+        self.generation = 0
+        self.bytes = 0
+
+
+class CacheManager:
+    """LRU of per-environment snapshots and index handles, bounded by budget bytes."""
+
+    def __init__(self, budget, config=None):
+        self.budget = budget
+        self.config = config
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, env_id, project_path):
+        stale = None
+        with self._lock:
+            entry = self._entries.get(env_id)
+            if entry is None or entry.project_path != project_path:
+                stale = entry
+                entry = self._entries[env_id] = _Entry(env_id, project_path)
+            self._entries.move_to_end(env_id)
+        if stale is not None:
+            self._teardown([stale])
+        return entry
+
+    def snapshot(self, env_id, project_path):
+        """Current snapshot of an environment, from its watcher or a scan through its open index.
+
+        Concurrent requests for the same environment share one scan.
+        """
+        entry = self._entry(env_id, project_path)
+        generation = entry.generation
+        with entry.lock:
+            if entry.generation != generation and entry.snapshot is not None:
+                # Another thread scanned while this one waited
+                cache_result('snapshot', 1, 0)
+                return entry.snapshot
+            if shared_cache.enabled():
+                # serve.py workers: the shared store already counts its own hits and misses
+                snapshot = shared_cache.shared_snapshot(env_id, project_path, self.config)
+            elif entry.watcher is not None:
+                cache_result('snapshot', 1, 0)
+                snapshot = entry.watcher.snapshot
+            else:
+                cache_result('snapshot', 0, 1)
+                if entry.index is None:
+                    entry.index = open_component_index(env_id, self.config)
+                snapshot = scan_project_tree(project_path, index=entry.index)
+                if entry.generation == 0:
+                    # The watcher re-parses changed files from here on and keeps the index current
+                    entry.watcher = start_watcher(env_id, project_path, self.config, snapshot, entry.index)
+            entry.snapshot = snapshot
+            entry.generation += 1
+            entry.bytes = estimate_bytes(snapshot, entry.index, entry.search)
+        self._enforce_budget(keep=env_id)
+        return snapshot
+
+    def watcher(self, env_id):
+        """The running watcher of an environment, or None."""
+        with self._lock:
+            entry = self._entries.get(env_id)
+        return entry.watcher if entry is not None else None
+
+    def search_candidates(self, env_id, project_path, snapshot, query, use_regex=False):
+        """Candidate files for a query from the environment's SearchIndex, opened once and kept open.
+
+        The index's SQLite connection is shared by the worker's threads, so it
+        is held only for the update and the lookup; the files are searched
+        after it is released. Returns None (every file) if the index cannot be used.
+        """
+        entry = self._entry(env_id, project_path)
+        with entry.search_lock:
+            if entry.search is None:
+                entry.search = open_search_index(env_id, self.config)
+            if entry.search is None:
+                return None
+            return index_candidates(entry.search, snapshot, query, use_regex)
+
+    def evict(self, env_id):
+        with self._lock:
+            entry = self._entries.pop(env_id, None)
+        if entry is not None:
+            self._forget(entry)
+            self._close(entry)
+
+    def _forget(self, entry):
+        """Drops the environment's other in-memory caches; its on-disk indexes stay."""
+        forget_include_graph(entry.env_id)
+        if shared_cache.enabled():
+            shared_cache.snapshot_store(entry.env_id, self.config).release()
+        self.evictions += 1
+        count('cache_evictions')
+
+    def _close(self, entry):
+        with entry.lock, entry.search_lock:
+            if entry.watcher is not None:
+                # Stopped before its index is closed, which it may still be writing to
+                entry.watcher.stop()
+            for handle in (entry.index, entry.search):
+                if handle is not None:
+                    handle.close()
+            entry.snapshot = entry.watcher = entry.index = entry.search = None
+            entry.bytes = 0
+
+    def _close_all(self, entries):
+        for entry in entries:
+            self._close(entry)
+
+    def _enforce_budget(self, keep=None):
+        with self._lock:
+            total = sum(e.bytes for e in self._entries.values())
+            victims = []
+            for env_id, entry in self._entries.items():
+                if total <= self.budget:
+                    break
+                if env_id != keep:
+                    victims.append(entry)
+                    total -= entry.bytes
+            for entry in victims:
+                del self._entries[entry.env_id]
+        if victims:
+            self._teardown(victims)
+
+    def _teardown(self, entries):
+        """Forgets entries already removed from the LRU, then closes them in the background."""
+        for entry in entries:
+            self._forget(entry)
+        # Stopping a watcher waits for its thread's current poll, so keep that off the request
+        threading.Thread(target=self._close_all, args=(entries,), name='ve-evict', daemon=True).start()
+
+    def stats(self):
+        """Budget, usage and the cached environments, most recently used last."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return {'budget_bytes': self.budget,
+                'used_bytes': sum(e.bytes for e in entries),
+                'evictions': self.evictions,
+                'environments': [{'id': e.env_id,
+                                  'bytes': e.bytes,
+                                  'files': len(e.snapshot.files) if e.snapshot is not None else 0,
+                                  'watching': e.watcher is not None}
+                                 for e in entries]}
+
+
+_MANAGER = []
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_cache_manager(config=None):
+    """The process-wide CacheManager, sized by the `cache_memory_mb` setting."""
+    with _MANAGER_LOCK:
+        if not _MANAGER:
+            budget = float(get_setting('cache_memory_mb', config) or 0) * 1024 * 1024
+            _MANAGER.append(CacheManager(int(budget), config))
+        return _MANAGER[0]
+
+
+def environment_snapshot(env_id, project_path, config=None):
+    """Current snapshot for an environment, served through the process-wide cache manager."""
+    return get_cache_manager(config).snapshot(env_id, project_path)
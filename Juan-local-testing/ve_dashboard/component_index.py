@@ -0,0 +1,47 @@
+"""
+component_index.py
+
+Persistent component index, one SQLite file per environment under the
+configured cache directory. Rows are keyed by project-relative path and carry
+the mtime and size seen when the file was last parsed, so a warm scan only
+re-reads the .sv/.v files that changed since the previous run.
+"""
+import os
+import sqlite3
+
+from settings import cache_dir
+from scanner import scan_project_tree
+from signature_cache import SignatureCache
+
+# Version of the stored component lists; bump it when sv_parser's output changes shape
+COMPONENTS_VERSION = 3
+
+
+class ComponentIndex(SignatureCache):
+    """Maps path -> (mtime, size, components) and persists it in SQLite."""
+
+    def __init__(self, db_path):
+        super().__init__(db_path, COMPONENTS_VERSION)
+
+
+def index_path(env_id, config=None):
+    return os.path.join(cache_dir(config), f'{env_id}.components.sqlite')
+
+
+def open_component_index(env_id, config=None):
+    """Opens the on-disk index for a configured environment, or returns None if it cannot be used."""
+    if not env_id:
+        return None
+    try:
+        return ComponentIndex(index_path(env_id, config))
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def scan_environment(env_id, project_path, config=None):
+    """Scans project_path, reusing the environment's on-disk index for unchanged files."""
+    index = open_component_index(env_id, config)
+    if index is None:
+        return scan_project_tree(project_path)
+    with index:
+        return scan_project_tree(project_path, index=index)
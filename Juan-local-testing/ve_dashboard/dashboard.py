@@ -1,10 +1,24 @@
-from flask import Flask, render_template, abort, request, redirect, url_for, flash
+from flask import Flask, Response, render_template, abort, request, redirect, url_for, flash, jsonify
 import os
-import re
 import json
 
+import metrics
+import shared_cache
+from cache_manager import environment_snapshot, get_cache_manager
+from metrics import phase
+from profiler import get_profiler
+from usage_finder import dependent_page
+from search_index import search_page, DEFAULT_PAGE_SIZE
+from include_graph import environment_include_graph
+from impact import analyze_impact, changed_files_from_git
+from file_viewer import FileView, DEFAULT_PAGE_LINES, page_start
+from artifacts import delete_artifacts, disk_usage, format_bytes, largest_dirs
+from sim_results import environment_results, results_summary
+from report import FORMATS, build_report, render
+
 app = Flask(__name__)
 app.secret_key = 'supersecretkey' # Needed for flashing messages
+app.add_template_filter(format_bytes, 'filesize')
 
 # Load environments from config file
 def load_environments():
@@ -24,230 +38,360 @@ def get_project_path(env_id):
     env = ENV_MAP.get(env_id)
     return env['path'] if env else None
 
-def find_full_path(project_path, filename):
-    """Finds the full path of a file within a project directory."""
-    for root, dirs, files in os.walk(project_path):
-        if filename in files:
-            return os.path.join(root, filename)
-    return None
-
-def perform_text_search(project_path, query, use_regex=False, case_sensitive=False):
-    """Performs a raw text or regex search across all files in the project.
-
-    Returns a tuple: (results_list, error_message_or_None)
-    """
-    results = []
-    if not query:
-        return results, None
-
-    # Prepare regex or simple substring matching
-    regex = None
-    flags = 0
-    if not case_sensitive:
-        flags = re.IGNORECASE
-
-    if use_regex:
-        try:
-            regex = re.compile(query, flags)
-        except re.error as e:
-            return [], f'Regex error: {e}'
-
-    for root, dirs, files in os.walk(project_path):
-        for file in files:
-            # Only search text-like source files
-            if file.endswith(('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.c', '.py', '.md', '.txt')):
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, 'r', errors='ignore') as f:
-                        for i, line in enumerate(f, start=1):
-                            hay = line.rstrip('\n')
-                            if use_regex:
-                                if regex.search(hay):
-                                    results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                            else:
-                                if case_sensitive:
-                                    if query in hay:
-                                        results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                                else:
-                                    if query.lower() in hay.lower():
-                                        results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                except Exception:
-                    pass
-
-    return results, None
-
-def parse_sv_file(filepath):
-    """Parses a SystemVerilog file to extract component info."""
-    components = []
-    try:
-        with open(filepath, 'r', errors='ignore') as f:
-            content = f.read()
-            # Find modules, classes, and interfaces
-            modules = re.findall(r'^\s*module\s+(\w+)', content, re.MULTILINE)
-            classes = re.findall(r'^\s*class\s+(\w+)', content, re.MULTILINE)
-            interfaces = re.findall(r'^\s*interface\s+(\w+)', content, re.MULTILINE)
-
-            base_filename = os.path.basename(filepath)
-            for name in modules:
-                components.append({'type': 'Module', 'name': name, 'file': base_filename})
-            for name in classes:
-                components.append({'type': 'Class', 'name': name, 'file': base_filename})
-            for name in interfaces:
-                components.append({'type': 'Interface', 'name': name, 'file': base_filename})
-    except Exception:
-        pass
-    return components
-
-
-def build_component_index(project_path):
-    """Return a dict of component_name -> defining_file"""
-    index = {}
-    for root, dirs, files in os.walk(project_path):
-        for fname in files:
-            if fname.endswith(('.sv', '.v')):
-                full = os.path.join(root, fname)
-                try:
-                    with open(full, 'r', errors='ignore') as f:
-                        content = f.read()
-                        modules = re.findall(r'^\s*module\s+(\w+)', content, re.MULTILINE)
-                        classes = re.findall(r'^\s*class\s+(\w+)', content, re.MULTILINE)
-                        interfaces = re.findall(r'^\s*interface\s+(\w+)', content, re.MULTILINE)
-                        for m in modules + classes + interfaces:
-                            index[m] = os.path.relpath(full, project_path)
-                except Exception:
-                    pass
-    return index
-
-
-def find_component_usages(project_path, component_names):
-    """Search for word-boundary occurrences of component names across project files.
-
-    Returns dict: component_name -> list of (file, line_num, line)
-    """
-    usages = {name: [] for name in component_names}
-    name_pattern = re.compile(r"\b(" + "|".join(re.escape(n) for n in component_names) + r")\b")
-
-    for root, dirs, files in os.walk(project_path):
-        for fname in files:
-            if fname.endswith(('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.py', '.txt')):
-                full = os.path.join(root, fname)
-                rel = os.path.relpath(full, project_path)
-                try:
-                    with open(full, 'r', errors='ignore') as f:
-                        for i, line in enumerate(f, start=1):
-                            for match in name_pattern.finditer(line):
-                                comp = match.group(1)
-                                usages[comp].append((rel, i, line.rstrip('\n')))
-                except Exception:
-                    pass
-    return usages
-
-@app.route('/', methods=['GET', 'POST'])
-def project_dashboard():
-    # Hardcode the environment to fifo_project
-    env_id = "fifo_project"
-    
+# The un-prefixed routes (/api/search, /results, ...) serve the first configured environment
+DEFAULT_ENV_ID = ENVIRONMENTS[0]['id'] if ENVIRONMENTS else None
+
+def get_environment(env_id):
+    """Resolves a route's env_id (None on the un-prefixed routes) to (env_id, project_path), or aborts with 404."""
+    env_id = env_id or DEFAULT_ENV_ID
     project_path = get_project_path(env_id)
     if not project_path or not os.path.isdir(project_path):
-        abort(404, description="Environment 'fifo_project' not found or path is invalid.")
-
-    env_name = ENV_MAP.get(env_id, {}).get('name', 'FIFO Project')
+        abort(404, description=f"Environment '{env_id}' not found or path is invalid.")
+    return env_id, project_path
+
+def notify_deleted(env_id, files, dirs=()):
+    """Brings the environment's snapshot up to date after the dashboard deleted files or directories."""
+    if not files and not dirs:
+        return
+    watcher = get_cache_manager().watcher(env_id)
+    if watcher is not None:
+        watcher.notify(files, dirs)
+    elif shared_cache.enabled():
+        shared_cache.snapshot_store(env_id).invalidate()
+
+@app.before_request
+def start_request_timer():
+    get_profiler()
+    metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    """Reports the request's phases (walk, parse, search, render, ...) and counters in Server-Timing."""
+    timer = metrics.current()
+    if timer is not None:
+        timer.status = response.status_code
+        response.headers['Server-Timing'] = timer.server_timing()
+    return response
+
+@app.teardown_request
+def finish_request_timer(exc):
+    metrics.finish_request(request.endpoint or 'unknown')
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Process-wide request, phase, file and cache counters in the Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def debug_profile():
+    """Collapsed stacks sampled from request threads; ?reset=1 clears them after reading."""
+    profiler = get_profiler()
+    if profiler is None:
+        abort(404, description="The profiler is disabled; set \"profiler\": true in config.json.")
+    return Response(profiler.collapsed(reset=request.args.get('reset') == '1'), mimetype='text/plain')
+
+@app.route('/api/cache')
+def api_cache():
+    """JSON view of the cache manager: memory budget, estimated use and the environments held."""
+    return jsonify(get_cache_manager().stats())
+
+@app.route('/')
+def home():
+    return render_template('home.html', environments=ENVIRONMENTS)
+
+@app.route('/env/<env_id>/', methods=['GET', 'POST'])
+def project_dashboard(env_id):
+    env_id, project_path = get_environment(env_id)
+    env_name = ENV_MAP[env_id].get('name', env_id)
 
     if request.method == 'POST':
         # Handle file deletion
         files_to_delete = request.form.getlist('selected_files')
         deleted_count = 0
         error_count = 0
+        # One snapshot resolves every selected file instead of a tree walk per file
+        snapshot = environment_snapshot(env_id, project_path)
+        deleted = []
         for filename in files_to_delete:
-            full_path = find_full_path(project_path, filename)
+            full_path = snapshot.find(filename)
             if full_path and os.path.commonpath([project_path, full_path]) == project_path:
                 try:
                     os.remove(full_path)
+                    deleted.append(full_path)
                     deleted_count += 1
                 except OSError:
                     error_count += 1
             else:
                 error_count += 1
+        notify_deleted(env_id, deleted)
         
         if deleted_count > 0:
             flash(f'Successfully deleted {deleted_count} file(s).', 'success')
         if error_count > 0:
             flash(f'Failed to delete {error_count} file(s).', 'danger')
-        return redirect(url_for('project_dashboard'))
+        return redirect(url_for('project_dashboard', env_id=env_id))
 
     # --- GET Request Logic ---
     search_query = request.args.get('search_query', '')
     use_regex = request.args.get('use_regex') == '1'
     case_sensitive = request.args.get('case_sensitive') == '1'
-    search_results, search_error = [], None
+    search_results, search_error, search_next_cursor = [], None, None
+
+    # A single snapshot (kept current by the watcher when enabled) feeds every view
+    snapshot = environment_snapshot(env_id, project_path)
+    for err in snapshot.errors:
+        flash(f"Error scanning project files: {err}", "danger")
 
     if search_query:
-        search_results, search_error = perform_text_search(project_path, search_query, use_regex, case_sensitive)
+        # Only the first page is rendered; index.html pulls the rest from /api/search on demand
+        candidates = get_cache_manager().search_candidates(env_id, project_path, snapshot, search_query, use_regex)
+        search_results, search_next_cursor, search_error = search_page(env_id, snapshot, search_query,
+                                                                       use_regex, case_sensitive,
+                                                                       candidates=candidates)
+
+    dut_files, tb_files, tests = snapshot.dut_files, snapshot.tb_files, snapshot.tests
+    all_components = snapshot.components
+
+    # Build dependency data from the design graph: only per-component edge counts here;
+    # the referencing lines are fetched from /api/usages on demand
+    with phase('graph'):
+        graph = snapshot.graph
+        dep_stats = dict(sorted(graph.dependent_counts().items()))
+
+        # Filter out components that are not used by anything else
+        dep_components = {name: graph.nodes[name]['path'] for name in dep_stats}
+
+    with phase('render'):
+        return render_template('index.html', 
+                               env_id=env_id,
+                               env_name=env_name,
+                               project_path=project_path,
+                               dut_files=dut_files,
+                               tb_files=tb_files,
+                               tests=tests,
+                               all_components=all_components,
+                               dep_components=dep_components,
+                               dep_stats=dep_stats,
+                               search_query=search_query,
+                               search_results=search_results,
+                               search_next_cursor=search_next_cursor,
+                               search_error=search_error)
+
+@app.route('/api/search', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/search')
+def api_search(env_id):
+    """JSON search with cursor pagination: returns one page of matches and the cursor for the next."""
+    env_id, project_path = get_environment(env_id)
 
-    dut_files, tb_files, tests = [], [], []
-    all_components = []
     try:
-        for root, dirs, files in os.walk(project_path):
-            for file in files:
-                rel_path = os.path.relpath(os.path.join(root, file), project_path)
-                if file.endswith(('.sv', '.v')):
-                    # Simple categorization based on path
-                    if 'tb' in root or 'test' in root:
-                        if '_test.sv' in file or '_tests.sv' in file:
-                            tests.append(rel_path)
-                        else:
-                            tb_files.append(rel_path)
-                    else:
-                        dut_files.append(rel_path)
-                    
-                    # Extract components
-                    all_components.extend(parse_sv_file(os.path.join(root, file)))
-
-    except Exception as e:
-        flash(f"Error scanning project files: {e}", "danger")
-
-    # Build dependency data
-    component_names = [comp['name'] for comp in all_components]
-    dep_usages = find_component_usages(project_path, component_names)
-    
-    # Filter out components that are not used by anything else
-    dep_components = [comp for comp in all_components if comp['name'] in dep_usages and dep_usages[comp['name']]]
-
-
-    return render_template('index.html', 
-                           env_id=env_id,
-                           env_name=env_name,
-                           project_path=project_path,
-                           dut_files=dut_files,
-                           tb_files=tb_files,
-                           tests=tests,
-                           all_components=all_components,
-                           dep_components=dep_components,
-                           dep_usages=dep_usages,
-                           search_query=search_query,
-                           search_results=search_results,
-                           search_error=search_error)
-
-@app.route('/view_file/<path:filepath>')
-def view_file(filepath):
-    # Hardcode the environment to fifo_project
-    env_id = "fifo_project"
-    project_path = get_project_path(env_id)
-    if not project_path:
-        abort(404)
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    query = request.args.get('search_query', '')
+    use_regex = request.args.get('use_regex') == '1'
+    snapshot = environment_snapshot(env_id, project_path)
+    candidates = get_cache_manager().search_candidates(env_id, project_path, snapshot, query, use_regex) \
+        if query else None
+    results, next_cursor, error = search_page(env_id, snapshot, query, use_regex,
+                                              request.args.get('case_sensitive') == '1',
+                                              cursor=request.args.get('cursor'),
+                                              limit=limit, candidates=candidates)
+    return jsonify({'results': results, 'next_cursor': next_cursor, 'error': error})
+
+@app.route('/api/usages/<name>', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/usages/<name>')
+def api_usages(env_id, name):
+    """JSON list of the places that extend, instantiate or reference a component, paginated by cursor."""
+    env_id, project_path = get_environment(env_id)
 
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+    except ValueError:
+        limit = 100
+    snapshot = environment_snapshot(env_id, project_path)
+    node = snapshot.graph.nodes.get(name)
+    if node is None:
+        abort(404, description=f"Component '{name}' not found.")
+    lines, next_cursor = dependent_page(snapshot, name, cursor=request.args.get('cursor'), limit=limit)
+    return jsonify({'component': name, 'defined_in': node['path'], 'results': lines, 'next_cursor': next_cursor})
+
+@app.route('/api/includes', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/includes')
+def api_includes(env_id):
+    """JSON summary of the project's resolved `include graph: direct edges, cycles and unresolved names."""
+    env_id, project_path = get_environment(env_id)
+
+    graph = environment_include_graph(env_id, environment_snapshot(env_id, project_path))
+    return jsonify({'include_dirs': graph.incdirs,
+                    'includes': {key: sorted({t for t, _, _ in edges}) for key, edges in graph.includes.items() if edges},
+                    'cycles': graph.cycles(),
+                    'unresolved': {name: [{'file': rel, 'line_num': line} for rel, line, _ in uses]
+                                   for name, uses in graph.unresolved.items()}})
+
+@app.route('/api/includes/<path:filepath>', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/includes/<path:filepath>')
+def api_include_file(env_id, filepath):
+    """JSON include relations for one file: direct and transitive, in both directions."""
+    env_id, project_path = get_environment(env_id)
+
+    graph = environment_include_graph(env_id, environment_snapshot(env_id, project_path))
+    keys = graph.find(filepath)
+    if not keys:
+        abort(404, description=f"File '{filepath}' not found.")
+    if len(keys) > 1:
+        abort(400, description=f"'{filepath}' is ambiguous: {', '.join(keys)}")
+    filepath = keys[0]
+    return jsonify({'file': filepath,
+                    'includes': [{'file': t, 'line_num': line} for t, line, _ in graph.includes.get(filepath, ())],
+                    'included_by': [{'file': rel, 'line_num': line} for rel, line, _ in graph.included_by.get(filepath, ())],
+                    'pulls_in': sorted(graph.pulls_in(filepath)),
+                    'transitive_includers': sorted(graph.transitive_includers(filepath))})
+
+@app.route('/api/impact', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/impact')
+def api_impact(env_id):
+    """JSON list of UVM tests to rerun for ?file=a.sv&file=b.svh and/or ?git=<rev> changes."""
+    env_id, project_path = get_environment(env_id)
+
+    changed = request.args.getlist('file')
+    rev = request.args.get('git')
+    if rev:
+        try:
+            changed += changed_files_from_git(project_path, rev)
+        except Exception as e:
+            return jsonify({'error': f'git diff failed: {e}'}), 400
+    snapshot = environment_snapshot(env_id, project_path)
+    return jsonify(analyze_impact(snapshot, changed, environment_include_graph(env_id, snapshot)))
+
+@app.route('/results', defaults={'env_id': None})
+@app.route('/env/<env_id>/results')
+def results_page(env_id):
+    """Table of every results/<run>/sim.log, served from the cached results index."""
+    env_id, project_path = get_environment(env_id)
+
+    runs = environment_results(env_id, project_path)
+    with phase('render'):
+        return render_template('results.html',
+                               env_id=env_id,
+                               env_name=ENV_MAP[env_id].get('name', env_id),
+                               runs=runs,
+                               totals=results_summary(runs))
+
+@app.route('/api/results', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/results')
+def api_results(env_id):
+    """JSON list of parsed sim.log summaries, optionally filtered by ?status=FAIL or ?test=<name>."""
+    env_id, project_path = get_environment(env_id)
+
+    runs = environment_results(env_id, project_path)
+    status, test = request.args.get('status'), request.args.get('test')
+    runs = [r for r in runs if (not status or r['status'] == status) and (not test or r['test'] == test)]
+    return jsonify({'totals': results_summary(runs), 'runs': runs})
+
+@app.route('/report', defaults={'env_id': None})
+@app.route('/env/<env_id>/report')
+def report_page(env_id):
+    """Full project report from the current snapshot, as ?format=html (default), md or json."""
+    env_id, project_path = get_environment(env_id)
+
+    fmt = request.args.get('format', 'html')
+    if fmt not in FORMATS:
+        abort(400, description=f"Unknown report format '{fmt}'.")
+    report = build_report(env_id, environment_snapshot(env_id, project_path))
+    with phase('render'):
+        text = render(report, fmt)
+    mimetype = {'md': 'text/markdown', 'json': 'application/json', 'html': 'text/html'}[fmt]
+    return Response(text, mimetype=mimetype)
+
+@app.route('/artifacts', methods=['GET', 'POST'], defaults={'env_id': None})
+@app.route('/env/<env_id>/artifacts', methods=['GET', 'POST'])
+def artifacts_page(env_id):
+    """Disk usage by directory and build artifact; POST deletes the selected artifacts and every artifact of the selected kinds."""
+    env_id, project_path = get_environment(env_id)
+
+    if request.method == 'POST':
+        selected = request.form.getlist('selected_artifacts')
+        kinds = set(request.form.getlist('kinds'))
+        if kinds:
+            selected += [a['path'] for a in disk_usage(project_path)['artifacts'] if a['kind'] in kinds]
+        deleted, errors = delete_artifacts(project_path, selected)
+        notify_deleted(env_id, [full for full, was_dir in deleted if not was_dir],
+                       [full for full, was_dir in deleted if was_dir])
+        if deleted:
+            flash(f'Deleted {len(deleted)} artifact(s).', 'success')
+        for rel, reason in sorted(errors.items()):
+            flash(f'Could not delete {rel}: {reason}', 'danger')
+        return redirect(url_for('artifacts_page', env_id=env_id))
+
+    usage = disk_usage(project_path)
+    with phase('render'):
+        return render_template('artifacts.html',
+                               env_id=env_id,
+                               env_name=ENV_MAP[env_id].get('name', env_id),
+                               usage=usage,
+                               largest=largest_dirs(usage))
+
+@app.route('/api/artifacts', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/artifacts')
+def api_artifacts(env_id):
+    """JSON disk usage: totals, artifacts by size and kind, and the ?top=N largest directories."""
+    env_id, project_path = get_environment(env_id)
+
+    try:
+        top = max(1, min(int(request.args.get('top', 20)), 1000))
+    except ValueError:
+        top = 20
+    usage = disk_usage(project_path)
+    usage['dirs'] = largest_dirs(usage, top)
+    return jsonify(usage)
+
+def open_project_file(project_path, filepath):
+    """FileView of a file inside the project; aborts with 403 outside it and 404 if it cannot be opened."""
     # Security: Ensure the requested file is within the project directory
     full_path = os.path.join(project_path, filepath)
     if not os.path.commonpath([project_path, os.path.abspath(full_path)]) == project_path:
         abort(403)
-
     try:
-        with open(full_path, 'r', errors='ignore') as f:
-            content = f.read()
-        return render_template('view_file.html', filename=filepath, content=content)
-    except IOError:
+        return FileView(full_path)
+    except (IOError, ValueError):
         abort(404, description="File not found")
 
+def requested_page():
+    """(start, limit) from ?start=N&limit=M, or the page around ?line=N (e.g. a search hit)."""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_LINES))
+        if request.args.get('line'):
+            return page_start(request.args['line'], limit), limit
+        return int(request.args.get('start', 1)), limit
+    except ValueError:
+        abort(400, description="start, line and limit must be integers.")
+
+@app.route('/view_file/<path:filepath>', defaults={'env_id': None})
+@app.route('/env/<env_id>/view_file/<path:filepath>')
+def view_file(env_id, filepath):
+    """One page of a file, served from a memory-mapped view; the browser fetches neighbouring pages on scroll."""
+    env_id, project_path = get_environment(env_id)
+    start, limit = requested_page()
+    with open_project_file(project_path, filepath) as view:
+        page = view.page(start, limit)
+    with phase('render'):
+        return render_template('view_file.html',
+                               env_id=env_id,
+                               filename=filepath,
+                               page=page,
+                               limit=limit,
+                               target=request.args.get('line', type=int))
+
+@app.route('/api/file/<path:filepath>', defaults={'env_id': None})
+@app.route('/env/<env_id>/api/file/<path:filepath>')
+def api_file(env_id, filepath):
+    """JSON page of a file's lines: ?start=N&limit=M or ?line=N, plus prev_start/next_start cursors."""
+    env_id, project_path = get_environment(env_id)
+    start, limit = requested_page()
+    with open_project_file(project_path, filepath) as view:
+        page = view.page(start, limit)
+    page['file'] = filepath
+    return jsonify(page)
 
 if __name__ == '__main__':
     port = int(os.environ.get('VE_DASH_PORT', 5001))
@@ -10,6 +10,8 @@
 # The script will try to find config.json in its own directory.
 SCRIPT_DIR=$(dirname "$(readlink -f "$0")")
 CONFIG_FILE="$SCRIPT_DIR/config.json"
+# Headless query CLI answering from the dashboard's caches (see ve_dash.py)
+VE_DASH="$SCRIPT_DIR/ve-dash"
 
 # --- Helper Functions ---
 
@@ -20,15 +22,6 @@ print_header() {
     echo "================================================================================"
 }
 
-# A simple JSON parser using grep and sed. Works only for the specific format of config.json.
-# Usage: parse_json <file> <key>
-parse_json() {
-    local file=$1
-    local key=$2
-    # This parser is intentionally simple. For complex JSON, a tool like 'jq' would be better.
-    grep -o "\"${key}\": *\"[^\"]*\"" "$file" | sed "s/.*\"${key}\": *\"\(.*\)\"/\1/"
-}
-
 # --- Core Logic Functions ---
 
 select_environment() {
@@ -37,11 +30,14 @@ select_environment() {
         return 1
     fi
 
-    # Use a while loop and process substitution to correctly handle names with spaces.
+    # `ve-dash envs` prints id, path and name per line, tab-separated; names may contain spaces.
     local names=()
     local paths=()
-    while IFS= read -r line; do names+=("$line"); done < <(parse_json "$CONFIG_FILE" "name")
-    while IFS= read -r line; do paths+=("$line"); done < <(parse_json "$CONFIG_FILE" "path")
+    local id path name
+    while IFS=$'\t' read -r id path name; do
+        paths+=("$path")
+        names+=("$name")
+    done < <("$VE_DASH" envs)
 
     if [ ${#names[@]} -eq 0 ]; then
         echo "No environments found in config.json."
@@ -110,10 +106,8 @@ extract_components() {
         echo
         echo "| Type         | Name                         | File Path |"
         echo "|--------------|------------------------------|-----------|"
-        find "$PROJECT_PATH" -type f \( -name "*.sv" -o -name "*.v" \) -exec \
-            grep -E -H '^\s*(module|class|interface)\s+\w+' {} + \
-            | awk -F'[: ]+' '{printf "| %-12s | %-28s | %s |\n", $2, $3, $1}' \
-            | sed "s|^$PROJECT_PATH/||"
+        "$VE_DASH" components --project "$PROJECT_PATH" \
+            | awk -F'\t' '{printf "| %-12s | %-28s | %s |\n", $1, $2, $3}'
         echo
     } | if [ -n "$output_file" ]; then tee -a "$output_file"; else cat; fi
 }
@@ -129,14 +123,13 @@ search_project() {
     read -p "Case-sensitive? (y/N): " case_sensitive
     read -p "Use regex? (y/N): " use_regex
 
-    local grep_opts="-r"
-    [ "$case_sensitive" != "y" ] && grep_opts="$grep_opts -i"
-    [ "$use_regex" == "y" ] && grep_opts="$grep_opts -E"
+    local search_opts=()
+    [ "$case_sensitive" == "y" ] && search_opts+=(--case)
+    [ "$use_regex" == "y" ] && search_opts+=(--regex)
 
     echo "Searching for '$query'..."
-    grep $grep_opts --color=always "$query" "$PROJECT_PATH" \
-        --include=\*.{sv,v,vh,svh,svt,h,c,py,md,txt} \
-        | sed "s|^$PROJECT_PATH/||"
+    # Narrowed by the environment's trigram index instead of a grep -r over the whole tree
+    "$VE_DASH" search "$query" "${search_opts[@]}" --project "$PROJECT_PATH"
 }
 
 view_file() {
@@ -180,16 +173,15 @@ analyze_dependencies() {
     echo "Found symbol: ${symbol_name:-Not found}"
     echo "--------------------------------------------------------------------------------"
 
-    # Search for `include "filename"`
-    echo "Files including '$filename':"
-    grep -r --color=always "\`include \"$filename\"" "$PROJECT_PATH" --include=\*.{sv,v,svh} | sed "s|^$PROJECT_PATH/||"
+    # Resolved `include graph: direct and transitive includers of the file
+    echo "Files including $file_path:"
+    "$VE_DASH" includes "$file_path" --reverse --project "$PROJECT_PATH" | sed 's/^/  - /'
     echo
 
-    # Search for symbol instantiation if a symbol was found
+    # Design-graph edges (extends, instantiates, references) pointing at the symbol
     if [ -n "$symbol_name" ]; then
-        echo "Files instantiating '$symbol_name':"
-        # This is a simplified search for instantiation, looking for 'symbol_name instance_name ('
-        grep -r --color=always -E "$symbol_name\s+\w+\s*\(" "$PROJECT_PATH" --include=\*.{sv,v} | sed "s|^$PROJECT_PATH/||"
+        echo "Components using '$symbol_name':"
+        "$VE_DASH" deps "$symbol_name" --project "$PROJECT_PATH"
         echo
     fi
 }
@@ -198,19 +190,9 @@ generate_report() {
     local report_file="$SCRIPT_DIR/report.md"
     print_header "Generating Markdown Report"
     echo "Report will be saved to: $report_file"
-    
-    # Create or clear the report file
-    > "$report_file"
-    
-    echo "# Project Analysis Report for $(basename "$PROJECT_PATH")" >> "$report_file"
-    echo "*Generated on $(date)*" >> "$report_file"
-    echo "" >> "$report_file"
-
-    # Add file list to report
-    list_files "$report_file" >/dev/null # Suppress terminal output
 
-    # Add component list to report
-    extract_components "$report_file" >/dev/null # Suppress terminal output
+    # Files, components, dependencies, includes and results from one cached snapshot
+    python3 "$SCRIPT_DIR/report.py" "$PROJECT_PATH" --format md -o "$report_file"
 
     echo "Report generation complete."
 }
@@ -0,0 +1,265 @@
+"""
+file_viewer.py
+
+Paged reading of project files of any size, for the dashboard file viewer,
+the Tk GUI and the console menu. A file is memory-mapped and never read
+whole. A sparse line index records, for every BLOCK_SIZE bytes, how many
+newlines come before that block. Finding line N is then a binary search over
+the blocks plus a scan of at most one block, so a page costs the same at the
+top of a multi-GB sim.log as at its end.
+
+Line indexes are cached in memory and in cache_dir (lines.sqlite), keyed by
+path, mtime and size. When a file has only grown, like the log of a running
+simulation, only its new blocks are counted. A file counts as grown when it is
+no smaller and both its first HEAD_BYTES and the TAIL_BYTES before the old end
+are unchanged; anything else is indexed again from the start.
+
+Indexes are built outside the module lock, one build per path at a time, so
+indexing a multi-GB log does not hold up views of other files.
+"""
+import os
+import mmap
+import sqlite3
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from metrics import cache_result, count, phase
+from settings import cache_dir
+from signature_cache import open_cache_db
+
+SCHEMA_VERSION = 2
+SCHEMA = ['CREATE TABLE IF NOT EXISTS files ('
+          'path TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL, '
+          'newlines INTEGER NOT NULL, tail BLOB NOT NULL, head BLOB NOT NULL, starts BLOB NOT NULL)']
+BLOCK_SIZE = 1 << 16
+# Bytes before the indexed end of a file that must be unchanged for it to count as appended to
+TAIL_BYTES = 64
+# Leading bytes whose hash must be unchanged too, so a regenerated file with the same trailer is reindexed
+HEAD_BYTES = 4096
+DEFAULT_PAGE_LINES = 500
+MAX_PAGE_LINES = 5000
+# Longer lines (minified or generated netlists) are cut for display
+MAX_LINE_BYTES = 4096
+MEMORY_INDEXES = 64
+
+
+def _head_hash(mm, size):
+    return hashlib.sha1(mm[:min(HEAD_BYTES, size)]).digest()
+
+
+class LineIndex:
+    """Newlines before each BLOCK_SIZE block of one file, as of (mtime, size)."""
+
+    def __init__(self, mtime=0.0, size=0, starts=None, newlines=0, tail=b'', head=b''):
+        self.mtime = mtime
+        self.size = size
+        self.starts = starts if starts is not None else array('Q')
+        self.newlines = newlines
+        self.tail = tail
+        self.head = head
+
+    @property
+    def line_count(self):
+        if not self.size:
+            return 0
+        return self.newlines + (0 if self.tail.endswith(b'\n') else 1)
+
+    def extended(self, mm, mtime, size):
+        """A new index for the file grown to size, counting only the blocks after the last complete one."""
+        first = self.size // BLOCK_SIZE
+        starts = array('Q', self.starts[:first])
+        total = self.starts[first] if first < len(self.starts) else self.newlines
+        for block in range(first, (size + BLOCK_SIZE - 1) // BLOCK_SIZE):
+            starts.append(total)
+            total += mm[block * BLOCK_SIZE:min((block + 1) * BLOCK_SIZE, size)].count(b'\n')
+        count('bytes_read', size - first * BLOCK_SIZE)
+        return LineIndex(mtime, size, starts, total, bytes(mm[max(0, size - TAIL_BYTES):size]), _head_hash(mm, size))
+
+    def appended_to(self, mm, size):
+        """True if the file looks like this one with bytes appended.
+
+        Only the first HEAD_BYTES (by hash) and the TAIL_BYTES before the old
+        end are compared, not everything in between.
+        """
+        return (size >= self.size and mm[max(0, self.size - TAIL_BYTES):self.size] == self.tail
+                and _head_hash(mm, self.size) == self.head)
+
+    def offset(self, mm, line):
+        """Byte offset of 0-based line, which must be below line_count."""
+        if line <= 0:
+            return 0
+        # The last block with fewer than `line` newlines before it holds the line's preceding newline
+        block = bisect_left(self.starts, line) - 1
+        pos = block * BLOCK_SIZE
+        for _ in range(line - self.starts[block]):
+            pos = mm.find(b'\n', pos) + 1
+        return pos
+
+
+class LineIndexCache:
+    """Persists LineIndex objects in SQLite, keyed by absolute path."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = open_cache_db(db_path, SCHEMA_VERSION, SCHEMA)
+
+    def get(self, path):
+        row = self.conn.execute('SELECT mtime, size, newlines, tail, head, starts FROM files WHERE path = ?',
+                                (path,)).fetchone()
+        if row is None:
+            return None
+        starts = array('Q')
+        starts.frombytes(row[5])
+        return LineIndex(row[0], row[1], starts, row[2], bytes(row[3]), bytes(row[4]))
+
+    def put(self, path, index):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO files (path, mtime, size, newlines, tail, head, starts) '
+                              'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                              (path, index.mtime, index.size, index.newlines, index.tail, index.head,
+                               index.starts.tobytes()))
+
+    def close(self):
+        self.conn.close()
+
+
+_INDEXES = OrderedDict()
+_DISK = {}
+# path -> Event set when the thread building its index is done
+_BUILDING = {}
+_LOCK = threading.Lock()
+
+
+def _disk_cache(config=None):
+    db_path = os.path.join(cache_dir(config), 'lines.sqlite')
+    if db_path not in _DISK:
+        try:
+            _DISK[db_path] = LineIndexCache(db_path)
+        except (OSError, sqlite3.Error):
+            _DISK[db_path] = None
+    return _DISK[db_path]
+
+
+def _remember(path, index):
+    _INDEXES[path] = index
+    _INDEXES.move_to_end(path)
+    while len(_INDEXES) > MEMORY_INDEXES:
+        _INDEXES.popitem(last=False)
+
+
+def line_index(path, mm, st, config=None):
+    """The LineIndex of an open file, reused, extended or built as needed.
+
+    The lock covers only the lookups; the build runs outside it, and a second
+    request for the same path waits for the first build instead of repeating it.
+    """
+    while True:
+        with _LOCK:
+            disk = _disk_cache(config)
+            index = _INDEXES.get(path)
+            if index is None and disk is not None:
+                index = disk.get(path)
+            if index is not None and (index.mtime, index.size) == (st.st_mtime, st.st_size):
+                cache_result('lines', 1, 0)
+                _remember(path, index)
+                return index
+            building = _BUILDING.get(path)
+            if building is None:
+                building = _BUILDING[path] = threading.Event()
+                break
+        # Another thread is indexing this path; its result is checked again once it is done
+        building.wait()
+
+    try:
+        cache_result('lines', 0, 1)
+        with phase('line_index'):
+            if index is None or not index.appended_to(mm, st.st_size):
+                index = LineIndex()
+            index = index.extended(mm, st.st_mtime, st.st_size)
+        with _LOCK:
+            if disk is not None:
+                try:
+                    disk.put(path, index)
+                except sqlite3.Error:
+                    pass
+            _remember(path, index)
+        return index
+    finally:
+        with _LOCK:
+            _BUILDING.pop(path).set()
+
+
+class FileView:
+    """A memory-mapped file read by line ranges. Use as a context manager or call close()."""
+
+    def __init__(self, path, config=None):
+        self.path = os.path.abspath(path)
+        self._file = open(self.path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self.size = st.st_size
+        self._mm = None
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), self.size, access=mmap.ACCESS_READ)
+            self.index = line_index(self.path, self._mm, st, config)
+        else:
+            self.index = LineIndex(st.st_mtime)
+
+    @property
+    def line_count(self):
+        return self.index.line_count
+
+    def lines(self, start=1, limit=DEFAULT_PAGE_LINES):
+        """Returns [(line_num, text)] for up to limit lines from 1-based line start."""
+        limit = max(1, min(int(limit), MAX_PAGE_LINES))
+        if start < 1 or start > self.line_count:
+            return []
+        mm = self._mm
+        pos = self.index.offset(mm, start - 1)
+        page, begin = [], pos
+        for num in range(start, min(start + limit, self.line_count + 1)):
+            end = mm.find(b'\n', pos, self.size)
+            if end < 0:
+                end = self.size
+            text = mm[pos:min(end, pos + MAX_LINE_BYTES)].decode('utf-8', 'replace').rstrip('\r')
+            if end - pos > MAX_LINE_BYTES:
+                text += f' ... [{end - pos - MAX_LINE_BYTES} more bytes]'
+            page.append((num, text))
+            pos = end + 1
+        count('bytes_read', min(pos, self.size) - begin)
+        return page
+
+    def page(self, start=1, limit=DEFAULT_PAGE_LINES):
+        """One page as a dict for JSON: lines plus the start of the previous and next pages."""
+        limit = max(1, min(int(limit), MAX_PAGE_LINES))
+        start = max(1, min(int(start), max(self.line_count, 1)))
+        with phase('view'):
+            lines = self.lines(start, limit)
+        end = start + len(lines)
+        return {'start': start,
+                'lines': [{'line_num': n, 'text': text} for n, text in lines],
+                'line_count': self.line_count,
+                'size': self.size,
+                'prev_start': max(1, start - limit) if start > 1 else None,
+                'next_start': end if end <= self.line_count else None}
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def page_start(line, limit=DEFAULT_PAGE_LINES, context=None):
+    """First line of the page that shows `line` with some lines of context above it."""
+    if context is None:
+        context = min(20, limit // 4)
+    return max(1, int(line) - context)
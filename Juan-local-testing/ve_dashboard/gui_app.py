@@ -10,19 +10,23 @@ Features:
 - Show extracted components and a simple dependency viewer
 
 This is intentionally lightweight and synchronous so it's easy to run on Unix desktops.
+The window itself lives in gui_window.py and is only imported when there is a
+display, so console mode also works on hosts without Tk.
 """
 
 import os
 import json
-import re
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from tkinter.scrolledtext import ScrolledText
+
+from component_index import scan_environment
+from watcher import start_watcher
+from search_index import search_environment
+from file_viewer import FileView, page_start
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_PATH = os.path.join(SCRIPT_DIR, 'config.json')
+# Lines printed per page by the console menu's file viewer
+CONSOLE_PAGE_LINES = 40
 
-# Helper functions copied/adapted from dashboard.py
 
 def load_environments():
     try:
@@ -32,294 +36,6 @@ def load_environments():
         return []
 
 
-def parse_sv_file(filepath):
-    components = []
-    try:
-        with open(filepath, 'r', errors='ignore') as f:
-            content = f.read()
-            modules = re.findall(r'^\s*module\s+(\w+)', content, re.MULTILINE)
-            classes = re.findall(r'^\s*class\s+(\w+)', content, re.MULTILINE)
-            interfaces = re.findall(r'^\s*interface\s+(\w+)', content, re.MULTILINE)
-            base_filename = os.path.basename(filepath)
-            for name in modules:
-                components.append({'type': 'Module', 'name': name, 'file': base_filename})
-            for name in classes:
-                components.append({'type': 'Class', 'name': name, 'file': base_filename})
-            for name in interfaces:
-                components.append({'type': 'Interface', 'name': name, 'file': base_filename})
-    except Exception:
-        pass
-    return components
-
-
-def build_component_index(project_path):
-    index = {}
-    for root, dirs, files in os.walk(project_path):
-        for fname in files:
-            if fname.endswith(('.sv', '.v')):
-                full = os.path.join(root, fname)
-                try:
-                    with open(full, 'r', errors='ignore') as f:
-                        content = f.read()
-                        modules = re.findall(r'^\s*module\s+(\w+)', content, re.MULTILINE)
-                        classes = re.findall(r'^\s*class\s+(\w+)', content, re.MULTILINE)
-                        interfaces = re.findall(r'^\s*interface\s+(\w+)', content, re.MULTILINE)
-                        for m in modules + classes + interfaces:
-                            index[m] = os.path.relpath(full, project_path)
-                except Exception:
-                    pass
-    return index
-
-
-def find_component_usages(project_path, component_names):
-    usages = {name: [] for name in component_names}
-    if not component_names:
-        return usages
-    name_pattern = re.compile(r"\b(" + "|".join(re.escape(n) for n in component_names) + r")\b")
-    for root, dirs, files in os.walk(project_path):
-        for fname in files:
-            if fname.endswith(('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.py', '.txt')):
-                full = os.path.join(root, fname)
-                rel = os.path.relpath(full, project_path)
-                try:
-                    with open(full, 'r', errors='ignore') as f:
-                        for i, line in enumerate(f, start=1):
-                            for match in name_pattern.finditer(line):
-                                comp = match.group(1)
-                                usages[comp].append((rel, i, line.rstrip('\n')))
-                except Exception:
-                    pass
-    return usages
-
-
-def perform_text_search(project_path, query, use_regex=False, case_sensitive=False):
-    results = []
-    if not query:
-        return results, None
-    regex = None
-    flags = 0 if case_sensitive else re.IGNORECASE
-    if use_regex:
-        try:
-            regex = re.compile(query, flags)
-        except re.error as e:
-            return [], f'Regex error: {e}'
-    for root, dirs, files in os.walk(project_path):
-        for file in files:
-            if file.endswith(('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.c', '.py', '.md', '.txt')):
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, 'r', errors='ignore') as f:
-                        for i, line in enumerate(f, start=1):
-                            hay = line.rstrip('\n')
-                            if use_regex:
-                                if regex.search(hay):
-                                    results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                            else:
-                                if case_sensitive:
-                                    if query in hay:
-                                        results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                                else:
-                                    if query.lower() in hay.lower():
-                                        results.append({'file': os.path.relpath(full_path, project_path), 'line_num': i, 'line_content': hay})
-                except Exception:
-                    pass
-    return results, None
-
-
-class VEDashboardGUI(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title('VE Dashboard - Local GUI')
-        self.geometry('1000x700')
-
-        self.environments = load_environments()
-        self.current_env = None
-        self.current_path = None
-
-        self.create_widgets()
-
-    def create_widgets(self):
-        left = ttk.Frame(self)
-        left.pack(side='left', fill='y', padx=10, pady=10)
-
-        ttk.Label(left, text='Environments').pack(anchor='nw')
-        self.env_listbox = tk.Listbox(left, height=10)
-        self.env_listbox.pack(fill='y')
-        for env in self.environments:
-            self.env_listbox.insert('end', env.get('name', 'Unnamed'))
-        self.env_listbox.bind('<<ListboxSelect>>', self.on_env_select)
-
-        ttk.Button(left, text='Reload config', command=self.reload_config).pack(fill='x', pady=5)
-
-        mid = ttk.Frame(self)
-        mid.pack(side='left', fill='both', expand=True, padx=10, pady=10)
-
-        # Search box
-        search_frame = ttk.Frame(mid)
-        search_frame.pack(fill='x')
-        self.search_var = tk.StringVar()
-        ttk.Entry(search_frame, textvariable=self.search_var).pack(side='left', fill='x', expand=True)
-        self.regex_var = tk.BooleanVar()
-        ttk.Checkbutton(search_frame, text='Regex', variable=self.regex_var).pack(side='left')
-        self.case_var = tk.BooleanVar()
-        ttk.Checkbutton(search_frame, text='Case', variable=self.case_var).pack(side='left')
-        ttk.Button(search_frame, text='Search', command=self.on_search).pack(side='left', padx=4)
-
-        # File lists and components
-        panes = ttk.Panedwindow(mid, orient='horizontal')
-        panes.pack(fill='both', expand=True, pady=10)
-
-        files_frame = ttk.Labelframe(panes, text='Files')
-        panes.add(files_frame, weight=1)
-        self.files_tree = ttk.Treeview(files_frame, columns=('type',), show='tree')
-        self.files_tree.pack(fill='both', expand=True)
-        self.files_tree.bind('<Double-1>', self.on_file_open)
-
-        comp_frame = ttk.Labelframe(panes, text='Components')
-        panes.add(comp_frame, weight=1)
-        self.comp_tree = ttk.Treeview(comp_frame, columns=('type','file'), show='headings')
-        self.comp_tree.heading('type', text='Type')
-        self.comp_tree.heading('file', text='File')
-        self.comp_tree.pack(fill='both', expand=True)
-        self.comp_tree.bind('<Double-1>', self.on_component_select)
-
-        # Bottom: file viewer and actions
-        bottom = ttk.Frame(self)
-        bottom.pack(side='right', fill='both', expand=True, padx=10, pady=10)
-        ttk.Label(bottom, text='File viewer').pack(anchor='nw')
-        self.viewer = ScrolledText(bottom, wrap='none', height=20)
-        self.viewer.pack(fill='both', expand=True)
-
-        action_frame = ttk.Frame(bottom)
-        action_frame.pack(fill='x')
-        ttk.Button(action_frame, text='Delete File', command=self.delete_selected_file).pack(side='left')
-        ttk.Button(action_frame, text='Show Dependencies', command=self.show_dependencies).pack(side='left')
-
-    def reload_config(self):
-        self.environments = load_environments()
-        self.env_listbox.delete(0, 'end')
-        for env in self.environments:
-            self.env_listbox.insert('end', env.get('name', 'Unnamed'))
-        messagebox.showinfo('Config', 'Reloaded config.json')
-
-    def on_env_select(self, event=None):
-        sel = self.env_listbox.curselection()
-        if not sel:
-            return
-        idx = sel[0]
-        env = self.environments[idx]
-        self.current_env = env
-        self.current_path = env.get('path')
-        self.refresh_file_list()
-        self.refresh_components()
-        self.viewer.delete('1.0','end')
-
-    def refresh_file_list(self):
-        self.files_tree.delete(*self.files_tree.get_children())
-        if not self.current_path or not os.path.isdir(self.current_path):
-            return
-        for root, dirs, files in os.walk(self.current_path):
-            for f in files:
-                rel = os.path.relpath(os.path.join(root, f), self.current_path)
-                self.files_tree.insert('', 'end', text=rel)
-
-    def refresh_components(self):
-        self.comp_tree.delete(*self.comp_tree.get_children())
-        if not self.current_path:
-            return
-        components = []
-        for root, dirs, files in os.walk(self.current_path):
-            for f in files:
-                full = os.path.join(root, f)
-                if f.endswith(('.sv', '.v')):
-                    components.extend(parse_sv_file(full))
-        for comp in components:
-            self.comp_tree.insert('', 'end', values=(comp['type'], comp['file']), text=comp['name'])
-
-    def on_file_open(self, event=None):
-        item = self.files_tree.focus()
-        if not item:
-            return
-        filename = self.files_tree.item(item, 'text')
-        full = os.path.join(self.current_path, filename)
-        try:
-            with open(full, 'r', errors='ignore') as f:
-                data = f.read()
-            self.viewer.delete('1.0','end')
-            self.viewer.insert('1.0', data)
-        except Exception as e:
-            messagebox.showerror('Open', f'Failed to open: {e}')
-
-    def delete_selected_file(self):
-        item = self.files_tree.focus()
-        if not item:
-            messagebox.showwarning('Delete', 'No file selected')
-            return
-        filename = self.files_tree.item(item, 'text')
-        full = os.path.join(self.current_path, filename)
-        if not os.path.isfile(full):
-            messagebox.showwarning('Delete', 'Selected item is not a regular file')
-            return
-        if messagebox.askyesno('Delete', f'Are you sure you want to delete {filename}?'):
-            try:
-                os.remove(full)
-                self.refresh_file_list()
-                self.refresh_components()
-                self.viewer.delete('1.0','end')
-                messagebox.showinfo('Delete', 'File deleted')
-            except Exception as e:
-                messagebox.showerror('Delete', f'Failed to delete: {e}')
-
-    def on_search(self):
-        q = self.search_var.get().strip()
-        if not q or not self.current_path:
-            return
-        use_regex = self.regex_var.get()
-        case = self.case_var.get()
-        results, err = perform_text_search(self.current_path, q, use_regex=use_regex, case_sensitive=case)
-        if err:
-            messagebox.showerror('Search', err)
-            return
-        # show results in viewer
-        self.viewer.delete('1.0','end')
-        if not results:
-            self.viewer.insert('1.0', 'No results')
-            return
-        for r in results:
-            self.viewer.insert('end', f"{r['file']}:{r['line_num']} - {r['line_content']}\n")
-
-    def on_component_select(self, event=None):
-        item = self.comp_tree.focus()
-        if not item:
-            return
-        name = self.comp_tree.item(item, 'text')
-        # find definition file via index
-        index = build_component_index(self.current_path)
-        defined = index.get(name)
-        # show usages
-        usages = find_component_usages(self.current_path, [name])
-        self.viewer.delete('1.0','end')
-        self.viewer.insert('1.0', f"Component: {name}\nDefined in: {defined}\n\nUsages:\n")
-        for u in usages.get(name, []):
-            self.viewer.insert('end', f"{u[0]}:{u[1]} - {u[2]}\n")
-
-    def show_dependencies(self):
-        if not self.current_path:
-            return
-        index = build_component_index(self.current_path)
-        usages = find_component_usages(self.current_path, index.keys())
-        out = []
-        for comp, def_file in index.items():
-            refs = [u for u in usages.get(comp, []) if u[0] != def_file]
-            if refs:
-                out.append(f"{comp} defined in {def_file} used {len(refs)} times")
-        self.viewer.delete('1.0','end')
-        if not out:
-            self.viewer.insert('1.0', 'No external dependencies found')
-        else:
-            self.viewer.insert('1.0', '\n'.join(out))
-
-
 def choose_env_console(environments):
     if not environments:
         print('No environments configured in config.json')
@@ -347,11 +63,16 @@ def console_menu(env):
         print('Project path does not exist or is not a directory')
         return
 
+    # Scanned once per session; a watcher (if enabled) keeps it current, otherwise it is rescanned after a delete
+    watcher = start_watcher(env.get('id'), project_path)
+    state = {'snapshot': None if watcher else scan_environment(env.get('id'), project_path)}
+
+    def snapshot():
+        return watcher.snapshot if watcher is not None else state['snapshot']
+
     def list_files():
-        for root, dirs, files in os.walk(project_path):
-            for f in files:
-                rel = os.path.relpath(os.path.join(root, f), project_path)
-                print(rel)
+        for rel in snapshot().files:
+            print(rel)
 
     def view_file():
         fp = input('Enter file path (relative to project) to view: ').strip()
@@ -359,8 +80,20 @@ def console_menu(env):
         if not os.path.isfile(full):
             print('File not found')
             return
-        with open(full, 'r', errors='ignore') as f:
-            print(f.read())
+        # Printed a page at a time, so a multi-GB log never has to be read whole
+        with FileView(full) as view:
+            start = 1
+            while True:
+                for num, text in view.lines(start, CONSOLE_PAGE_LINES):
+                    print(f'{num:>7}  {text}')
+                start += CONSOLE_PAGE_LINES
+                if start > view.line_count:
+                    return
+                cmd = input(f'-- lines {start}-{view.line_count} remain: Enter=more, <N>=go to line N, q=quit -- ').strip()
+                if cmd.lower() in ('q', 'quit'):
+                    return
+                if cmd.isdigit():
+                    start = page_start(int(cmd), CONSOLE_PAGE_LINES)
 
     def delete_file():
         fp = input('Enter file path (relative to project) to delete: ').strip()
@@ -372,6 +105,10 @@ def console_menu(env):
         if confirm.lower() == 'yes':
             try:
                 os.remove(full)
+                if watcher is not None:
+                    watcher.notify([full])
+                else:
+                    state['snapshot'] = scan_environment(env.get('id'), project_path)
                 print('Deleted')
             except Exception as e:
                 print('Failed to delete:', e)
@@ -382,7 +119,8 @@ def console_menu(env):
             return
         use_regex = input('Use regex? (y/N): ').strip().lower() == 'y'
         case = input('Case sensitive? (y/N): ').strip().lower() == 'y'
-        results, err = perform_text_search(project_path, q, use_regex=use_regex, case_sensitive=case)
+        results, err = search_environment(env.get('id'), snapshot(), q,
+                                          use_regex=use_regex, case_sensitive=case)
         if err:
             print('Search error:', err)
             return
@@ -393,12 +131,7 @@ def console_menu(env):
             print(f"{r['file']}:{r['line_num']} - {r['line_content']}")
 
     def components():
-        comps = []
-        for root, dirs, files in os.walk(project_path):
-            for f in files:
-                full = os.path.join(root, f)
-                if f.endswith(('.sv', '.v')):
-                    comps.extend(parse_sv_file(full))
+        comps = snapshot().components
         if not comps:
             print('No components found')
             return
@@ -406,12 +139,9 @@ def console_menu(env):
             print(f"{c['type']} {c['name']} in {c['file']}")
 
     def deps():
-        index = build_component_index(project_path)
-        usages = find_component_usages(project_path, index.keys())
-        for comp, def_file in index.items():
-            refs = [u for u in usages.get(comp, []) if u[0] != def_file]
-            if refs:
-                print(f"{comp} defined in {def_file} used {len(refs)} times")
+        graph = snapshot().graph
+        for comp, n in sorted(graph.dependent_counts().items()):
+            print(f"{comp} defined in {graph.nodes[comp]['path']} used {n} times")
 
     actions = {
         'l': ('List files', list_files),
@@ -438,6 +168,9 @@ def console_menu(env):
         else:
             print('Unknown command')
 
+    if watcher is not None:
+        watcher.stop()
+
 
 if __name__ == '__main__':
     # If no DISPLAY (headless), fall back to console mode
@@ -450,5 +183,6 @@ if __name__ == '__main__':
         else:
             print('Exiting')
     else:
+        from gui_window import VEDashboardGUI
         app = VEDashboardGUI()
         app.mainloop()
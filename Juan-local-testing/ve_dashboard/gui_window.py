@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+gui_window.py
+
+Tkinter window of the local GUI (see gui_app.py, which imports it only when
+$DISPLAY is set): environment list, file and component trees, a paged file
+viewer, search and delete.
+"""
+
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox
+from tkinter.scrolledtext import ScrolledText
+
+from usage_finder import dependent_page
+from component_index import scan_environment
+from watcher import start_watcher
+from search_index import search_environment
+from file_viewer import FileView, page_start
+from settings import load_config
+
+# Lines inserted into the viewer at a time; more are loaded as it scrolls towards either end
+VIEWER_PAGE_LINES = 1000
+
+
+class VEDashboardGUI(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title('VE Dashboard - Local GUI')
+        self.geometry('1000x700')
+
+        self.environments = load_config().get('environments', [])
+        self.current_env = None
+        self.current_path = None
+        self.snapshot = None
+        self.watcher = None
+        self.watch_generation = None
+        self.file_view = None
+        self.view_range = None
+        self.view_pending = False
+        self.search_hits = []
+
+        self.create_widgets()
+        self.after(1000, self.poll_watcher)
+
+    def create_widgets(self):
+        left = ttk.Frame(self)
+        left.pack(side='left', fill='y', padx=10, pady=10)
+
+        ttk.Label(left, text='Environments').pack(anchor='nw')
+        self.env_listbox = tk.Listbox(left, height=10)
+        self.env_listbox.pack(fill='y')
+        for env in self.environments:
+            self.env_listbox.insert('end', env.get('name', 'Unnamed'))
+        self.env_listbox.bind('<<ListboxSelect>>', self.on_env_select)
+
+        ttk.Button(left, text='Reload config', command=self.reload_config).pack(fill='x', pady=5)
+
+        mid = ttk.Frame(self)
+        mid.pack(side='left', fill='both', expand=True, padx=10, pady=10)
+
+        # Search box
+        search_frame = ttk.Frame(mid)
+        search_frame.pack(fill='x')
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side='left', fill='x', expand=True)
+        self.regex_var = tk.BooleanVar()
+        ttk.Checkbutton(search_frame, text='Regex', variable=self.regex_var).pack(side='left')
+        self.case_var = tk.BooleanVar()
+        ttk.Checkbutton(search_frame, text='Case', variable=self.case_var).pack(side='left')
+        ttk.Button(search_frame, text='Search', command=self.on_search).pack(side='left', padx=4)
+
+        # File lists and components
+        panes = ttk.Panedwindow(mid, orient='horizontal')
+        panes.pack(fill='both', expand=True, pady=10)
+
+        files_frame = ttk.Labelframe(panes, text='Files')
+        panes.add(files_frame, weight=1)
+        self.files_tree = ttk.Treeview(files_frame, columns=('type',), show='tree')
+        self.files_tree.pack(fill='both', expand=True)
+        self.files_tree.bind('<Double-1>', self.on_file_open)
+
+        comp_frame = ttk.Labelframe(panes, text='Components')
+        panes.add(comp_frame, weight=1)
+        self.comp_tree = ttk.Treeview(comp_frame, columns=('type','file'), show='headings')
+        self.comp_tree.heading('type', text='Type')
+        self.comp_tree.heading('file', text='File')
+        self.comp_tree.pack(fill='both', expand=True)
+        self.comp_tree.bind('<Double-1>', self.on_component_select)
+
+        # Bottom: file viewer and actions
+        bottom = ttk.Frame(self)
+        bottom.pack(side='right', fill='both', expand=True, padx=10, pady=10)
+        ttk.Label(bottom, text='File viewer').pack(anchor='nw')
+        self.viewer = ScrolledText(bottom, wrap='none', height=20)
+        self.viewer.pack(fill='both', expand=True)
+        self.viewer.configure(yscrollcommand=self.on_viewer_scroll)
+        self.viewer.tag_configure('target', background='#fff3cd')
+        self.viewer.bind('<Double-1>', self.on_viewer_open)
+
+        action_frame = ttk.Frame(bottom)
+        action_frame.pack(fill='x')
+        ttk.Button(action_frame, text='Delete File', command=self.delete_selected_file).pack(side='left')
+        ttk.Button(action_frame, text='Show Dependencies', command=self.show_dependencies).pack(side='left')
+
+    def reload_config(self):
+        self.environments = load_config().get('environments', [])
+        self.env_listbox.delete(0, 'end')
+        for env in self.environments:
+            self.env_listbox.insert('end', env.get('name', 'Unnamed'))
+        messagebox.showinfo('Config', 'Reloaded config.json')
+
+    def on_env_select(self, event=None):
+        sel = self.env_listbox.curselection()
+        if not sel:
+            return
+        idx = sel[0]
+        env = self.environments[idx]
+        self.current_env = env
+        self.current_path = env.get('path')
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.watcher = start_watcher(env.get('id'), self.current_path) if self.current_path else None
+        self.rescan()
+        self.show_text('')
+
+    def rescan(self):
+        """Refreshes both trees from the watcher's snapshot, or from one walk of the environment."""
+        if self.watcher is not None:
+            self.snapshot = self.watcher.snapshot
+            self.watch_generation = self.watcher.generation
+        else:
+            self.snapshot = scan_environment(self.current_env.get('id'), self.current_path) if self.current_path else None
+        self.refresh_file_list()
+        self.refresh_components()
+
+    def poll_watcher(self):
+        """Redraws the trees when the watcher has applied changes since the last refresh."""
+        if self.watcher is not None and self.watcher.generation != self.watch_generation:
+            self.rescan()
+        self.after(1000, self.poll_watcher)
+
+    def refresh_file_list(self):
+        self.files_tree.delete(*self.files_tree.get_children())
+        if not self.snapshot:
+            return
+        for rel in self.snapshot.files:
+            self.files_tree.insert('', 'end', text=rel)
+
+    def refresh_components(self):
+        self.comp_tree.delete(*self.comp_tree.get_children())
+        if not self.snapshot:
+            return
+        for comp in self.snapshot.components:
+            self.comp_tree.insert('', 'end', values=(comp['type'], comp['file']), text=comp['name'])
+
+    def on_file_open(self, event=None):
+        item = self.files_tree.focus()
+        if not item:
+            return
+        self.open_file(self.files_tree.item(item, 'text'))
+
+    def open_file(self, rel, line=None):
+        """Shows a file in pages from a memory-mapped view, starting around line if given."""
+        full = os.path.join(self.current_path, rel)
+        try:
+            view = FileView(full)
+        except Exception as e:
+            messagebox.showerror('Open', f'Failed to open: {e}')
+            return
+        self.show_text('')
+        self.file_view = view
+        start = page_start(line, VIEWER_PAGE_LINES) if line else 1
+        self.view_range = (start, start)
+        self.load_lines(forward=True)
+        if line:
+            index = f'{line - start + 1}.0'
+            self.viewer.tag_add('target', index, f'{index} lineend')
+            self.viewer.see(index)
+
+    def show_text(self, text):
+        """Replaces the viewer contents with plain text, closing any open file view."""
+        if self.file_view is not None:
+            self.file_view.close()
+        self.file_view, self.view_range, self.search_hits = None, None, []
+        self.viewer.delete('1.0', 'end')
+        if text:
+            self.viewer.insert('1.0', text)
+
+    def load_lines(self, forward):
+        """Appends the next page of the open file, or prepends the previous one."""
+        self.view_pending = False
+        if self.file_view is None:
+            return
+        first, end = self.view_range
+        if forward:
+            lines = self.file_view.lines(end, VIEWER_PAGE_LINES)
+            self.viewer.insert('end', ''.join(text + '\n' for _, text in lines))
+            self.view_range = (first, end + len(lines))
+        elif first > 1:
+            start = max(1, first - VIEWER_PAGE_LINES)
+            lines = self.file_view.lines(start, first - start)
+            top = int(self.viewer.index('@0,0').split('.')[0])
+            self.viewer.insert('1.0', ''.join(text + '\n' for _, text in lines))
+            self.view_range = (start, end)
+            # Keep the lines that were on screen in place
+            self.viewer.yview(f'{top + len(lines)}.0')
+
+    def on_viewer_scroll(self, first, last):
+        self.viewer.vbar.set(first, last)
+        if self.file_view is None or self.view_pending:
+            return
+        if float(last) > 0.9 and self.view_range[1] <= self.file_view.line_count:
+            self.view_pending = True
+            self.after_idle(self.load_lines, True)
+        elif float(first) < 0.1 and self.view_range[0] > 1:
+            self.view_pending = True
+            self.after_idle(self.load_lines, False)
+
+    def on_viewer_open(self, event=None):
+        """Double-clicking a search result opens its file at the matching line."""
+        if not self.search_hits:
+            return
+        row = int(self.viewer.index(f'@{event.x},{event.y}').split('.')[0])
+        if 1 <= row <= len(self.search_hits):
+            self.open_file(*self.search_hits[row - 1])
+            return 'break'
+
+    def delete_selected_file(self):
+        item = self.files_tree.focus()
+        if not item:
+            messagebox.showwarning('Delete', 'No file selected')
+            return
+        filename = self.files_tree.item(item, 'text')
+        full = os.path.join(self.current_path, filename)
+        if not os.path.isfile(full):
+            messagebox.showwarning('Delete', 'Selected item is not a regular file')
+            return
+        if messagebox.askyesno('Delete', f'Are you sure you want to delete {filename}?'):
+            try:
+                os.remove(full)
+                if self.watcher is not None:
+                    self.watcher.notify([full])
+                self.rescan()
+                self.show_text('')
+                messagebox.showinfo('Delete', 'File deleted')
+            except Exception as e:
+                messagebox.showerror('Delete', f'Failed to delete: {e}')
+
+    def on_search(self):
+        q = self.search_var.get().strip()
+        if not q or not self.current_path:
+            return
+        use_regex = self.regex_var.get()
+        case = self.case_var.get()
+        results, err = search_environment(self.current_env.get('id'), self.snapshot, q,
+                                          use_regex=use_regex, case_sensitive=case)
+        if err:
+            messagebox.showerror('Search', err)
+            return
+        # show results in viewer; double-clicking a result opens the file at that line
+        if not results:
+            self.show_text('No results')
+            return
+        self.show_text(''.join(f"{r['file']}:{r['line_num']} - {r['line_content']}\n" for r in results))
+        self.search_hits = [(r['file'], r['line_num']) for r in results]
+
+    def on_component_select(self, event=None):
+        item = self.comp_tree.focus()
+        if not item:
+            return
+        name = self.comp_tree.item(item, 'text')
+        graph = self.snapshot.graph
+        node = graph.nodes.get(name, {})
+        # show hierarchy, then everything that extends/instantiates/references it
+        usages, _ = dependent_page(self.snapshot, name, limit=1000)
+        self.show_text(f"Component: {name}\nDefined in: {node.get('path')}:{node.get('line')}\n")
+        ancestors = graph.ancestors(name)
+        if ancestors:
+            self.viewer.insert('end', f"Extends: {' -> '.join(ancestors)}\n")
+        for kind, _, target, _, _ in graph.dependencies(name, ('instantiates', 'references')):
+            self.viewer.insert('end', f"{kind.capitalize()}: {target}\n")
+        self.viewer.insert('end', '\nUsages:\n')
+        for u in usages:
+            self.viewer.insert('end', f"{u['file']}:{u['line_num']} [{u['kind']} by {u['source']}] - {u['line_content']}\n")
+
+    def show_dependencies(self):
+        if not self.current_path:
+            return
+        graph = self.snapshot.graph
+        out = []
+        for comp, n in sorted(graph.dependent_counts().items()):
+            out.append(f"{comp} defined in {graph.nodes[comp]['path']} used {n} times")
+        self.show_text('\n'.join(out) if out else 'No external dependencies found')
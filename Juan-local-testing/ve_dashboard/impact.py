@@ -0,0 +1,109 @@
+"""
+impact.py
+
+Change-impact analysis: which UVM tests can be affected by a set of edited
+files. Changed files are expanded through the include graph to every file that
+textually pulls them in, the components declared in those files are expanded
+through the design graph (extends, instantiates, references) to everything
+that depends on them, and the result is intersected with the UVM tests
+(classes deriving from uvm_test).
+
+All tests share the elaborated testbench, so a change that reaches the UVM
+top module (the one calling run_test) selects every test. Build inputs such as
+the Makefile or DPI C sources also select every test; documentation, logs and
+results select none.
+"""
+import os
+import subprocess
+from collections import deque
+
+from include_graph import INCLUDE_EXTS
+from scanner import SV_EXTS
+
+BUILD_FILES = ('Makefile', 'makefile', 'GNUmakefile')
+BUILD_EXTS = ('.mk', '.f', '.tcl', '.ps1', '.c', '.cc', '.cpp', '.h', '.so')
+
+
+def changed_files_from_git(project_path, rev='HEAD'):
+    """Project-relative paths changed against rev (including uncommitted edits) plus untracked files."""
+    if rev.startswith('-'):
+        raise ValueError(f'invalid revision: {rev}')
+    def git(*args):
+        out = subprocess.run(['git', '-C', project_path] + list(args), capture_output=True, text=True, check=True)
+        return [line for line in out.stdout.splitlines() if line]
+    changed = git('diff', '--name-only', '--relative', rev)
+    changed += git('ls-files', '--others', '--exclude-standard')
+    return sorted(set(changed))
+
+
+def uvm_tests(graph):
+    """Names of classes whose ancestry reaches uvm_test."""
+    return sorted(name for name, node in graph.nodes.items()
+                  if node['type'] == 'Class' and 'uvm_test' in graph.ancestors(name))
+
+
+def uvm_tops(snapshot):
+    """Top-level modules (not instantiated anywhere) whose source calls run_test."""
+    graph = snapshot.graph
+    tops = []
+    for name, node in graph.nodes.items():
+        if node['type'] != 'Module' or graph.dependents(name, ('instantiates',)):
+            continue
+        entry = snapshot.files.get(node['path'])
+        try:
+            with open(entry['path'], 'r', errors='ignore') as f:
+                if 'run_test' in f.read():
+                    tops.append(name)
+        except Exception:
+            pass
+    return sorted(tops)
+
+
+def _dependents_closure(graph, seeds):
+    """Multi-source BFS over incoming edges; returns seeds plus everything depending on them."""
+    seen, queue = set(seeds), deque(seeds)
+    while queue:
+        for _, source, _, _, _ in graph.dependents(queue.popleft()):
+            if source not in seen:
+                seen.add(source)
+                queue.append(source)
+    return seen
+
+
+def analyze_impact(snapshot, changed, includes=None):
+    """Returns the impact of `changed` (project-relative paths) as a dict.
+
+    Keys: changed, affected_files, affected_components, tests (sorted test
+    names to rerun) and all_tests_reason (why every test was selected, or None).
+    includes is an optional IncludeGraph used to follow `include chains.
+    """
+    graph = snapshot.graph
+    tests = uvm_tests(graph)
+    changed = sorted({os.path.normpath(p) for p in changed})
+    reason = None
+    files = set()
+    for rel in changed:
+        name = os.path.basename(rel)
+        if name in BUILD_FILES or name.endswith(BUILD_EXTS):
+            reason = reason or f'build input {rel} changed'
+        elif name.endswith(INCLUDE_EXTS):
+            if name.endswith(SV_EXTS) and rel not in snapshot.files:
+                reason = reason or f'source {rel} was removed'
+            files.add(rel)
+            if includes is not None:
+                files |= includes.transitive_includers(rel)
+
+    seeds = {comp['name'] for rel in files for comp in snapshot.components_by_file.get(rel, ())}
+    affected = _dependents_closure(graph, seeds)
+    if reason is None:
+        reached = sorted(set(uvm_tops(snapshot)) & affected)
+        if reached:
+            reason = f'testbench top {reached[0]} is affected'
+
+    return {
+        'changed': changed,
+        'affected_files': sorted(f for f in files if not os.path.isabs(f)),
+        'affected_components': sorted(affected),
+        'tests': tests if reason else [t for t in tests if t in affected],
+        'all_tests_reason': reason,
+    }
@@ -0,0 +1,389 @@
+"""
+include_graph.py
+
+Resolved `include graph for a project. Each source file's `include
+directives are read once and cached per environment (keyed by mtime and size,
+like the component index; headers outside the project are cached the same
+way, by absolute path), then resolved the way the simulator would: the
+including file's directory, the project (compile) directory, then the include
+search path from config.json `include_dirs` and the Makefile's +incdir+ flags.
+
+Strongly connected components are collapsed so include cycles are reported
+instead of looping, and the transitive closures in both directions are
+computed once per graph, making "who transitively includes X" and "what does
+X pull in" dictionary lookups.
+"""
+import os
+import re
+import threading
+from collections import defaultdict
+
+from metrics import cache_result, count, phase
+from scanner import scan_project_tree
+from settings import cache_dir, get_setting
+from signature_cache import SignatureCache
+from workers import parallel_map
+
+INCLUDE_RE = re.compile(r'`include\s*"([^"]+)"')
+INCLUDE_EXTS = ('.sv', '.v', '.vh', '.svh', '.svt', '.vhf', '.vhpp', '.svs', '.svm')
+MAKEFILES = ('GNUmakefile', 'makefile', 'Makefile')
+MAKE_ASSIGN_RE = re.compile(r'^\s*(?:export\s+|override\s+)?([A-Za-z_][\w.]*)\s*([:?+]?)=\s*(.*)$')
+MAKE_VAR_RE = re.compile(r'\$[({]([A-Za-z_][\w.]*)[)}]')
+INCDIR_RE = re.compile(r'\+incdir\+(\S+)')
+# Version of the cached directive lists ([name, line, text] per `include)
+DIRECTIVES_VERSION = 3
+
+
+def scan_includes(path):
+    """Returns [(included_name, line_number, line_text)] for a file's `include directives."""
+    found = []
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            for i, line in enumerate(f, start=1):
+                if '`include' not in line:
+                    continue
+                m = INCLUDE_RE.search(line)
+                if m:
+                    found.append((m.group(1), i, line.rstrip('\n')))
+    except Exception:
+        # skip unreadable files
+        pass
+    return found
+
+
+def _expand(value, variables, depth=0):
+    if depth > 10:
+        return value
+    return MAKE_VAR_RE.sub(lambda m: _expand(variables.get(m.group(1), m.group(0)), variables, depth + 1), value)
+
+
+def makefile_incdirs(project_path):
+    """Returns the +incdir+ directories named in the project's Makefile, with $(VARS) expanded.
+
+    Only simple `NAME = value` style assignments and the environment are used
+    for expansion; directories that still contain an unexpanded variable or do
+    not exist are skipped.
+    """
+    for name in MAKEFILES:
+        path = os.path.join(project_path, name)
+        if os.path.isfile(path):
+            break
+    else:
+        return []
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            text = f.read().replace('\\\n', ' ')
+    except OSError:
+        return []
+    variables = {'CURDIR': project_path}
+    for line in text.splitlines():
+        m = MAKE_ASSIGN_RE.match(line.split('#', 1)[0])
+        if not m or line.startswith('\t'):
+            continue
+        var, op, value = m.group(1), m.group(2), m.group(3).strip()
+        if op == '?' and (var in os.environ or var in variables):
+            continue
+        if op == '+':
+            value = (variables.get(var, '') + ' ' + value).strip()
+        variables[var] = value
+    for var, value in os.environ.items():
+        variables.setdefault(var, value)
+
+    dirs = []
+    for m in INCDIR_RE.finditer(text):
+        for d in _expand(m.group(1), variables).split('+'):
+            if not d or '$' in d:
+                continue
+            d = os.path.normpath(os.path.join(project_path, d))
+            if os.path.isdir(d) and d not in dirs:
+                dirs.append(d)
+    return dirs
+
+
+def include_dirs(project_path, config=None):
+    """Include search path: config.json `include_dirs` (relative to the project) then Makefile +incdir+."""
+    dirs = [os.path.normpath(os.path.join(project_path, d)) for d in get_setting('include_dirs', config) or []]
+    return dirs + [d for d in makefile_incdirs(project_path) if d not in dirs]
+
+
+class IncludeGraph:
+    """Include edges between files, keyed by project-relative path.
+
+    Headers resolved outside the project (e.g. the UVM sources) are keyed by
+    absolute path and read too, so their own includes are followed; their
+    (mtime, size) at that time is kept in `external`. Names that do not resolve
+    anywhere are kept in `unresolved`.
+    """
+
+    def __init__(self, project_path, incdirs=()):
+        self.project_path = project_path
+        self.incdirs = list(incdirs)
+        self.directives = {}
+        self.includes = {}
+        self.included_by = defaultdict(list)
+        self.unresolved = defaultdict(list)
+        self.external = {}
+        self._closures = None
+
+    def _key(self, full):
+        rel = os.path.relpath(full, self.project_path)
+        return full if rel.startswith(os.pardir) else rel
+
+    def full_path(self, key):
+        return key if os.path.isabs(key) else os.path.join(self.project_path, key)
+
+    def resolve(self, key, name):
+        """Returns the graph key of the file `include "name"` in `key` refers to, or None."""
+        if os.path.isabs(name):
+            return self._key(name) if os.path.isfile(name) else None
+        for base in [os.path.dirname(self.full_path(key)), self.project_path] + self.incdirs:
+            candidate = os.path.normpath(os.path.join(base, name))
+            if os.path.isfile(candidate):
+                return self._key(candidate)
+        return None
+
+    def find(self, name):
+        """Graph keys `name` may refer to: the key itself, else every file whose path ends in it (e.g. a basename)."""
+        if name in self.directives:
+            return [name]
+        suffix = os.sep + os.path.normpath(name)
+        return sorted(key for key in self.directives if (os.sep + key).endswith(suffix))
+
+    def _read(self, key, cache=None):
+        """Directives of a file the snapshot did not list, cached by its (mtime, size) when a cache is given."""
+        path = self.full_path(key)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return []
+        self.external[key] = (st.st_mtime, st.st_size)
+        cached = cache.lookup(key, st.st_mtime, st.st_size) if cache is not None else None
+        if cached is not None:
+            return [tuple(d) for d in cached]
+        found = scan_includes(path)
+        count('bytes_read', st.st_size)
+        if cache is not None:
+            cache.store(key, st.st_mtime, st.st_size, found)
+        return found
+
+    def external_current(self):
+        """True while no file read outside the snapshot has changed since the graph was built."""
+        for key, signature in self.external.items():
+            try:
+                st = os.stat(self.full_path(key))
+            except OSError:
+                return False
+            if (st.st_mtime, st.st_size) != signature:
+                return False
+        return True
+
+    def build(self, directives, cache=None):
+        """Resolves {key: [(name, line, text)]} into edges, following headers outside the project."""
+        self.directives = dict(directives)
+        self.includes = {}
+        self.included_by = defaultdict(list)
+        self.unresolved = defaultdict(list)
+        self.external = {}
+        self._closures = None
+        pending = list(self.directives)
+        while pending:
+            key = pending.pop()
+            edges = []
+            for name, line, text in self.directives[key]:
+                target = self.resolve(key, name)
+                if target is None:
+                    self.unresolved[name].append((key, line, text))
+                    continue
+                edges.append((target, line, text))
+                self.included_by[target].append((key, line, text))
+                if target not in self.directives:
+                    self.directives[target] = self._read(target, cache)
+                    pending.append(target)
+            self.includes[key] = edges
+        for uses in self.included_by.values():
+            uses.sort()
+        return self
+
+    def _strongly_connected(self):
+        """Iterative Tarjan; returns SCCs in reverse topological order (leaves first)."""
+        index, low, on_stack, stack, sccs = {}, {}, set(), [], []
+        counter = 0
+        for start in sorted(self.includes):
+            if start in index:
+                continue
+            work = [(start, iter(self.includes.get(start, ())))]
+            index[start] = low[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                for target, _, _ in children:
+                    if target not in index:
+                        index[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(self.includes.get(target, ()))))
+                        break
+                    if target in on_stack:
+                        low[node] = min(low[node], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                    if low[node] == index[node]:
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            scc.append(member)
+                            if member == node:
+                                break
+                        sccs.append(scc)
+        return sccs
+
+    def _compute(self):
+        sccs = self._strongly_connected()
+        component = {node: i for i, scc in enumerate(sccs) for node in scc}
+        cycles, down = [], []
+        # Leaves first: every other SCC a node includes is already finished
+        for i, scc in enumerate(sccs):
+            reach = set()
+            for node in scc:
+                for target, _, _ in self.includes.get(node, ()):
+                    reach.add(target)
+                    if component[target] != i:
+                        reach |= down[component[target]]
+            if len(scc) > 1 or scc[0] in reach:
+                cycles.append(sorted(scc))
+                reach |= set(scc)
+            down.append(frozenset(reach))
+        up = defaultdict(set)
+        for node, i in component.items():
+            for target in down[i]:
+                up[target].add(node)
+        self._closures = (
+            {node: down[i] for node, i in component.items()},
+            {node: frozenset(users) for node, users in up.items()},
+            cycles,
+        )
+
+    def _get_closures(self):
+        if self._closures is None:
+            self._compute()
+        return self._closures
+
+    def pulls_in(self, key):
+        """Every file `key` includes directly or transitively."""
+        return self._get_closures()[0].get(key, frozenset())
+
+    def transitive_includers(self, key):
+        """Every file that includes `key` directly or transitively."""
+        return self._get_closures()[1].get(key, frozenset())
+
+    def cycles(self):
+        """Lists of files that include each other in a loop."""
+        return self._get_closures()[2]
+
+    def mapping(self):
+        """Flat included_name -> [(includer, line, text)] map, as printed by tools/find_includes.py."""
+        mapping = defaultdict(list)
+        for key in sorted(self.includes):
+            if os.path.isabs(key):
+                continue
+            for name, line, text in self.directives.get(key, ()):
+                mapping[name].append((key, line, text))
+        return mapping
+
+
+def collect_directives(project_path, snapshot=None, cache=None, workers=None):
+    """Returns {rel: directives} for every include-capable file, re-reading only changed files when cached."""
+    if snapshot is None:
+        snapshot = scan_project_tree(project_path, parse_components=False)
+    directives, to_scan = {}, []
+    for rel, entry in snapshot.iter_files(INCLUDE_EXTS):
+        cached = cache.lookup(rel, entry['mtime'], entry['size']) if cache is not None else None
+        if cached is None:
+            to_scan.append(rel)
+        else:
+            directives[rel] = [tuple(d) for d in cached]
+    with phase('includes'):
+        found_all = parallel_map(scan_includes, [snapshot.files[rel]['path'] for rel in to_scan],
+                                 kind='io', workers=workers)
+    count('bytes_read', sum(snapshot.files[rel]['size'] for rel in to_scan))
+    if cache is not None:
+        cache_result('includes', len(directives), len(to_scan))
+    for rel, found in zip(to_scan, found_all):
+        directives[rel] = found
+        if cache is not None:
+            entry = snapshot.files[rel]
+            cache.store(rel, entry['mtime'], entry['size'], found)
+    return directives
+
+
+def build_include_graph(project_path, snapshot=None, cache=None, incdirs=None, workers=None, config=None):
+    if incdirs is None:
+        incdirs = include_dirs(project_path, config)
+    directives = collect_directives(project_path, snapshot, cache, workers)
+    graph = IncludeGraph(project_path, incdirs).build(directives, cache)
+    if cache is not None:
+        cache.sync(graph.directives)
+    return graph
+
+
+def index_path(env_id, config=None):
+    return os.path.join(cache_dir(config), f'{env_id}.includes.sqlite')
+
+
+_GRAPHS = {}
+# env_id -> lock held while that environment's graph is checked or rebuilt
+_ENV_LOCKS = {}
+_GRAPHS_LOCK = threading.Lock()
+
+
+def graph_signature(snapshot, config=None):
+    """What an environment's include graph depends on: its include files, Makefiles and `include_dirs`."""
+    files = frozenset((rel, entry['mtime'], entry['size']) for rel, entry in snapshot.iter_files(INCLUDE_EXTS))
+    makefiles = tuple((snapshot.files[name]['mtime'], snapshot.files[name]['size']) if name in snapshot.files else None
+                      for name in MAKEFILES)
+    return files, makefiles, tuple(get_setting('include_dirs', config) or ())
+
+
+def environment_include_graph(env_id, snapshot, config=None):
+    """Returns the include graph for an environment's snapshot.
+
+    A rescan only rebuilds the graph when one of the files it was built from
+    changed: the snapshot's include files, the Makefile, `include_dirs` or a
+    header it had to read itself (those outside the project, for instance).
+    """
+    with _GRAPHS_LOCK:
+        env_lock = _ENV_LOCKS.setdefault(env_id, threading.Lock())
+    # Builds are single-flight per environment; other environments' lookups only take _GRAPHS_LOCK
+    with env_lock:
+        with _GRAPHS_LOCK:
+            cached = _GRAPHS.get(env_id)
+        if cached is not None and cached[0] is snapshot:
+            return cached[2]
+        signature = graph_signature(snapshot, config)
+        if cached is None or cached[1] != signature or not cached[2].external_current():
+            try:
+                cache = SignatureCache(index_path(env_id, config), DIRECTIVES_VERSION)
+            except Exception:
+                cache = None
+            try:
+                graph = build_include_graph(snapshot.project_path, snapshot, cache, config=config)
+            finally:
+                if cache is not None:
+                    cache.close()
+        else:
+            graph = cached[2]
+        with _GRAPHS_LOCK:
+            _GRAPHS[env_id] = (snapshot, signature, graph)
+        return graph
+
+
+def forget_include_graph(env_id):
+    """Drops the in-memory include graph of an environment; its directive index stays on disk."""
+    with _GRAPHS_LOCK:
+        _GRAPHS.pop(env_id, None)
@@ -0,0 +1,190 @@
+"""
+metrics.py
+
+Request-level instrumentation. Library code wraps its expensive steps in
+`phase('walk')` and reports work with `count('bytes_read', n)` or
+`cache_result('components', hits, misses)`. Each report feeds two sinks:
+
+- the timer of the request served by the current thread, if any, which the
+  dashboard sends back as a Server-Timing header, and
+- process-wide counters rendered in the Prometheus text format at /metrics.
+
+Work done on pool threads is counted by the calling thread once the pool
+returns, so per-request numbers stay with the request that caused them.
+Nothing here imports Flask, so the scanner and indexes can report without it.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = 've_dashboard'
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help), in /metrics output order
+METRICS = {
+    'requests_total': ('counter', 'HTTP requests handled, by endpoint and status.'),
+    'request_duration_seconds': ('histogram', 'HTTP request latency, by endpoint.'),
+    'phase_seconds': ('summary', 'Time spent in each instrumented phase (walk, parse, search, usages, render, ...).'),
+    'files_scanned_total': ('counter', 'Files stat\'ed by project scans.'),
+    'bytes_read_total': ('counter', 'Bytes of project files read.'),
+    'cache_hits_total': ('counter', 'Per-file cache lookups served from a cache, by cache.'),
+    'cache_misses_total': ('counter', 'Per-file cache lookups that had to re-read the file, by cache.'),
+    'cache_evictions_total': ('counter', 'Environments evicted from memory to stay within cache_memory_mb.'),
+}
+
+
+class Registry:
+    """Thread-safe counters, summaries and histograms keyed by (name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, labels=()):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        key = (name, tuple(labels))
+        with self._lock:
+            buckets = self._histograms.get(key)
+            if buckets is None:
+                buckets = self._histograms[key] = [0] * len(DURATION_BUCKETS) + [0, 0.0]
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            buckets[-2] += 1
+            buckets[-1] += value
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: list(b) for key, b in self._histograms.items()}
+        out = []
+        for name, (kind, text) in METRICS.items():
+            full = f'{PREFIX}_{name}'
+            out += [f'# HELP {full} {text}', f'# TYPE {full} {kind}']
+            if kind == 'histogram':
+                for (metric, labels), buckets in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, n in zip(DURATION_BUCKETS, buckets):
+                        out.append(f'{full}_bucket{_labels(labels + (("le", repr(bound)),))} {n}')
+                    out.append(f'{full}_bucket{_labels(labels + (("le", "+Inf"),))} {buckets[-2]}')
+                    out.append(f'{full}_sum{_labels(labels)} {buckets[-1]:.6f}')
+                    out.append(f'{full}_count{_labels(labels)} {buckets[-2]}')
+                continue
+            suffixes = ('_sum', '_count') if kind == 'summary' else ('',)
+            for (metric, labels), value in sorted(values.items()):
+                for suffix in suffixes:
+                    if metric == name + suffix:
+                        out.append(f'{full}{suffix}{_labels(labels)} {_number(value)}')
+        return '\n'.join(out) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else f'{value:.6f}'
+
+
+class RequestTimer:
+    """Phases and counters of one request, in the order they were first seen."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.status = None
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Server-Timing header value: one dur= entry per phase, counters as desc=, then the total."""
+        parts = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.phases.items()]
+        parts += [f'{name};desc="{_number(value)}"' for name, value in self.counters.items()]
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+REGISTRY = Registry()
+_local = threading.local()
+_active = {}
+_active_lock = threading.Lock()
+
+
+def current():
+    """The RequestTimer of the request on this thread, or None."""
+    return getattr(_local, 'timer', None)
+
+
+def start_request():
+    timer = _local.timer = RequestTimer()
+    with _active_lock:
+        _active[threading.get_ident()] = timer
+    return timer
+
+
+def finish_request(endpoint, status=None):
+    """Records the request in the process-wide metrics and detaches its timer from this thread."""
+    timer = current()
+    if timer is None:
+        return None
+    _local.timer = None
+    with _active_lock:
+        _active.pop(threading.get_ident(), None)
+    status = status or timer.status or 500
+    REGISTRY.inc('requests_total', 1, (('endpoint', endpoint), ('status', str(status))))
+    REGISTRY.observe('request_duration_seconds', timer.elapsed(), (('endpoint', endpoint),))
+    return timer
+
+
+def active_threads():
+    """Thread ids currently serving a request (used by the sampling profiler)."""
+    with _active_lock:
+        return list(_active)
+
+
+@contextmanager
+def phase(name):
+    """Times the enclosed block as `name`; repeated or nested phases of the same name add up."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        REGISTRY.inc('phase_seconds_sum', seconds, (('phase', name),))
+        REGISTRY.inc('phase_seconds_count', 1, (('phase', name),))
+        timer = current()
+        if timer is not None:
+            timer.phases[name] = timer.phases.get(name, 0.0) + seconds
+
+
+def count(name, n=1, **labels):
+    """Adds n to the `<name>_total` counter; the request sees it as name (plus label values)."""
+    if not n:
+        return
+    REGISTRY.inc(f'{name}_total', n, tuple(sorted(labels.items())))
+    timer = current()
+    if timer is not None:
+        key = '_'.join([name] + [str(v) for _, v in sorted(labels.items())])
+        timer.counters[key] = timer.counters.get(key, 0) + n
+
+
+def cache_result(cache, hits, misses):
+    """Reports per-file lookups against one of the on-disk or in-memory caches."""
+    count('cache_hits', hits, cache=cache)
+    count('cache_misses', misses, cache=cache)
+
+
+def render():
+    return REGISTRY.render()
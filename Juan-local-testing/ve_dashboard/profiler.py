@@ -0,0 +1,90 @@
+"""
+profiler.py
+
+Optional sampling profiler for the dashboard, enabled with `profiler: true` in
+config.json. A daemon thread wakes every `profiler_interval` seconds, takes the
+current stack of every thread that is serving a request (sys._current_frames)
+and counts it. Request threads are never interrupted or traced, so the cost
+when enabled is one stack walk per busy thread per tick.
+
+Samples are reported as collapsed stacks, one "outer;...;inner count" line per
+distinct stack, the input format of flamegraph.pl and speedscope.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+from metrics import active_threads
+from settings import get_setting
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class SamplingProfiler:
+    def __init__(self, interval=0.005, threads=active_threads):
+        self.interval = interval
+        self.threads = threads
+        self.samples = 0
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ve-profiler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Records the current stack of every thread returned by `threads`."""
+        frames = sys._current_frames()
+        stacks = []
+        for ident in self.threads():
+            frame = frames.get(ident)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                stacks.append(';'.join(reversed(stack)))
+        if stacks:
+            with self._lock:
+                self._counts.update(stacks)
+                self.samples += len(stacks)
+
+    def collapsed(self, reset=False):
+        """Collapsed-stack text, most frequent stack first."""
+        with self._lock:
+            counts = self._counts
+            if reset:
+                self._counts, self.samples = Counter(), 0
+        return ''.join(f'{stack} {n}\n' for stack, n in counts.most_common())
+
+
+_PROFILER = []
+_PROFILER_LOCK = threading.Lock()
+
+
+def get_profiler(config=None):
+    """The process-wide profiler, started on first use; None unless the `profiler` setting is on."""
+    with _PROFILER_LOCK:
+        if not _PROFILER:
+            enabled = bool(get_setting('profiler', config))
+            interval = float(get_setting('profiler_interval', config) or 0.005)
+            _PROFILER.append(SamplingProfiler(interval).start() if enabled else None)
+        return _PROFILER[0]
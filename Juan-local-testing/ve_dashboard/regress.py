@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+regress.py
+
+Local regression runner. Discovers the UVM tests in a project (classes
+deriving from uvm_test, e.g. in fifo_tests.sv), expands them over a seed
+sweep and runs every (test, seed) pair in its own results/<test>_<seed>
+directory on a bounded pool of simulator processes. Each run is subject to a
+timeout, its sim.log is parsed with sim_results.py, and a pass/fail summary is
+printed and written to results/regression.json.
+
+Usage:
+    python3 regress.py /path/to/project                       # every test, seed 1
+    python3 regress.py /path/to/project --seeds 20 --jobs 8   # 20 random seeds per test
+    python3 regress.py /path/to/project --tests fifo_base_test --seed 7 --seed 11
+    python3 regress.py /path/to/project --shard 2/4           # this machine's quarter of the runs
+    python3 regress.py /path/to/project --stub                # tools/stub_simv.py instead of simv
+
+The simulator command comes from --sim or the `regress_sim` setting in
+config.json; {project}, {test} and {seed} are substituted and the command is
+run inside the run's results directory, which receives sim.log.
+"""
+import os
+import sys
+import json
+import random
+import shlex
+import signal
+import argparse
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from impact import uvm_tests
+from scanner import scan_project_tree
+from settings import SCRIPT_DIR, get_setting
+from sim_results import RESULTS_DIR, LOG_NAME, parse_sim_log
+
+# Seconds a timed-out simulator gets after SIGTERM to flush its log before it is killed
+KILL_GRACE = 5.0
+STUB_SIM = f'{shlex.quote(sys.executable)} {shlex.quote(os.path.join(SCRIPT_DIR, "tools", "stub_simv.py"))}' \
+           ' +UVM_TESTNAME={test} +ntb_random_seed={seed} -l sim.log'
+
+
+def discover_tests(project_path):
+    """Names of the UVM tests declared in the project, sorted."""
+    return uvm_tests(scan_project_tree(project_path).graph)
+
+
+def make_seeds(count=1, seeds=None, base_seed=None):
+    """Explicit seeds if given, otherwise `count` seeds (seed 1 alone for a count of 1)."""
+    if seeds:
+        return list(dict.fromkeys(seeds))
+    if count <= 1:
+        return [1]
+    rng = random.Random(base_seed)
+    return [rng.randrange(1, 2 ** 31) for _ in range(count)]
+
+
+def plan_runs(tests, seeds, shard=None):
+    """(test, seed) pairs in a stable order; shard=(index, total) keeps every total-th run from index."""
+    runs = [(test, seed) for test in tests for seed in seeds]
+    if shard:
+        index, total = shard
+        runs = runs[index - 1::total]
+    return runs
+
+
+def _group_alive(pgid):
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _stop(proc):
+    """Terminates a run's whole session (shell plus simulator): SIGTERM, then SIGKILL after KILL_GRACE."""
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except OSError:
+        proc.terminate()
+    deadline = time.time() + KILL_GRACE
+    while time.time() < deadline:
+        if proc.poll() is not None and not _group_alive(proc.pid):
+            return
+        time.sleep(0.1)
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+    proc.wait()
+
+
+def run_one(project_path, sim_command, test, seed, timeout=None):
+    """Runs one simulation in results/<test>_<seed> and returns its result dict."""
+    run = f'{test}_{seed}'
+    run_dir = os.path.join(project_path, RESULTS_DIR, run)
+    os.makedirs(run_dir, exist_ok=True)
+    log_path = os.path.join(run_dir, LOG_NAME)
+    if os.path.exists(log_path):
+        # A stale log from an earlier run must not be mistaken for this one
+        os.remove(log_path)
+    command = sim_command.format(project=shlex.quote(project_path), test=shlex.quote(test), seed=seed)
+    started = time.time()
+    returncode, timed_out = None, False
+    with open(os.path.join(run_dir, 'run.out'), 'w') as out:
+        try:
+            proc = subprocess.Popen(command, shell=True, cwd=run_dir, stdout=out, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+        except OSError as e:
+            out.write(f'Failed to start simulator: {e}\n')
+            proc = None
+        if proc is not None:
+            try:
+                returncode = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                _stop(proc)
+
+    result = parse_sim_log(log_path)
+    status = result['status']
+    if timed_out:
+        status = 'TIMEOUT'
+    elif returncode != 0 and status == 'PASS':
+        status = 'FAIL'
+    result.update(run=run, test=test, seed=seed, status=status, returncode=returncode,
+                  elapsed=round(time.time() - started, 3), log=os.path.relpath(log_path, project_path))
+    return result
+
+
+def run_regression(project_path, runs, sim_command, jobs=None, timeout=None, progress=None):
+    """Runs (test, seed) pairs on at most `jobs` concurrent simulators; returns results in plan order."""
+    jobs = max(1, int(jobs or get_setting('regress_jobs') or 1))
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_one, project_path, sim_command, test, seed, timeout): (test, seed)
+                   for test, seed in runs}
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            if progress:
+                progress(result, len(results), len(runs))
+    return [results[run] for run in runs]
+
+
+def summarize(results):
+    """Counts per status plus, per test, how many seeds passed."""
+    totals, per_test = {}, {}
+    for r in results:
+        totals[r['status']] = totals.get(r['status'], 0) + 1
+        entry = per_test.setdefault(r['test'], {'runs': 0, 'passed': 0, 'failing_seeds': []})
+        entry['runs'] += 1
+        if r['status'] == 'PASS':
+            entry['passed'] += 1
+        else:
+            entry['failing_seeds'].append(r['seed'])
+    return {'totals': totals, 'tests': per_test}
+
+
+def _parse_shard(text):
+    try:
+        index, total = (int(x) for x in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError('shard must look like 2/4')
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError('shard index must be between 1 and the shard count')
+    return index, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run UVM tests in parallel over a seed sweep.')
+    parser.add_argument('project')
+    parser.add_argument('--tests', nargs='+', help='tests to run (default: every uvm_test subclass)')
+    parser.add_argument('--seeds', type=int, default=1, help='number of seeds per test')
+    parser.add_argument('--seed', type=int, action='append', help='explicit seed (repeatable)')
+    parser.add_argument('--base-seed', type=int, help='make the generated seed sweep reproducible')
+    parser.add_argument('--jobs', type=int, help='concurrent simulators (default: regress_jobs setting)')
+    parser.add_argument('--timeout', type=float, help='seconds before a run is killed (default: regress_timeout)')
+    parser.add_argument('--shard', type=_parse_shard, help='run only shard I of N, e.g. 1/4')
+    parser.add_argument('--sim', help='simulator command template with {project}, {test} and {seed}')
+    parser.add_argument('--stub', action='store_true', help='use tools/stub_simv.py instead of a real simulator')
+    args = parser.parse_args(argv)
+
+    project_path = os.path.abspath(args.project)
+    if not os.path.isdir(project_path):
+        print('Project path not found:', args.project)
+        return 2
+    tests = args.tests or discover_tests(project_path)
+    if not tests:
+        print('No UVM tests found.')
+        return 2
+    sim_command = STUB_SIM if args.stub else (args.sim or get_setting('regress_sim'))
+    timeout = args.timeout if args.timeout is not None else get_setting('regress_timeout')
+    runs = plan_runs(tests, make_seeds(args.seeds, args.seed, args.base_seed), args.shard)
+    print(f'Running {len(runs)} simulations of {len(tests)} tests')
+
+    def progress(result, done, total):
+        print(f"[{done}/{total}] {result['status']:<10} {result['run']} ({result['elapsed']:.1f}s)")
+
+    results = run_regression(project_path, runs, sim_command, args.jobs, timeout or None, progress)
+    summary = summarize(results)
+    summary['runs'] = results
+    report = os.path.join(project_path, RESULTS_DIR, 'regression.json')
+    try:
+        with open(report, 'w') as f:
+            json.dump(summary, f, indent=2)
+    except OSError as e:
+        print('Could not write', report, e)
+
+    print()
+    for test, entry in sorted(summary['tests'].items()):
+        failing = f" failing seeds: {', '.join(map(str, entry['failing_seeds']))}" if entry['failing_seeds'] else ''
+        print(f"{test}: {entry['passed']}/{entry['runs']} passed{failing}")
+    print('Totals: ' + ', '.join(f'{status} {n}' for status, n in sorted(summary['totals'].items())))
+    return 0 if summary['totals'].get('PASS', 0) == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
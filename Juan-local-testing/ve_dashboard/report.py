@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+report.py
+
+Project report for a verification environment: files by category, extracted
+components, dependency counts, the resolved `include graph and the latest
+simulation results, as Markdown, JSON or HTML.
+
+Every section is built from one ProjectSnapshot. On the command line it comes
+from the shared snapshot store (shared_cache.py), the same published pickle
+serve.py workers read, and a scan is published there for the next run. The
+include graph and the results are read through their on-disk indexes, and the
+results logs are found in the snapshot's file list, so a report on a warm
+cache walks no directories and re-reads only files that changed.
+
+Usage:
+    python3 report.py /path/to/project                    # Markdown to stdout
+    python3 report.py --env fifo_project --format html -o report.html
+    python3 report.py /path/to/project --format json --max-age 600
+
+A published snapshot is reused while it is at most --max-age seconds old
+(default: the `snapshot_max_age` setting), or always while serve.py's watcher
+process keeps it current.
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from include_graph import environment_include_graph
+from metrics import phase
+from settings import SCRIPT_DIR, environment_for_path, load_config
+from shared_cache import shared_snapshot
+from sim_results import environment_results, results_summary
+
+FORMATS = ('md', 'json', 'html')
+
+
+def latest_results(runs):
+    """One row per test: run count, passes, failures and its most recent run's status and first error."""
+    latest, rows = {}, {}
+    for run in runs:
+        name = run['test'] or run['run']
+        row = rows.setdefault(name, {'test': name, 'runs': 0, 'passed': 0, 'failed': 0})
+        row['runs'] += 1
+        row['passed'] += run['status'] == 'PASS'
+        row['failed'] += run['status'] == 'FAIL'
+        if name not in latest or (run['mtime'], run['run']) > (latest[name]['mtime'], latest[name]['run']):
+            latest[name] = run
+    return [dict(row, run=latest[name]['run'], status=latest[name]['status'], mtime=latest[name]['mtime'],
+                 first_error=latest[name]['first_error'])
+            for name, row in sorted(rows.items())]
+
+
+def build_report(env_id, snapshot, config=None):
+    """Collects every report section from one snapshot into a JSON-serializable dict."""
+    project_path = snapshot.project_path
+    with phase('report'):
+        components = sorted(({'type': comp['type'], 'name': comp['name'], 'file': rel, 'line': comp.get('line')}
+                             for rel, comps in snapshot.components_by_file.items() for comp in comps),
+                            key=lambda c: (c['file'], c['line'] or 0, c['name']))
+        graph = snapshot.graph
+        dependents = sorted(graph.dependent_counts().items(), key=lambda item: (-item[1], item[0]))
+        includes = environment_include_graph(env_id, snapshot, config)
+        runs = environment_results(env_id, project_path, config, snapshot=snapshot)
+    return {
+        'project': os.path.basename(os.path.normpath(project_path)),
+        'env_id': env_id,
+        'project_path': project_path,
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'files': {
+            'total': len(snapshot.files),
+            'dut': sorted(snapshot.dut_files),
+            'tb': sorted(snapshot.tb_files),
+            'tests': sorted(snapshot.tests),
+        },
+        'components': components,
+        'dependencies': [{'name': name, 'file': graph.nodes[name]['path'], 'dependents': n}
+                         for name, n in dependents],
+        'includes': {
+            'include_dirs': includes.incdirs,
+            'edges': sum(len({t for t, _, _ in edges}) for edges in includes.includes.values()),
+            'files': {key: sorted({t for t, _, _ in edges}) for key, edges in sorted(includes.includes.items())
+                      if edges},
+            'cycles': includes.cycles(),
+            'unresolved': {name: [f'{rel}:{line}' for rel, line, _ in uses]
+                           for name, uses in sorted(includes.unresolved.items())},
+        },
+        'results': {
+            'totals': results_summary(runs),
+            'tests': latest_results(runs),
+        },
+        'errors': list(snapshot.errors),
+    }
+
+
+def _code_block(title, items):
+    return [f'**{title}**', '```', *items, '```', '']
+
+
+def render_markdown(report):
+    files, includes, results = report['files'], report['includes'], report['results']
+    lines = [f"# Project Analysis Report for {report['project']}",
+             f"*Generated on {report['generated']}*",
+             '',
+             f"{files['total']} files, {len(report['components'])} components, "
+             f"{includes['edges']} include edges, {sum(results['totals'].values())} simulation runs.",
+             '',
+             '### File Explorer',
+             '']
+    lines += _code_block('DUT Files', files['dut'])
+    lines += _code_block('Testbench Files', files['tb'])
+    lines += _code_block('Tests/Sequences', files['tests'])
+
+    lines += ['### Extracted Components', '',
+              '| Type         | Name                         | File Path |',
+              '|--------------|------------------------------|-----------|']
+    lines += [f"| {c['type']:<12} | {c['name']:<28} | {c['file']}:{c['line']} |" for c in report['components']]
+    lines.append('')
+
+    lines += ['### Dependencies', '']
+    if report['dependencies']:
+        lines += ['| Component | Defined In | Dependents |', '|-----------|------------|------------|']
+        lines += [f"| {d['name']} | {d['file']} | {d['dependents']} |" for d in report['dependencies']]
+    else:
+        lines.append('No component is used by another.')
+    lines.append('')
+
+    lines += ['### Include Graph', '']
+    lines += [f"- `{rel}` includes {', '.join(f'`{t}`' for t in targets)}" for rel, targets in includes['files'].items()]
+    if not includes['files']:
+        lines.append('No include directives found.')
+    lines.append('')
+    for cycle in includes['cycles']:
+        lines.append('**Include cycle:** ' + ' -> '.join(f'`{rel}`' for rel in cycle))
+    for name, uses in includes['unresolved'].items():
+        lines.append(f"**Unresolved:** `{name}` in {', '.join(uses)}")
+    if includes['cycles'] or includes['unresolved']:
+        lines.append('')
+
+    totals = results['totals']
+    lines += ['### Test Results', '',
+              ', '.join(f'{n} {status}' for status, n in totals.items()), '']
+    if results['tests']:
+        lines += ['| Test | Latest Run | Status | Runs | Passed | Failed | First Error |',
+                  '|------|------------|--------|------|--------|--------|-------------|']
+        for t in results['tests']:
+            error = (t['first_error'] or '').replace('|', '\\|')
+            lines.append(f"| {t['test']} | {t['run']} | {t['status']} | {t['runs']} | {t['passed']} "
+                         f"| {t['failed']} | {error} |")
+    else:
+        lines.append('No results/<run>/sim.log found.')
+    lines.append('')
+    for error in report['errors']:
+        lines.append(f'> Error scanning project files: {error}')
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(report):
+    return json.dumps(report, indent=2) + '\n'
+
+
+def render_html(report):
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    env = Environment(loader=FileSystemLoader(os.path.join(SCRIPT_DIR, 'templates')),
+                      autoescape=select_autoescape(['html']))
+    return env.get_template('report.html').render(report=report)
+
+
+RENDERERS = {'md': render_markdown, 'json': render_json, 'html': render_html}
+
+
+def render(report, fmt='md'):
+    return RENDERERS[fmt](report)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a Markdown, JSON or HTML report for a project.')
+    parser.add_argument('project', nargs='?', help='project directory (or use --env)')
+    parser.add_argument('--env', help='id of an environment in config.json')
+    parser.add_argument('--format', choices=FORMATS, help='output format (default: from -o, else md)')
+    parser.add_argument('-o', '--output', help='file to write instead of stdout')
+    parser.add_argument('--max-age', type=float, help='seconds a published snapshot is reused (default: snapshot_max_age)')
+    args = parser.parse_args()
+
+    config = load_config()
+    if args.env:
+        env = next((e for e in config.get('environments', []) if e['id'] == args.env), None)
+        if env is None:
+            parser.error(f'unknown environment: {args.env}')
+        env_id, project_path = env['id'], env['path']
+    elif args.project:
+        project_path = os.path.abspath(args.project)
+        env_id = environment_for_path(project_path, config)
+    else:
+        parser.error('give a project directory or --env')
+    if not os.path.isdir(project_path):
+        print('Project path not found:', project_path)
+        sys.exit(2)
+
+    fmt = args.format
+    if fmt is None:
+        ext = os.path.splitext(args.output or '')[1].lstrip('.')
+        fmt = {'htm': 'html', 'markdown': 'md'}.get(ext, ext) if ext in FORMATS + ('htm', 'markdown') else 'md'
+    snapshot = shared_snapshot(env_id, project_path, config, args.max_age)
+    text = render(build_report(env_id, snapshot, config), fmt)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f'Report written to {args.output}')
+    else:
+        sys.stdout.write(text)
@@ -0,0 +1,333 @@
+"""
+scanner.py
+
+Single-pass project scanner shared by the Flask dashboard, the Tk GUI and the
+console menu. One os.scandir-based walk builds a ProjectSnapshot (files,
+categories, sizes, mtimes and extracted components) that every view reads from
+instead of walking the tree again.
+"""
+import os
+import re
+import bisect
+from functools import partial
+
+from metrics import cache_result, count, phase
+from sv_parser import DesignGraph, parse_source
+from workers import parallel_map
+
+SV_EXTS = ('.sv', '.v')
+SEARCH_EXTS = ('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.c', '.py', '.md', '.txt')
+USAGE_EXTS = ('.sv', '.v', '.vh', '.svh', '.svt', '.h', '.py', '.txt')
+
+def extract_components(content, base_filename):
+    """Extracts declarations, class parents, instances and type references from SystemVerilog source text."""
+    return parse_source(content, base_filename)
+
+
+def parse_sv_file(filepath):
+    """Parses a SystemVerilog file to extract component info; raises if it cannot be read or parsed."""
+    with open(filepath, 'r', errors='ignore') as f:
+        return extract_components(f.read(), os.path.basename(filepath))
+
+
+def try_parse_sv_file(filepath):
+    """parse_sv_file for the scanner and watcher: returns (components, None), or ([], message) on failure."""
+    try:
+        return parse_sv_file(filepath), None
+    except Exception as e:
+        return [], f'{filepath}: {e!r}'
+
+
+def categorize(root, filename):
+    """Simple categorization based on path: 'dut', 'tb', 'test' or None for non-SV files."""
+    if not filename.endswith(SV_EXTS):
+        return None
+    if 'tb' in root or 'test' in root:
+        if '_test.sv' in filename or '_tests.sv' in filename:
+            return 'test'
+        return 'tb'
+    return 'dut'
+
+
+def file_entry(root, name, path, st):
+    """Builds the per-file record stored in ProjectSnapshot.files."""
+    return {
+        'name': name,
+        'path': path,
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+        'category': categorize(root, name),
+    }
+
+
+class ProjectSnapshot:
+    """Result of one scan of a project tree.
+
+    files maps a project-relative path to a dict with name, full path, size,
+    mtime and category. Components are extracted while scanning, so views never
+    need to re-read the SystemVerilog sources just to list them.
+    """
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        self.files = {}
+        self.components_by_file = {}
+        self.errors = []
+        self._components = None
+        self._graph = None
+        self._by_name = None
+
+    def add_file(self, rel, entry):
+        self.files[rel] = entry
+        self._by_name = None
+
+    def remove_file(self, rel):
+        self.files.pop(rel, None)
+        if self.components_by_file.pop(rel, None) is not None:
+            self._components = None
+            self._graph = None
+        self._by_name = None
+
+    def set_components(self, rel, components):
+        self.components_by_file[rel] = components
+        self._components = None
+        self._graph = None
+
+    @property
+    def components(self):
+        if self._components is None:
+            self._components = [c for comps in self.components_by_file.values() for c in comps]
+        return self._components
+
+    @property
+    def graph(self):
+        """DesignGraph of extends/instantiates/references edges, built on first use."""
+        if self._graph is None:
+            self._graph = DesignGraph.from_snapshot(self)
+        return self._graph
+
+    def copy(self):
+        """Returns a shallow copy that can be updated without affecting readers of this one."""
+        other = ProjectSnapshot(self.project_path)
+        other.files = dict(self.files)
+        other.components_by_file = dict(self.components_by_file)
+        other.errors = list(self.errors)
+        return other
+
+    def iter_files(self, exts=None):
+        """Yields (rel_path, entry) for every file, optionally filtered by extension."""
+        for rel, entry in self.files.items():
+            if exts is None or entry['name'].endswith(exts):
+                yield rel, entry
+
+    def files_in_category(self, category):
+        return [rel for rel, entry in self.files.items() if entry['category'] == category]
+
+    @property
+    def dut_files(self):
+        return self.files_in_category('dut')
+
+    @property
+    def tb_files(self):
+        return self.files_in_category('tb')
+
+    @property
+    def tests(self):
+        return self.files_in_category('test')
+
+    def find(self, filename):
+        """Returns the full path of the first file called `filename`, or None."""
+        if self._by_name is None:
+            self._by_name = {}
+            for rel, entry in self.files.items():
+                self._by_name.setdefault(entry['name'], rel)
+        rel = self._by_name.get(filename)
+        return self.files[rel]['path'] if rel else None
+
+    def full_path(self, rel):
+        entry = self.files.get(rel)
+        return entry['path'] if entry else None
+
+    def component_index(self):
+        """Returns a dict of component_name -> defining file (relative path)."""
+        index = {}
+        for rel, comps in self.components_by_file.items():
+            for comp in comps:
+                index[comp['name']] = rel
+        return index
+
+
+def walk_files(top):
+    """Yields (root, os.DirEntry) for every file below top using os.scandir.
+
+    Directories are visited in sorted order and symlinked directories are not
+    followed, matching os.walk's defaults.
+    """
+    stack = [top]
+    while stack:
+        root = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield root, entry
+            except OSError:
+                pass
+        stack.extend(reversed(subdirs))
+
+
+def scan_project_tree(project_path, parse_components=True, index=None, workers=None):
+    """Walks project_path once and returns a ProjectSnapshot.
+
+    When a ComponentIndex is given, components of unchanged files (same mtime
+    and size) come from the index and only changed files are re-parsed. Files
+    that need parsing are fanned out over the cpu worker pool.
+    """
+    snapshot = ProjectSnapshot(project_path)
+    if not project_path or not os.path.isdir(project_path):
+        return snapshot
+    prefix_len = len(os.path.join(project_path, ''))
+    sv_files = []
+    with phase('walk'):
+        for root, entry in walk_files(project_path):
+            try:
+                st = entry.stat()
+            except OSError as e:
+                snapshot.errors.append(f'{entry.path}: {e}')
+                continue
+            rel = entry.path[prefix_len:]
+            snapshot.add_file(rel, file_entry(root, entry.name, entry.path, st))
+            if parse_components and entry.name.endswith(SV_EXTS):
+                cached = index.lookup(rel, st.st_mtime, st.st_size) if index is not None else None
+                sv_files.append((rel, cached))
+    count('files_scanned', len(snapshot.files))
+    if not parse_components:
+        return snapshot
+
+    to_parse = [rel for rel, cached in sv_files if cached is None]
+    with phase('parse'):
+        parsed = dict(zip(to_parse, parallel_map(try_parse_sv_file, [snapshot.files[rel]['path'] for rel in to_parse],
+                                                 kind='cpu', workers=workers)))
+    count('bytes_read', sum(snapshot.files[rel]['size'] for rel in to_parse))
+    if index is not None:
+        cache_result('components', len(sv_files) - len(to_parse), len(to_parse))
+    for rel, cached in sv_files:
+        components = cached
+        if components is None:
+            components, error = parsed[rel]
+            if error:
+                # Not cached, so the file is parsed (and reported) again until it changes or parses
+                snapshot.errors.append(error)
+            elif index is not None:
+                entry = snapshot.files[rel]
+                index.store(rel, entry['mtime'], entry['size'], components)
+        snapshot.set_components(rel, components)
+    if index is not None:
+        index.sync(snapshot.files)
+    return snapshot
+
+
+def build_component_index(project_path, snapshot=None):
+    """Return a dict of component_name -> defining_file"""
+    if snapshot is None:
+        snapshot = scan_project_tree(project_path)
+    return snapshot.component_index()
+
+
+def compile_query(query, use_regex=False, case_sensitive=False):
+    """Returns (compiled_regex, error_message_or_None) for a search query."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        try:
+            return re.compile(query, flags), None
+        except re.error as e:
+            return None, f'Regex error: {e}'
+    # Matching the escaped literal keeps case folding in C instead of lowercasing every line
+    return re.compile(re.escape(query), flags), None
+
+
+def perform_text_search(project_path, query, use_regex=False, case_sensitive=False, snapshot=None,
+                        candidates=None, workers=None):
+    """Performs a raw text or regex search across all files in the project.
+
+    candidates, when given, restricts the search to those relative paths
+    (typically narrowed by search_index.SearchIndex).
+
+    Returns a tuple: (results_list, error_message_or_None)
+    """
+    results = []
+    if not query:
+        return results, None
+
+    regex, error = compile_query(query, use_regex, case_sensitive)
+    if error:
+        return [], error
+
+    if snapshot is None:
+        snapshot = scan_project_tree(project_path, parse_components=False)
+    files = [(rel, entry['path']) for rel, entry in snapshot.iter_files(SEARCH_EXTS)
+             if candidates is None or rel in candidates]
+    with phase('search'):
+        for file_results in parallel_map(partial(_search_file, regex), files, kind='io', workers=workers):
+            results.extend(file_results)
+    count('bytes_read', sum(snapshot.files[rel]['size'] for rel, _ in files))
+
+    return results, None
+
+
+def _iter_file_matches(regex, rel, path, after_line=0):
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            for i, line in enumerate(f, start=1):
+                if i <= after_line:
+                    continue
+                hay = line.rstrip('\n')
+                if regex.search(hay):
+                    yield {'file': rel, 'line_num': i, 'line_content': hay}
+    except Exception:
+        return
+
+
+def _search_file(regex, item):
+    rel, path = item
+    return list(_iter_file_matches(regex, rel, path))
+
+
+def encode_cursor(result):
+    return f"{result['file']}:{result['line_num']}"
+
+
+def decode_cursor(cursor):
+    """Parses a 'rel_path:line' cursor; returns None for a missing or malformed one."""
+    if not cursor:
+        return None
+    rel, _, line = cursor.rpartition(':')
+    try:
+        return rel, int(line)
+    except ValueError:
+        return None
+
+
+def iter_text_search(snapshot, regex, candidates=None, after=None):
+    """Yields search matches lazily, ordered by relative path then line number.
+
+    after is a (rel_path, line_num) cursor; only matches strictly after it are
+    yielded. Files are read one line at a time, so the consumer decides how
+    much of the tree is actually read.
+    """
+    files = sorted((rel, entry['path']) for rel, entry in snapshot.iter_files(SEARCH_EXTS)
+                   if candidates is None or rel in candidates)
+    start, after_rel, after_line = 0, None, 0
+    if after is not None:
+        after_rel, after_line = after
+        start = bisect.bisect_left(files, (after_rel,))
+    for rel, path in files[start:]:
+        count('bytes_read', snapshot.files[rel]['size'])
+        yield from _iter_file_matches(regex, rel, path, after_line if rel == after_rel else 0)
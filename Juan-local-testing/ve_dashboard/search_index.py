@@ -0,0 +1,220 @@
+"""
+search_index.py
+
+Trigram inverted index used to narrow project text searches. Each indexed file
+contributes the lowercase trigrams of its identifier tokens; a query's own
+identifier runs must then appear in a file for it to be a candidate, and only
+candidates are read to confirm the literal or regex match.
+
+Postings live in SQLite next to the component index and are refreshed from the
+scanner snapshot, so only files whose mtime or size changed are re-read.
+"""
+import os
+import re
+import sqlite3
+from itertools import islice
+
+try:
+    import re._parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from metrics import cache_result, count, phase
+from settings import cache_dir
+from shared_cache import file_lock
+from signature_cache import open_cache_db
+from scanner import SEARCH_EXTS, compile_query, decode_cursor, encode_cursor, iter_text_search, perform_text_search
+
+SCHEMA_VERSION = 1
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS files ('
+    'id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS grams ('
+    'gram TEXT NOT NULL, file_id INTEGER NOT NULL, PRIMARY KEY (gram, file_id)) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS grams_by_file ON grams (file_id)',
+]
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+WORD_RE = re.compile(r'\w+')
+
+
+def word_trigrams(words):
+    """Returns the set of trigrams of every word with at least three characters."""
+    grams = set()
+    for word in words:
+        for i in range(len(word) - 2):
+            grams.add(word[i:i + 3])
+    return grams
+
+
+def file_trigrams(text):
+    return word_trigrams(set(WORD_RE.findall(text.lower())))
+
+
+def _required_literals(pattern):
+    """Returns literal runs that every match of a regex must contain, or None if unknown."""
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+    runs, current = [], []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+        else:
+            if current:
+                runs.append(''.join(current))
+            current = []
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+
+def query_trigrams(query, use_regex=False):
+    """Trigrams a file must contain to possibly match the query.
+
+    Only identifier runs are used, because files are indexed by identifier
+    tokens. An empty set means the query cannot be narrowed.
+    """
+    literals = _required_literals(query) if use_regex else [query]
+    if not literals:
+        return set()
+    words = []
+    for literal in literals:
+        words.extend(WORD_RE.findall(literal.lower()))
+    return word_trigrams(words)
+
+
+class SearchIndex:
+    """SQLite-backed trigram postings for one environment."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = open_cache_db(db_path, SCHEMA_VERSION, SCHEMA)
+
+    def update(self, snapshot):
+        """Re-indexes changed files from the snapshot and drops removed ones.
+
+        Returns the number of files that were (re)read. Concurrent updates,
+        from other threads or dashboard workers, wait for each other instead of
+        indexing the same files twice.
+        """
+        with phase('search_index'), file_lock(self.db_path + '.lock'):
+            return self._update(snapshot)
+
+    def _update(self, snapshot):
+        known = {path: (fid, mtime, size)
+                 for fid, path, mtime, size in self.conn.execute('SELECT id, path, mtime, size FROM files')}
+        current = dict(snapshot.iter_files(SEARCH_EXTS))
+        removed = [known[p][0] for p in known if p not in current]
+        changed = [(rel, entry) for rel, entry in current.items()
+                   if known.get(rel, (None, None, None))[1:] != (entry['mtime'], entry['size'])]
+        cache_result('search', len(current) - len(changed), len(changed))
+        count('bytes_read', sum(entry['size'] for _, entry in changed))
+        if not removed and not changed:
+            return 0
+        with self.conn:
+            for fid in removed:
+                self._drop(fid)
+            for rel, entry in changed:
+                try:
+                    with open(entry['path'], 'r', errors='ignore') as f:
+                        grams = file_trigrams(f.read())
+                except Exception:
+                    grams = set()
+                if rel in known:
+                    self._drop(known[rel][0])
+                cur = self.conn.execute('INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)',
+                                        (rel, entry['mtime'], entry['size']))
+                fid = cur.lastrowid
+                self.conn.executemany('INSERT INTO grams (gram, file_id) VALUES (?, ?)',
+                                      ((g, fid) for g in grams))
+        return len(changed)
+
+    def _drop(self, fid):
+        self.conn.execute('DELETE FROM grams WHERE file_id = ?', (fid,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (fid,))
+
+    def candidates(self, query, use_regex=False):
+        """Returns the set of relative paths that may match, or None to search every file."""
+        grams = query_trigrams(query, use_regex)
+        if not grams:
+            return None
+        sql = ' INTERSECT '.join('SELECT file_id FROM grams WHERE gram = ?' for _ in grams)
+        sql = f'SELECT path FROM files WHERE id IN ({sql})'
+        return {row[0] for row in self.conn.execute(sql, list(grams))}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def index_path(env_id, config=None):
+    return os.path.join(cache_dir(config), f'{env_id}.search.sqlite')
+
+
+def open_search_index(env_id, config=None):
+    """Opens the trigram index for a configured environment, or returns None if it cannot be used."""
+    if not env_id:
+        return None
+    try:
+        return SearchIndex(index_path(env_id, config))
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def index_candidates(index, snapshot, query, use_regex=False):
+    """Brings index up to date with the snapshot and returns the query's candidate files (None: every file)."""
+    index.update(snapshot)
+    return index.candidates(query, use_regex)
+
+
+def environment_candidates(env_id, snapshot, query, use_regex=False, config=None):
+    """index_candidates through the environment's on-disk index, or None if it cannot be opened."""
+    index = open_search_index(env_id, config)
+    if index is None:
+        return None
+    with index:
+        return index_candidates(index, snapshot, query, use_regex)
+
+
+def search_environment(env_id, snapshot, query, use_regex=False, case_sensitive=False, config=None):
+    """perform_text_search over the snapshot, narrowed by the environment's trigram index."""
+    candidates = environment_candidates(env_id, snapshot, query, use_regex, config) if query else None
+    return perform_text_search(snapshot.project_path, query, use_regex, case_sensitive,
+                               snapshot=snapshot, candidates=candidates)
+
+
+# search_page default: look the candidates up in the environment's own index
+_ENVIRONMENT_INDEX = object()
+
+
+def search_page(env_id, snapshot, query, use_regex=False, case_sensitive=False, cursor=None,
+                limit=DEFAULT_PAGE_SIZE, config=None, candidates=_ENVIRONMENT_INDEX):
+    """Returns one page of matches as (results, next_cursor, error).
+
+    Matches are produced lazily in path/line order and reading stops as soon
+    as the page is full, so a query with hundreds of thousands of hits costs
+    only what one page needs. next_cursor is None on the last page. Callers
+    that keep an index open (the cache manager keeps one per environment)
+    pass the candidates they got from it, None meaning every file; otherwise
+    the environment's index is opened for this call.
+    """
+    if not query:
+        return [], None, None
+    regex, error = compile_query(query, use_regex, case_sensitive)
+    if error:
+        return [], None, error
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if candidates is _ENVIRONMENT_INDEX:
+        candidates = environment_candidates(env_id, snapshot, query, use_regex, config)
+    matches = iter_text_search(snapshot, regex, candidates, after=decode_cursor(cursor))
+    with phase('search'):
+        page = list(islice(matches, limit + 1))
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return page[:limit], next_cursor, None
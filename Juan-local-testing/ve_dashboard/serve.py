@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+serve.py
+
+Production serving for the Flask dashboard. Unlike `python3 dashboard.py`,
+which runs one debug process with the reloader, this pre-forks several worker
+processes on one listening socket, and they all share one snapshot cache
+(shared_cache.py).
+
+Startup:
+1. Every configured environment whose path exists is pre-warmed. It is scanned
+   through its component index and published to the shared snapshot store,
+   and its search, include and results indexes are brought up to date.
+2. The socket is bound once and `serve_workers` processes are forked. Each
+   serves it with Werkzeug's threaded WSGI server (no debugger, no reloader)
+   and reads snapshots from the shared store.
+3. With `watch_backend` enabled, one more process runs the watchers and
+   republishes snapshots as files change, so workers never scan themselves.
+
+The parent only supervises: a process that exits is restarted, and SIGTERM
+or Ctrl-C stops them all.
+
+Usage:
+    python3 serve.py [--host 0.0.0.0] [--port 5001] [--workers 4] [--no-warm]
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import traceback
+
+import metrics
+import shared_cache
+from component_index import open_component_index, scan_environment
+from dashboard import ENVIRONMENTS, app
+from include_graph import environment_include_graph
+from search_index import open_search_index
+from settings import get_setting
+from sim_results import environment_results
+from watcher import start_watcher, watcher_settings
+
+
+def warm_environment(env):
+    """Scans one environment, publishes its snapshot and refreshes its on-disk indexes."""
+    store = shared_cache.snapshot_store(env['id'])
+    with shared_cache.file_lock(store.lock_path):
+        snapshot = scan_environment(env['id'], env['path'])
+        store.publish(snapshot)
+    index = open_search_index(env['id'])
+    if index is not None:
+        with index:
+            index.update(snapshot)
+    environment_include_graph(env['id'], snapshot)
+    environment_results(env['id'], env['path'])
+    return snapshot
+
+
+def warm(environments):
+    """Pre-warms every environment; returns {env_id: snapshot} for the ones that succeeded."""
+    snapshots = {}
+    for env in environments:
+        started = time.time()
+        try:
+            snapshots[env['id']] = warm_environment(env)
+        except Exception as e:
+            print(f"Could not pre-warm {env['id']}: {e}", file=sys.stderr)
+            continue
+        print(f"Pre-warmed {env['id']}: {len(snapshots[env['id']].files)} files in {time.time() - started:.1f}s")
+    return snapshots
+
+
+def run_worker(sock, host, port):
+    from werkzeug.serving import make_server
+    # Counters inherited from the pre-warm belong to the parent, not to this worker
+    metrics.REGISTRY = metrics.Registry()
+    shared_cache.enable()
+    make_server(host, port, app, threaded=True, fd=sock.fileno()).serve_forever()
+
+
+def run_publisher(environments, snapshots):
+    """Watches every environment and keeps the shared store current."""
+    _, interval = watcher_settings()
+    watched = []
+    for env in environments:
+        snapshot = snapshots.get(env['id'])
+        # Kept open for the life of the process so re-parsed files reach the on-disk index
+        index = open_component_index(env['id'])
+        watcher = start_watcher(env['id'], env['path'], snapshot=snapshot, index=index)
+        if watcher is None and index is not None:
+            index.close()
+        if watcher is not None:
+            watched.append([watcher, shared_cache.snapshot_store(env['id']), snapshot])
+    while watched:
+        for entry in watched:
+            watcher, store, published = entry
+            if watcher.snapshot is not published:
+                store.publish(watcher.snapshot)
+                entry[2] = watcher.snapshot
+            store.touch()
+        time.sleep(interval)
+
+
+def spawn(target, *args):
+    pid = os.fork()
+    if pid:
+        return pid
+    # The parent stops children with SIGTERM; Ctrl-C is handled there too
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    code = 0
+    try:
+        target(*args)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the dashboard with several worker processes.')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('VE_DASH_PORT', 5001)))
+    parser.add_argument('--workers', type=int, help='worker processes (default: serve_workers setting)')
+    parser.add_argument('--no-warm', action='store_true', help='skip scanning the environments at startup')
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers or int(get_setting('serve_workers') or 1))
+    environments = [env for env in ENVIRONMENTS if os.path.isdir(env.get('path') or '')]
+    snapshots = {} if args.no_warm else warm(environments)
+
+    family = socket.AF_INET6 if ':' in args.host else socket.AF_INET
+    sock = socket.create_server((args.host, args.port), family=family, backlog=128)
+    sock.set_inheritable(True)
+
+    children = {}
+
+    def start(kind, target, *target_args):
+        children[spawn(target, *target_args)] = (kind, target, target_args)
+
+    signal.signal(signal.SIGTERM, _terminate)
+    signal.signal(signal.SIGINT, _terminate)
+    try:
+        for _ in range(workers):
+            start('worker', run_worker, sock, args.host, args.port)
+        backend, _ = watcher_settings()
+        if backend and backend != 'off' and environments:
+            start('watcher', run_publisher, environments, snapshots)
+        print(f'Serving on http://{args.host}:{args.port} with {workers} workers')
+        while True:
+            pid, status = os.wait()
+            kind, target, target_args = children.pop(pid, (None, None, None))
+            if kind is None:
+                continue
+            print(f'{kind} process {pid} exited with status {status}; restarting', file=sys.stderr)
+            # Do not spin on a process that fails right after starting
+            time.sleep(1)
+            start(kind, target, *target_args)
+    except (SystemExit, ChildProcessError):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        sock.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
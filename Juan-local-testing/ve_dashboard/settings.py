@@ -0,0 +1,77 @@
+"""
+settings.py
+
+Reads config.json for the dashboard front-ends. Besides the `environments`
+list, config.json may carry top-level settings; every setting has a default
+so older config files keep working.
+"""
+import os
+import json
+import hashlib
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(SCRIPT_DIR, 'config.json')
+
+DEFAULTS = {
+    # Directory for on-disk indexes, relative to this script's directory
+    'cache_dir': '.ve_cache',
+    # Thread count for I/O-bound per-file reads (search, usage scans)
+    'io_workers': 8,
+    # Process count for regex-heavy parsing; 0 or 1 parses serially
+    'cpu_workers': min(4, os.cpu_count() or 1),
+    # Snapshot watcher: off, auto (inotify on local disks, polling on NFS), inotify or poll
+    'watch_backend': 'off',
+    # Seconds between polls, and the inotify batching window
+    'watch_interval': 2.0,
+    # Extra `include search directories (relative to the project); Makefile +incdir+ flags are added
+    'include_dirs': [],
+    # Regression runner: simulator command ({project}, {test}, {seed}), concurrent runs, per-run timeout (s)
+    'regress_sim': '{project}/simv +UVM_TESTNAME={test} +ntb_random_seed={seed} -l sim.log',
+    'regress_jobs': min(4, os.cpu_count() or 1),
+    'regress_timeout': 3600,
+    # Sampling profiler for dashboard requests (served at /debug/profile) and its sampling period (s)
+    'profiler': False,
+    'profiler_interval': 0.005,
+    # serve.py: worker processes, and seconds a shared snapshot is reused before a worker rescans
+    'serve_workers': min(4, os.cpu_count() or 1),
+    'snapshot_max_age': 5.0,
+    # Memory budget (MiB) for the dashboard's per-environment snapshots and open indexes;
+    # least recently used environments beyond it are evicted back to their on-disk indexes
+    'cache_memory_mb': 512,
+    # Extra [pattern, kind] build-artifact rules, checked before the built-in ones in artifacts.py
+    'artifact_rules': [],
+    # ve-dash: seconds a published snapshot is answered from before the next call rescans
+    'cli_snapshot_max_age': 300,
+}
+
+
+def load_config(config_path=CONFIG_PATH):
+    try:
+        with open(config_path, 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+def get_setting(name, config=None):
+    """Returns a top-level setting from config.json, falling back to DEFAULTS."""
+    if config is None:
+        config = load_config()
+    return config.get(name, DEFAULTS.get(name))
+
+
+def cache_dir(config=None):
+    path = get_setting('cache_dir', config)
+    return path if os.path.isabs(path) else os.path.join(SCRIPT_DIR, path)
+
+
+def environment_for_path(project_path, config=None):
+    """The id of the configured environment at project_path, or a stable id derived from the path."""
+    if config is None:
+        config = load_config()
+    project_path = os.path.abspath(project_path)
+    for env in config.get('environments', []):
+        if os.path.abspath(env.get('path', '')) == project_path:
+            return env['id']
+    digest = hashlib.sha1(project_path.encode()).hexdigest()[:10]
+    return f'{os.path.basename(project_path) or "project"}-{digest}'
@@ -0,0 +1,173 @@
+"""
+shared_cache.py
+
+Cross-process snapshot cache for multi-worker serving (serve.py). The current
+ProjectSnapshot of each environment is published as a pickle under cache_dir
+(<env>.snapshot.pickle). Every worker keeps the last copy it loaded and
+re-reads the file only when it has been replaced, so a request normally costs
+one stat.
+
+Refreshes are single-flight. A per-environment thread lock collapses
+concurrent requests inside a worker, and an flock on <env>.snapshot.lock
+collapses them across workers. N simultaneous requests for a stale
+environment therefore cause one scan; the others wait and load its result.
+The scan still goes through the component index, so only changed files are
+re-parsed.
+
+A published snapshot is fresh for `snapshot_max_age` seconds. When serve.py
+runs a watcher process, that process republishes on every change and touches
+<env>.snapshot.alive every watch_interval, so workers never scan on their own
+while it is alive.
+"""
+import os
+import time
+import fcntl
+import pickle
+import threading
+from contextlib import ExitStack, contextmanager
+
+from component_index import scan_environment
+from metrics import cache_result, phase
+from settings import cache_dir, get_setting
+
+_enabled = False
+
+
+def enable():
+    """Switches environment_snapshot in this process over to the shared store (serve.py workers)."""
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive flock on path (created if needed), held for the with block."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class SnapshotStore:
+    """The published snapshot of one environment plus this process's loaded copy."""
+
+    def __init__(self, env_id, config=None):
+        base = os.path.join(cache_dir(config), env_id)
+        self.env_id = env_id
+        self.path = base + '.snapshot.pickle'
+        self.alive_path = base + '.snapshot.alive'
+        self.lock_path = base + '.snapshot.lock'
+        self.snapshot = None
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Returns the published snapshot, re-reading the file only when it was replaced."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stamp != self._stamp:
+            try:
+                with open(self.path, 'rb') as f:
+                    snapshot = pickle.load(f)
+            except Exception:
+                # Half-written by a crashed process or written by an older version: rescan
+                return None
+            self.snapshot, self._stamp = snapshot, stamp
+        return self.snapshot
+
+    def age(self):
+        """Seconds since the snapshot was published or last confirmed current, or None if there is none."""
+        stamps = [t for t in (_mtime(self.path), _mtime(self.alive_path)) if t is not None]
+        return time.time() - max(stamps) if stamps else None
+
+    def publish(self, snapshot):
+        # Build the design graph once here instead of in every worker
+        snapshot.graph
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+        st = os.stat(self.path)
+        self.snapshot, self._stamp = snapshot, (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def touch(self):
+        """Marks the published snapshot as still current."""
+        with open(self.alive_path, 'a'):
+            pass
+        os.utime(self.alive_path)
+
+    def invalidate(self):
+        """Makes the next request rescan, e.g. after files were deleted through the dashboard."""
+        for path in (self.path, self.alive_path):
+            try:
+                os.utime(path, (0, 0))
+            except OSError:
+                pass
+
+    def release(self):
+        """Drops this process's loaded copy; the published file is kept for the next load."""
+        self.snapshot, self._stamp = None, None
+
+    def _fresh(self, max_age):
+        snapshot = self.load()
+        age = self.age()
+        return snapshot if snapshot is not None and age is not None and age <= max_age else None
+
+    def get(self, project_path, max_age, config=None):
+        """The published snapshot if it is at most max_age seconds old, else one shared rescan."""
+        snapshot = self._fresh(max_age)
+        if snapshot is not None:
+            cache_result('snapshot', 1, 0)
+            return snapshot
+        with ExitStack() as held:
+            with phase('snapshot_wait'):
+                held.enter_context(self._lock)
+                held.enter_context(file_lock(self.lock_path))
+            # Another thread or worker may have rescanned while this one waited
+            snapshot = self._fresh(max_age)
+            if snapshot is not None:
+                cache_result('snapshot', 1, 0)
+                return snapshot
+            cache_result('snapshot', 0, 1)
+            snapshot = scan_environment(self.env_id, project_path, config)
+            self.publish(snapshot)
+            return snapshot
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def snapshot_store(env_id, config=None):
+    with _STORES_LOCK:
+        if env_id not in _STORES:
+            _STORES[env_id] = SnapshotStore(env_id, config)
+        return _STORES[env_id]
+
+
+def shared_snapshot(env_id, project_path, config=None, max_age=None):
+    """environment_snapshot for serve.py workers, report.py and ve-dash: served from the shared store.
+
+    max_age defaults to the `snapshot_max_age` setting.
+    """
+    if max_age is None:
+        max_age = float(get_setting('snapshot_max_age', config) or 0)
+    return snapshot_store(env_id, config).get(project_path, max_age, config)
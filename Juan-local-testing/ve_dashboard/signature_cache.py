@@ -0,0 +1,107 @@
+"""
+signature_cache.py
+
+SQLite cache of per-file results keyed by the file's signature. Each row maps
+a key (usually a project-relative path) to the mtime and size the file had
+when it was read, plus the JSON-encoded value derived from it. A lookup only
+hits while both still match, so callers re-read just the files that changed.
+
+The component index, the `include directive cache and the simulation results
+index are all SignatureCaches. Each passes the version of its own value format,
+which is stored as the file's PRAGMA user_version; a file written with another
+version is emptied and rebuilt.
+
+open_cache_db is that schema-version handling on its own. The caches with
+tables of their own (the search index and the file viewer's line indexes) open
+their files through it too, so every cache file migrates the same way.
+"""
+import os
+import json
+import sqlite3
+
+SCHEMA_VERSION = 1
+# Approximate per-row overhead of the in-memory copy (tuple, key string, floats), on top of the JSON text
+ROW_BYTES = 100
+SCHEMA = ['CREATE TABLE IF NOT EXISTS entries ('
+          'key TEXT PRIMARY KEY, mtime REAL NOT NULL, size INTEGER NOT NULL, value TEXT NOT NULL)']
+
+
+def open_cache_db(db_path, version, schema):
+    """Connects to an SQLite cache file at schema `version`, creating it if needed.
+
+    A file whose PRAGMA user_version differs (including files from before
+    versioning) has all its tables dropped first. schema lists the CREATE ...
+    IF NOT EXISTS statements, run on every open.
+    """
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] != version:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+            for name in tables:
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+        for statement in schema:
+            conn.execute(statement)
+        conn.commit()
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+class SignatureCache:
+    """Maps key -> (mtime, size, value) and persists it in SQLite."""
+
+    def __init__(self, db_path, version=SCHEMA_VERSION):
+        self.db_path = db_path
+        self.version = version
+        self.conn = open_cache_db(db_path, version, SCHEMA)
+        self._rows = {
+            key: (mtime, size, value)
+            for key, mtime, size, value in self.conn.execute('SELECT key, mtime, size, value FROM entries')
+        }
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, mtime, size):
+        """Returns the cached value for key, or None if the file changed."""
+        row = self._rows.get(key)
+        if row is not None and row[0] == mtime and row[1] == size:
+            self.hits += 1
+            return json.loads(row[2])
+        self.misses += 1
+        return None
+
+    def store(self, key, mtime, size, value):
+        data = json.dumps(value, separators=(',', ':'))
+        self._rows[key] = (mtime, size, data)
+        self._pending.append((key, mtime, size, data))
+
+    def sync(self, seen_keys):
+        """Writes pending rows and drops rows whose key is no longer in seen_keys."""
+        stale = [k for k in self._rows if k not in seen_keys]
+        for k in stale:
+            del self._rows[k]
+        if not self._pending and not stale:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO entries (key, mtime, size, value) VALUES (?, ?, ?, ?)',
+                                  self._pending)
+            self.conn.executemany('DELETE FROM entries WHERE key = ?', [(k,) for k in stale])
+        self._pending = []
+
+    def cached_bytes(self):
+        """Rough size in bytes of the rows held in memory (used by the cache manager's budget)."""
+        return sum(ROW_BYTES + len(row[2]) for row in self._rows.values())
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,219 @@
+"""
+sim_results.py
+
+Streaming parser for simulator logs (results/<run>/sim.log) and a cached
+results index. Logs are read line by line, so a multi-gigabyte log costs one
+sequential pass and constant memory. Parsed summaries are stored per
+environment keyed by the log's mtime and size, so listing thousands of runs
+only stats the logs and re-parses the ones that changed. Given a snapshot,
+the logs are taken from its file list and not even stat'ed.
+"""
+import os
+import re
+from datetime import datetime
+
+from metrics import cache_result, count, phase
+from settings import cache_dir
+from signature_cache import SignatureCache
+from workers import parallel_map
+
+RESULTS_DIR = 'results'
+LOG_NAME = 'sim.log'
+SEVERITIES = ('UVM_INFO', 'UVM_WARNING', 'UVM_ERROR', 'UVM_FATAL')
+# Version of the cached run summaries; bump it when parse_sim_log's result changes
+RESULTS_VERSION = 4
+
+MESSAGE_RE = re.compile(r'^(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\b(?!\s*:)')
+SUMMARY_START = '--- UVM Report Summary ---'
+SEVERITY_COUNT_RE = re.compile(r'^(UVM_INFO|UVM_WARNING|UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)\s*$')
+ID_COUNT_RE = re.compile(r'^\[([^\]]+)\]\s+(\d+)\s*$')
+TESTNAME_RE = re.compile(r'\+UVM_TESTNAME=(\S+)')
+RUNNING_TEST_RE = re.compile(r'\[RNTST\] Running test (\S+?)\.*$')
+SIM_TIME_RE = re.compile(r'^Time:\s*([\d.]+)\s*(\w+)')
+FINISH_TIME_RE = re.compile(r'\$finish at simulation time\s+([\d.]+)')
+CPU_TIME_RE = re.compile(r'CPU Time:\s*([\d.]+)\s*seconds')
+WALL_TIME_RE = re.compile(r'(?:Elapsed|Wall)(?:\s+clock)?\s+time:\s*([\d.]+)\s*s', re.IGNORECASE)
+START_STAMP_RE = re.compile(r'Runtime version [^;]*;\s+(\w{3}\s+\d+\s+\d\d:\d\d\s+\d{4})')
+END_STAMP_RE = re.compile(r'^\w{3} (\w{3}\s+\d+\s+\d\d:\d\d:\d\d\s+\d{4})\s*$')
+
+
+def _stamp(text, fmt):
+    try:
+        return datetime.strptime(' '.join(text.split()), fmt)
+    except ValueError:
+        return None
+
+
+def parse_sim_log(path):
+    """Streams a simulator log and returns its summary dict.
+
+    Keys: test, status (PASS, FAIL or INCOMPLETE), counts (messages seen per
+    severity), summary (the UVM report summary's severity and id counts, if
+    the run got that far), sim_time, sim_time_unit, cpu_time, wall_time,
+    wall_time_approx and first_error. wall_time is only set from a reported
+    wall/elapsed time. Without one, wall_time_approx is estimated from the
+    start and end timestamps, to the minute.
+    """
+    result = {
+        'test': None,
+        'status': 'INCOMPLETE',
+        'counts': dict.fromkeys(SEVERITIES, 0),
+        'summary': None,
+        'sim_time': None,
+        'sim_time_unit': None,
+        'cpu_time': None,
+        'wall_time': None,
+        'wall_time_approx': None,
+        'first_error': None,
+    }
+    in_summary = False
+    started = ended = None
+    finished = False
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                m = MESSAGE_RE.match(line)
+                if m:
+                    severity = m.group(1)
+                    result['counts'][severity] += 1
+                    if severity in ('UVM_ERROR', 'UVM_FATAL') and result['first_error'] is None:
+                        result['first_error'] = line[:500]
+                    if result['test'] is None:
+                        t = RUNNING_TEST_RE.search(line)
+                        if t:
+                            result['test'] = t.group(1)
+                    continue
+                if line.startswith(SUMMARY_START):
+                    in_summary = True
+                    result['summary'] = {'severity': {}, 'id': {}}
+                    continue
+                if in_summary:
+                    m = SEVERITY_COUNT_RE.match(line)
+                    if m:
+                        result['summary']['severity'][m.group(1)] = int(m.group(2))
+                        continue
+                    m = ID_COUNT_RE.match(line)
+                    if m:
+                        result['summary']['id'][m.group(1)] = int(m.group(2))
+                        continue
+                    if line and not line.startswith('**'):
+                        in_summary = False
+                if line.startswith('Command:') and result['test'] is None:
+                    m = TESTNAME_RE.search(line)
+                    if m:
+                        result['test'] = m.group(1)
+                elif line.startswith('$finish'):
+                    finished = True
+                    m = FINISH_TIME_RE.search(line)
+                    if m and result['sim_time'] is None:
+                        result['sim_time'] = float(m.group(1))
+                elif line.startswith('Time:'):
+                    m = SIM_TIME_RE.match(line)
+                    if m:
+                        result['sim_time'], result['sim_time_unit'] = float(m.group(1)), m.group(2)
+                elif 'CPU Time:' in line:
+                    m = CPU_TIME_RE.search(line)
+                    if m:
+                        result['cpu_time'] = float(m.group(1))
+                elif started is None and 'Runtime version' in line:
+                    m = START_STAMP_RE.search(line)
+                    if m:
+                        started = _stamp(m.group(1), '%b %d %H:%M %Y')
+                else:
+                    m = WALL_TIME_RE.search(line)
+                    if m:
+                        result['wall_time'] = float(m.group(1))
+                        continue
+                    m = END_STAMP_RE.match(line)
+                    if m:
+                        ended = _stamp(m.group(1), '%b %d %H:%M:%S %Y')
+    except Exception:
+        # unreadable log: leave it INCOMPLETE
+        return result
+
+    if result['wall_time'] is None and started and ended and ended >= started:
+        # The start stamp only has minute resolution (off by up to 60 s), so this is kept apart from wall_time
+        result['wall_time_approx'] = (ended - started).total_seconds()
+    severity = (result['summary'] or {}).get('severity') or result['counts']
+    if severity.get('UVM_ERROR', 0) or severity.get('UVM_FATAL', 0):
+        result['status'] = 'FAIL'
+    elif result['summary'] is not None and finished:
+        result['status'] = 'PASS'
+    return result
+
+
+def find_logs(project_path, snapshot=None):
+    """Returns [(run_name, full_log_path, mtime, size)] for every results/<run>/sim.log, sorted by run name.
+
+    With a snapshot the logs are taken from its file list, so results/ is not
+    listed and no log is stat'ed.
+    """
+    if snapshot is not None:
+        logs = []
+        for rel, entry in snapshot.iter_files((LOG_NAME,)):
+            parts = rel.split(os.sep)
+            if len(parts) == 3 and parts[0] == RESULTS_DIR and parts[2] == LOG_NAME:
+                logs.append((parts[1], entry['path'], entry['mtime'], entry['size']))
+        return sorted(logs)
+    logs = []
+    try:
+        with os.scandir(os.path.join(project_path, RESULTS_DIR)) as it:
+            runs = [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return logs
+    for run in sorted(runs, key=lambda e: e.name):
+        path = os.path.join(run.path, LOG_NAME)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        logs.append((run.name, path, st.st_mtime, st.st_size))
+    return logs
+
+
+def index_path(env_id, config=None):
+    return os.path.join(cache_dir(config), f'{env_id}.results.sqlite')
+
+
+def collect_results(project_path, index=None, workers=None, snapshot=None):
+    """Returns one summary dict per run (plus run, log, mtime), re-parsing only logs that changed."""
+    logs = find_logs(project_path, snapshot)
+    runs, to_parse = [], []
+    for run, path, mtime, size in logs:
+        cached = index.lookup(run, mtime, size) if index is not None else None
+        if cached is None:
+            to_parse.append(len(runs))
+        runs.append(cached)
+    with phase('results'):
+        parsed = parallel_map(parse_sim_log, [logs[i][1] for i in to_parse], kind='io', workers=workers)
+    count('bytes_read', sum(logs[i][3] for i in to_parse))
+    if index is not None:
+        cache_result('results', len(logs) - len(to_parse), len(to_parse))
+    for i, result in zip(to_parse, parsed):
+        run, path, mtime, size = logs[i]
+        result.update(run=run, log=os.path.relpath(path, project_path), mtime=mtime)
+        runs[i] = result
+        if index is not None:
+            index.store(run, mtime, size, result)
+    if index is not None:
+        index.sync({run for run, _, _, _ in logs})
+    return runs
+
+
+def environment_results(env_id, project_path, config=None, snapshot=None):
+    """collect_results using the environment's on-disk results index when it can be opened."""
+    try:
+        index = SignatureCache(index_path(env_id, config), RESULTS_VERSION)
+    except Exception:
+        return collect_results(project_path, snapshot=snapshot)
+    with index:
+        return collect_results(project_path, index, snapshot=snapshot)
+
+
+def results_summary(runs):
+    """Totals across runs: number of runs per status."""
+    totals = {'PASS': 0, 'FAIL': 0, 'INCOMPLETE': 0}
+    for run in runs:
+        totals[run['status']] = totals.get(run['status'], 0) + 1
+    return totals
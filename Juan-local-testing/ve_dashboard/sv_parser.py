@@ -0,0 +1,337 @@
+"""
+sv_parser.py
+
+Single-pass SystemVerilog declaration parser and the design graph built from it.
+
+The tokenizer is one compiled regex run over the whole file; comments and
+string literals are dropped so names inside them are never counted. A small
+state machine over the tokens extracts:
+
+- modules, macromodules, interfaces, programs, packages and classes (including
+  `virtual class`, `interface class` and parameterized `class foo #(...)`),
+- each class's `extends` parent,
+- module/interface instantiations (`type [#(...)] inst (...)`) inside
+  modules, interfaces and programs,
+- type references: typed declarations (`type name;`), scope resolution
+  (`name::`) and identifiers inside `#(...)` parameter lists.
+
+Every declaration becomes a component dict ({type, name, file, line, ...}) so
+the result can be cached in the component index like the old regex output.
+DesignGraph turns those components into adjacency lists that answer "who uses
+X" and "what does X use" in O(edges).
+"""
+import re
+from collections import defaultdict, deque
+
+TOKEN_RE = re.compile(r'''
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*")
+  | (?P<directive>`\w+)
+  | (?P<number>\d[\d_]*(?:\.\d+)?(?:'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_?]+)?|'[sS]?[bBoOdDhH][0-9a-fA-FxXzZ_?]+)
+  | (?P<ident>[A-Za-z_][\w$]*|\\\S+)
+  | (?P<punct>::|[#();,=\[\]{}:.])
+''', re.VERBOSE | re.DOTALL)
+
+DECL_TYPES = {
+    'module': 'Module',
+    'macromodule': 'Module',
+    'interface': 'Interface',
+    'program': 'Program',
+    'package': 'Package',
+    'class': 'Class',
+}
+END_KEYWORDS = {'endmodule', 'endinterface', 'endprogram', 'endpackage', 'endclass'}
+# Containers whose bodies may instantiate modules/interfaces
+INSTANCE_SCOPES = {'Module', 'Interface', 'Program'}
+# Qualifiers that may precede a declaration without ending "statement start"
+QUALIFIERS = {'virtual', 'rand', 'randc', 'local', 'protected', 'static', 'const', 'automatic', 'var'}
+STATEMENT_STARTS = {';', 'begin', 'end', 'generate', 'endgenerate', 'else', 'fork', 'join', 'join_any',
+                    'join_none', 'endfunction', 'endtask', None}
+KEYWORDS = {
+    'alias', 'always', 'always_comb', 'always_ff', 'always_latch', 'and', 'assert', 'assign', 'assume',
+    'automatic', 'before', 'begin', 'bind', 'bins', 'bit', 'break', 'buf', 'byte', 'case', 'casex', 'casez',
+    'chandle', 'checker', 'class', 'clocking', 'config', 'const', 'constraint', 'context', 'continue',
+    'cover', 'covergroup', 'coverpoint', 'cross', 'deassign', 'default', 'defparam', 'disable', 'dist', 'do',
+    'edge', 'else', 'end', 'endcase', 'endchecker', 'endclass', 'endclocking', 'endconfig', 'endfunction',
+    'endgenerate', 'endgroup', 'endinterface', 'endmodule', 'endpackage', 'endprimitive', 'endprogram',
+    'endproperty', 'endsequence', 'endspecify', 'endtable', 'endtask', 'enum', 'event', 'export', 'extends',
+    'extern', 'final', 'for', 'force', 'foreach', 'forever', 'fork', 'function', 'generate', 'genvar', 'if',
+    'iff', 'import', 'initial', 'inout', 'input', 'inside', 'int', 'integer', 'interface', 'join', 'join_any',
+    'join_none', 'let', 'local', 'localparam', 'logic', 'longint', 'macromodule', 'modport', 'module', 'negedge',
+    'new', 'not', 'null', 'or', 'output', 'package', 'packed', 'parameter', 'posedge', 'primitive', 'priority',
+    'program', 'property', 'protected', 'pure', 'rand', 'randc', 'randcase', 'real', 'realtime', 'ref', 'reg',
+    'release', 'repeat', 'return', 'sequence', 'shortint', 'shortreal', 'signed', 'solve', 'specify', 'static',
+    'string', 'struct', 'super', 'supply0', 'supply1', 'table', 'task', 'this', 'time', 'tri', 'type',
+    'typedef', 'union', 'unique', 'unsigned', 'var', 'virtual', 'void', 'wait', 'wand', 'while', 'wire',
+    'with', 'wor',
+}
+
+
+def tokenize(text):
+    """Returns a list of (value, is_ident, line) tokens with comments and strings removed."""
+    tokens = []
+    line, pos = 1, 0
+    for m in TOKEN_RE.finditer(text):
+        start = m.start()
+        line += text.count('\n', pos, start)
+        pos = start
+        kind = m.lastgroup
+        if kind == 'comment':
+            continue
+        if kind == 'string':
+            tokens.append(('""', False, line))
+        else:
+            tokens.append((m.group(), kind == 'ident', line))
+    return tokens
+
+
+def _is_name(tok):
+    return tok[1] and tok[0] not in KEYWORDS
+
+
+def _skip_group(tokens, i, refs=None):
+    """tokens[i] is '('; returns the index after the matching ')', collecting identifiers into refs.
+
+    A group still open at the end of the file stops at the last token, which
+    is parse_source's ';' sentinel, so the index returned can always be read.
+    """
+    depth, n = 0, len(tokens) - 1
+    while i < n:
+        val = tokens[i][0]
+        if val == '(':
+            depth += 1
+        elif val == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif refs is not None and _is_name(tokens[i]) and tokens[i - 1][0] != '.':
+            refs.append((tokens[i][0], tokens[i][2]))
+        i += 1
+    return n
+
+
+def _skip_dims(tokens, i):
+    """Skips any [..] unpacked dimensions starting at tokens[i], stopping at the sentinel like _skip_group."""
+    n = len(tokens) - 1
+    while i < n and tokens[i][0] == '[':
+        depth = 0
+        while i < n:
+            if tokens[i][0] == '[':
+                depth += 1
+            elif tokens[i][0] == ']':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        i = min(i + 1, n)
+    return i
+
+
+def parse_source(text, base_filename):
+    """Parses SystemVerilog source text and returns its component declarations.
+
+    Each component is {type, name, file, line} plus, where applicable,
+    `extends` (class parent), `instances` (list of {type, name, line}) and
+    `references` (list of [name, line] type references).
+    """
+    tokens = tokenize(text)
+    tokens.append((';', False, 0))
+    n = len(tokens) - 1
+    components, stack = [], []
+    prev = None
+    i = 0
+
+    def add_ref(name, line):
+        if stack:
+            stack[-1].setdefault('references', []).append([name, line])
+
+    while i < n:
+        val, is_ident, line = tokens[i]
+        before = tokens[i - 1][0] if i else None
+
+        if is_ident and val in DECL_TYPES and before not in ('typedef', 'extern', '.'):
+            kind = val
+            j = i + 1
+            if kind == 'interface' and tokens[j][0] == 'class':
+                kind, j = 'class', j + 1
+            elif kind == 'interface' and before == 'virtual':
+                # `virtual interface foo vif;` is a handle, not a declaration
+                i += 1
+                continue
+            while tokens[j][0] in ('automatic', 'static'):
+                j += 1
+            if j < n and _is_name(tokens[j]):
+                comp = {'type': DECL_TYPES[kind], 'name': tokens[j][0], 'file': base_filename, 'line': tokens[j][2]}
+                components.append(comp)
+                refs = []
+                j += 1
+                if tokens[j][0] == '#' and tokens[j + 1][0] == '(':
+                    j = _skip_group(tokens, j + 1)
+                if kind == 'class' and tokens[j][0] == 'extends':
+                    j += 1
+                    while j + 1 < n and tokens[j + 1][0] == '::' and _is_name(tokens[j]):
+                        refs.append((tokens[j][0], tokens[j][2]))
+                        j += 2
+                    if _is_name(tokens[j]):
+                        comp['extends'] = tokens[j][0]
+                        j += 1
+                    if tokens[j][0] == '#' and tokens[j + 1][0] == '(':
+                        j = _skip_group(tokens, j + 1, refs)
+                stack.append(comp)
+                for name, ref_line in refs:
+                    add_ref(name, ref_line)
+                i, prev = j, None
+                continue
+            i += 1
+            continue
+
+        if is_ident and val in END_KEYWORDS:
+            if stack:
+                stack.pop()
+            if tokens[i + 1][0] == ':' and tokens[i + 2][1]:
+                i += 2
+            i, prev = i + 1, ';'
+            continue
+
+        if val == ':' and prev in ('begin', 'end', 'fork', 'join', 'join_any', 'join_none') and tokens[i + 1][1]:
+            # Block label, e.g. `end : gen_loop`; keep the statement-start state
+            i += 2
+            continue
+
+        if not is_ident:
+            if val == '#' and tokens[i + 1][0] == '(':
+                refs = []
+                i = _skip_group(tokens, i + 1, refs)
+                for name, ref_line in refs:
+                    add_ref(name, ref_line)
+                prev = ')'
+                continue
+            prev = val
+            i += 1
+            continue
+
+        # Identifier or keyword
+        if val in KEYWORDS:
+            if not (val in QUALIFIERS and prev in STATEMENT_STARTS):
+                prev = val
+            i += 1
+            continue
+
+        if tokens[i + 1][0] == '::':
+            if prev != '::':
+                add_ref(val, line)
+            prev = '::'
+            i += 2
+            continue
+
+        if stack and prev in STATEMENT_STARTS:
+            j = i + 1
+            params = []
+            if tokens[j][0] == '#' and tokens[j + 1][0] == '(':
+                j = _skip_group(tokens, j + 1, params)
+            if _is_name(tokens[j]):
+                k = _skip_dims(tokens, j + 1)
+                follow = tokens[k][0]
+                scope = stack[-1]
+                if follow == '(' and scope['type'] in INSTANCE_SCOPES:
+                    scope.setdefault('instances', []).append({'type': val, 'name': tokens[j][0], 'line': line})
+                    for name, ref_line in params:
+                        add_ref(name, ref_line)
+                    i, prev = _skip_group(tokens, k), ')'
+                    continue
+                if follow in (';', ',', '='):
+                    add_ref(val, line)
+                    for name, ref_line in params:
+                        add_ref(name, ref_line)
+                    i, prev = k, tokens[j][0]
+                    continue
+
+        prev = val
+        i += 1
+
+    return components
+
+
+class DesignGraph:
+    """Declarations plus extends/instantiates/references edges between them.
+
+    Edges are (kind, source, target, file, line) tuples where source is the
+    declaring component and file is the project-relative path it lives in.
+    Only edges whose target is declared somewhere in the project are kept, so
+    library classes such as uvm_env do not inflate the graph; each class's
+    parent is still available as nodes[name]['extends'].
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.out_edges = defaultdict(list)
+        self.in_edges = defaultdict(list)
+
+    @classmethod
+    def from_components(cls, components_by_file):
+        graph = cls()
+        for rel, comps in components_by_file.items():
+            for comp in comps:
+                graph.nodes[comp['name']] = dict(comp, path=rel)
+        for rel, comps in components_by_file.items():
+            for comp in comps:
+                graph._add_edges(rel, comp)
+        return graph
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        return cls.from_components(snapshot.components_by_file)
+
+    def _add_edge(self, kind, source, target, rel, line):
+        if target not in self.nodes or target == source:
+            return
+        edge = (kind, source, target, rel, line)
+        self.out_edges[source].append(edge)
+        self.in_edges[target].append(edge)
+
+    def _add_edges(self, rel, comp):
+        name = comp['name']
+        if comp.get('extends'):
+            self._add_edge('extends', name, comp['extends'], rel, comp.get('line', 0))
+        for inst in comp.get('instances', ()):
+            self._add_edge('instantiates', name, inst['type'], rel, inst['line'])
+        seen = set()
+        for target, line in comp.get('references', ()):
+            if target not in seen:
+                seen.add(target)
+                self._add_edge('references', name, target, rel, line)
+
+    def dependents(self, name, kinds=None):
+        """Edges pointing at `name` (who extends, instantiates or references it)."""
+        return [e for e in self.in_edges.get(name, ()) if kinds is None or e[0] in kinds]
+
+    def dependencies(self, name, kinds=None):
+        """Edges leaving `name` (what it extends, instantiates or references)."""
+        return [e for e in self.out_edges.get(name, ()) if kinds is None or e[0] in kinds]
+
+    def subclasses(self, name):
+        return [e[1] for e in self.dependents(name, ('extends',))]
+
+    def ancestors(self, name):
+        """Chain of parents from the direct parent upwards, including library classes."""
+        chain, seen = [], {name}
+        parent = self.nodes.get(name, {}).get('extends')
+        while parent and parent not in seen:
+            chain.append(parent)
+            seen.add(parent)
+            parent = self.nodes.get(parent, {}).get('extends')
+        return chain
+
+    def transitive_dependents(self, name, kinds=None):
+        """Every component that reaches `name` through edges of the given kinds (BFS, O(edges))."""
+        seen, queue = set(), deque([name])
+        while queue:
+            for edge in self.dependents(queue.popleft(), kinds):
+                if edge[1] not in seen and edge[1] != name:
+                    seen.add(edge[1])
+                    queue.append(edge[1])
+        return seen
+
+    def dependent_counts(self):
+        """Returns name -> number of incoming edges, for components that have any."""
+        return {name: len(edges) for name, edges in self.in_edges.items() if edges}
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+test_plan.py
+
+Incremental parser for Markdown validation plans (the format described in
+uvm-test-generation-agent/06-validation-document-format.md, e.g. the ALU plan
+or fifo_project/fifo_test_plan.md).
+
+The plan is split at its ATX headings (headings inside ``` blocks are
+ignored) into sections, and each section is hashed. Sections are classified as
+features, test cases or coverage and extracted into structured dicts; the
+result is cached per plan keyed by section hash, so after editing one test
+case only that section is re-extracted and only its test skeleton rewritten.
+
+Usage:
+    python3 test_plan.py plan.md [--out-dir tests/] [--base-test fifo_base_test] [--json]
+"""
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+
+from settings import cache_dir
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+FIELD_RE = re.compile(r'^\s*(?:[-*+]\s+)?\*\*([^*:]+?):?\*\*:?\s*(.*)$')
+ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+(.*)$')
+TEST_HEADING_RE = re.compile(r'^Test(?:\s+Scenario)?\s*[\d.]*\s*:\s*', re.IGNORECASE)
+BACKTICK_RE = re.compile(r'`([^`]+)`')
+FEATURE_RE = re.compile(r'^\*\*([A-Za-z]*\d+)\s*:\s*([^*]+?):?\*\*:?\s*(.*)$')
+COVERGROUP_RE = re.compile(r'\bcovergroup\s+(\w+)')
+COVERPOINT_RE = re.compile(r'^\s*(\w+)\s*:\s*(coverpoint|cross)\s+([^{;]+)', re.MULTILINE)
+
+FIELD_ALIASES = {
+    'objective': 'objective', 'description': 'objective', 'purpose': 'objective',
+    'priority': 'priority',
+    'stimulus': 'stimulus', 'steps': 'stimulus', 'sequence': 'stimulus',
+    'checks': 'checks', 'expected results': 'checks', 'expected result': 'checks', 'checking': 'checks',
+    'coverage': 'coverage',
+}
+SCHEMA_VERSION = 1
+
+
+def split_sections(text):
+    """Splits Markdown into sections: [{level, title, path, line, body, hash}] in document order.
+
+    path is the list of ancestor heading titles; body is the text up to the
+    next heading of any level. Text before the first heading is section 0.
+    """
+    sections, stack = [], []
+    current = {'level': 0, 'title': '', 'path': [], 'line': 1, 'lines': []}
+    in_fence = False
+    for number, line in enumerate(text.split('\n'), start=1):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        m = None if in_fence else HEADING_RE.match(line)
+        if not m:
+            current['lines'].append(line)
+            continue
+        sections.append(current)
+        level, title = len(m.group(1)), m.group(2)
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        current = {'level': level, 'title': title, 'path': [t for _, t in stack], 'line': number, 'lines': []}
+        stack.append((level, title))
+    sections.append(current)
+
+    result = []
+    for s in sections:
+        body = '\n'.join(s.pop('lines')).strip('\n')
+        if not s['title'] and not body.strip():
+            continue
+        s['body'] = body
+        key = '\x00'.join(s['path'] + [s['title'], body])
+        s['hash'] = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        result.append(s)
+    return result
+
+
+def classify(section):
+    """Returns 'test_case', 'features', 'coverage' or None for a section."""
+    title = section['title'].lower()
+    context = ' '.join(section['path']).lower()
+    lines = section['body'].split('\n')
+    fields = {FIELD_ALIASES.get(m.group(1).strip().lower()) for m in map(FIELD_RE.match, lines) if m}
+    if 'stimulus' in fields or TEST_HEADING_RE.match(title) or ('test case' in context and '`' in title):
+        return 'test_case'
+    if 'feature' in title:
+        return 'features'
+    if 'coverage' in title or 'covergroup' in title or 'coverage' in context:
+        return 'coverage'
+    return None
+
+
+def _fields(body):
+    """Collects **Label:** fields: inline text plus the list items under each label."""
+    fields, current = {}, None
+    for line in body.split('\n'):
+        m = FIELD_RE.match(line)
+        if m and not line.startswith((' ' * 4, '\t')):
+            current = FIELD_ALIASES.get(m.group(1).strip().lower(), m.group(1).strip().lower())
+            fields[current] = {'text': m.group(2).strip(), 'items': []}
+            continue
+        m = ITEM_RE.match(line)
+        if m and current is not None:
+            fields[current]['items'].append(m.group(1).strip())
+    return fields
+
+
+def test_name(title):
+    """`test_reset` -> test_reset; 'Test 2.1.1: Arithmetic Operations - Addition' -> test_arithmetic_operations_addition."""
+    m = BACKTICK_RE.search(title)
+    name = m.group(1) if m else TEST_HEADING_RE.sub('', title.strip())
+    name = re.sub(r'\W+', '_', name.strip().lower()).strip('_')
+    return name if name.startswith('test') else f'test_{name}'
+
+
+def extract_test_case(section):
+    fields = _fields(section['body'])
+
+    def items(key):
+        field = fields.get(key, {})
+        return field.get('items') or ([field['text']] if field.get('text') else [])
+
+    return {
+        'name': test_name(section['title']),
+        'title': section['title'],
+        'line': section['line'],
+        'objective': fields.get('objective', {}).get('text', ''),
+        'priority': fields.get('priority', {}).get('text', ''),
+        'stimulus': items('stimulus'),
+        'checks': items('checks'),
+        'coverage': items('coverage'),
+    }
+
+
+def extract_features(section):
+    features = []
+    for line in section['body'].split('\n'):
+        m = ITEM_RE.match(line)
+        if not m:
+            continue
+        item = m.group(1).strip()
+        f = FEATURE_RE.match(item)
+        if f:
+            features.append({'id': f.group(1), 'name': f.group(2).strip(), 'description': f.group(3).strip()})
+        else:
+            features.append({'id': None, 'name': item, 'description': ''})
+    return features
+
+
+def extract_coverage(section):
+    body = section['body']
+    return {
+        'title': section['title'],
+        'covergroups': COVERGROUP_RE.findall(body),
+        'coverpoints': [{'name': n, 'kind': k, 'expr': e.strip()} for n, k, e in COVERPOINT_RE.findall(body)],
+        'items': [m.group(1).strip() for m in map(ITEM_RE.match, body.split('\n')) if m],
+    }
+
+
+EXTRACTORS = {
+    'test_case': extract_test_case,
+    'features': extract_features,
+    'coverage': extract_coverage,
+}
+
+
+def render_skeleton(test, base_test='base_test'):
+    """SystemVerilog UVM test skeleton for an extracted test case."""
+    lines = [
+        f"// Generated from test plan section: {test['title']}",
+        f"// Objective: {test['objective']}" if test['objective'] else None,
+        f"class {test['name']} extends {base_test};",
+        f"    `uvm_component_utils({test['name']})",
+        '',
+        f'    function new(string name = "{test["name"]}", uvm_component parent = null);',
+        '        super.new(name, parent);',
+        '    endfunction',
+        '',
+        '    virtual task run_phase(uvm_phase phase);',
+        '        phase.raise_objection(this);',
+    ]
+    lines += [f'        // Stimulus: {step}' for step in test['stimulus']] or ['        // TODO: stimulus']
+    lines += [f'        // Check: {check}' for check in test['checks']]
+    lines += [
+        '        phase.drop_objection(this);',
+        '    endtask',
+        'endclass',
+        '',
+    ]
+    return '\n'.join(line for line in lines if line is not None)
+
+
+def plan_cache_path(plan_path, config=None):
+    digest = hashlib.sha1(os.path.abspath(plan_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir(config), f'testplan-{digest}.json')
+
+
+def _load(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if cache.get('version') == SCHEMA_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def parse_test_plan(plan_path, cache_path=None, out_dir=None, base_test='base_test'):
+    """Parses a plan, reusing cached extractions of unchanged sections.
+
+    Returns {title, features, test_cases, coverage, stats}. With out_dir, each
+    test case gets <out_dir>/<name>.sv, rewritten only when its section or
+    base_test changed (or the file is missing); skeletons of test cases that
+    disappeared are removed.
+    """
+    if cache_path is None:
+        cache_path = plan_cache_path(plan_path)
+    with open(plan_path, 'r', encoding='utf-8', errors='ignore') as f:
+        text = f.read()
+    cache = _load(cache_path) or {'version': SCHEMA_VERSION, 'sections': {}, 'skeletons': {}}
+    cached_sections = cache['sections']
+
+    sections = split_sections(text)
+    result = {'title': next((s['title'] for s in sections if s['level'] == 1), ''),
+              'features': [], 'test_cases': [], 'coverage': []}
+    stats = {'sections': len(sections), 'reused': 0, 'extracted': 0, 'skeletons_written': 0, 'skeletons_removed': 0}
+    new_sections, changed = {}, set()
+    for s in sections:
+        entry = cached_sections.get(s['hash'])
+        if entry is not None:
+            stats['reused'] += 1
+        else:
+            kind = classify(s)
+            entry = {'kind': kind, 'data': EXTRACTORS[kind](s) if kind else None}
+            stats['extracted'] += 1
+            changed.add(s['hash'])
+        if entry['kind'] == 'test_case':
+            # Line numbers move when earlier sections change; they are not part of the hash
+            entry['data']['line'] = s['line']
+        new_sections[s['hash']] = entry
+        if entry['kind'] == 'test_case':
+            result['test_cases'].append(entry['data'])
+        elif entry['kind'] == 'features':
+            result['features'].extend(entry['data'])
+        elif entry['kind'] == 'coverage':
+            result['coverage'].append(entry['data'])
+
+    skeletons = {}
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        for s in sections:
+            entry = new_sections[s['hash']]
+            if entry['kind'] != 'test_case':
+                continue
+            name = entry['data']['name']
+            path = os.path.join(out_dir, f'{name}.sv')
+            # A different --base-test changes every skeleton's `extends`, so it is part of the key
+            skeletons[name] = [s['hash'], base_test]
+            if s['hash'] in changed or cache['skeletons'].get(name) != skeletons[name] or not os.path.exists(path):
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(render_skeleton(entry['data'], base_test))
+                stats['skeletons_written'] += 1
+        for name in cache['skeletons']:
+            path = os.path.join(out_dir, f'{name}.sv')
+            if name not in skeletons and os.path.exists(path):
+                os.remove(path)
+                stats['skeletons_removed'] += 1
+    else:
+        skeletons = cache['skeletons']
+
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': SCHEMA_VERSION, 'sections': new_sections, 'skeletons': skeletons}, f)
+    os.replace(tmp, cache_path)
+    result['stats'] = stats
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parse a Markdown test plan incrementally.')
+    parser.add_argument('plan')
+    parser.add_argument('--out-dir', help='write one UVM test skeleton per test case here')
+    parser.add_argument('--base-test', default='base_test', help='class the generated tests extend')
+    parser.add_argument('--cache', help='cache file (default: under cache_dir from config.json)')
+    parser.add_argument('--json', action='store_true', help='print the structured plan as JSON')
+    args = parser.parse_args()
+    if not os.path.isfile(args.plan):
+        print('Test plan not found:', args.plan)
+        sys.exit(2)
+    plan = parse_test_plan(args.plan, args.cache, args.out_dir, args.base_test)
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        print(f"{plan['title']}: {len(plan['features'])} features, {len(plan['test_cases'])} test cases, "
+              f"{len(plan['coverage'])} coverage sections")
+        for test in plan['test_cases']:
+            print(f"  - {test['name']} (line {test['line']})")
+        print('Sections: {sections}, reused {reused}, re-extracted {extracted}; '
+              'skeletons written {skeletons_written}, removed {skeletons_removed}'.format(**plan['stats']))
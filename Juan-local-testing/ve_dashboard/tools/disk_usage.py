@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+disk_usage.py
+
+Reports where a verification environment's disk space goes and removes
+build artifacts (simv.daidir, csrc, waveforms, results/<run>, ...) in bulk.
+
+Usage:
+    python3 disk_usage.py /path/to/project [--top 20] [--json]
+    python3 disk_usage.py /path/to/project --delete compile waves [--dry-run]
+    python3 disk_usage.py /path/to/project --delete-all [--older-than DAYS]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# Allow running as a script from tools/ while sharing the dashboard's modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from artifacts import delete_artifacts, disk_usage, format_bytes, largest_dirs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Show disk usage by directory and build artifact, and clean up.')
+    parser.add_argument('project')
+    parser.add_argument('--top', type=int, default=20, help='largest directories to list')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--delete', nargs='+', metavar='KIND', help='delete every artifact of these kinds')
+    parser.add_argument('--delete-all', action='store_true', help='delete every build artifact')
+    parser.add_argument('--older-than', type=float, metavar='DAYS', help='only delete artifacts not modified for DAYS')
+    parser.add_argument('--dry-run', action='store_true', help='list what would be deleted')
+    parser.add_argument('--workers', type=int, help='parallel directory listings (default: io_workers setting)')
+    args = parser.parse_args()
+    proj = os.path.abspath(args.project)
+    if not os.path.isdir(proj):
+        print('Project path not found:', args.project)
+        sys.exit(2)
+
+    started = time.time()
+    usage = disk_usage(proj, workers=args.workers)
+    elapsed = time.time() - started
+
+    if args.delete or args.delete_all:
+        cutoff = time.time() - args.older_than * 86400 if args.older_than is not None else None
+        chosen = [a for a in usage['artifacts']
+                  if (args.delete_all or a['kind'] in args.delete) and (cutoff is None or a['mtime'] < cutoff)]
+        for a in chosen:
+            print(f"{'would delete' if args.dry_run else 'deleting'} {a['path']}{'/' if a['is_dir'] else ''} "
+                  f"({a['kind']}, {format_bytes(a['bytes'])})")
+        if args.dry_run:
+            print(f"{format_bytes(sum(a['bytes'] for a in chosen))} in {len(chosen)} artifacts")
+            sys.exit(0)
+        deleted, errors = delete_artifacts(proj, [a['path'] for a in chosen], workers=args.workers)
+        freed = sum(a['bytes'] for a in chosen if os.path.join(proj, a['path']) in {full for full, _ in deleted})
+        for rel, reason in sorted(errors.items()):
+            print(f'failed: {rel}: {reason}')
+        print(f'Freed {format_bytes(freed)} in {len(deleted)} artifacts')
+        sys.exit(1 if errors else 0)
+
+    if args.json:
+        usage['dirs'] = largest_dirs(usage, args.top)
+        print(json.dumps(usage, indent=2))
+        sys.exit(0)
+
+    print(f"{proj}: {format_bytes(usage['total_bytes'])} in {usage['total_files']} files "
+          f"(walked in {elapsed:.2f}s)")
+    print(f"Build artifacts: {format_bytes(usage['artifact_bytes'])}")
+    for kind, totals in sorted(usage['by_kind'].items()):
+        print(f"  {kind:<10} {totals['count']:>6} artifacts  {format_bytes(totals['bytes']):>10}")
+    print('\nLargest artifacts:')
+    for a in usage['artifacts'][:args.top]:
+        print(f"  {format_bytes(a['bytes']):>10}  {a['kind']:<8} {a['path']}{'/' if a['is_dir'] else ''}")
+    print('\nLargest directories:')
+    for d in largest_dirs(usage, args.top):
+        print(f"  {format_bytes(d['bytes']):>10}  {d['files']:>7} files  {d['path']}/")
+    for error in usage['errors']:
+        print('error:', error)
@@ -2,61 +2,93 @@
 """
 find_includes.py
 
-Recursively searches a project directory for SystemVerilog `include "..."` directives
-and prints a grouped mapping: included_file <- including_file:line_number : line
+Recursively searches a project directory for SystemVerilog `include "..."` directives,
+resolves them against the include search path and prints a grouped mapping:
+included_file <- including_file:line_number : line
 
 Usage:
-    python3 find_includes.py /path/to/project
+    python3 find_includes.py /path/to/project [--incdir DIR ...]
+    python3 find_includes.py /path/to/project --who-includes fifo_defs.svh
+    python3 find_includes.py /path/to/project --pulls-in tb_top.sv
+    python3 find_includes.py /path/to/project --cycles
 
+The search path is the including file's directory, the project directory, any
+--incdir given here, config.json `include_dirs` and the Makefile's +incdir+ flags.
+FILE is a project-relative path, or any unambiguous end of one such as a basename.
 """
 import os
-import re
 import sys
-from collections import defaultdict
-
-INCLUDE_RE = re.compile(r'`include\s*"([^"]+)"')
-TEXT_EXTS = {'.sv', '.v', '.vh', '.svh', '.svt', '.vhf', '.vhpp'}
-
-
-def scan_project(project_path):
-    mapping = defaultdict(list)
-    for root, dirs, files in os.walk(project_path):
-        for fname in files:
-            _, ext = os.path.splitext(fname)
-            if ext.lower() in TEXT_EXTS or fname.endswith('.svs') or fname.endswith('.svm'):
-                full = os.path.join(root, fname)
-                rel = os.path.relpath(full, project_path)
-                try:
-                    with open(full, 'r', errors='ignore') as f:
-                        for i, line in enumerate(f, start=1):
-                            m = INCLUDE_RE.search(line)
-                            if m:
-                                included = m.group(1)
-                                mapping[included].append((rel, i, line.rstrip('\n')))
-                except Exception:
-                    # skip unreadable files
-                    pass
-    return mapping
-
-
-def print_mapping(mapping):
+import argparse
+
+# Allow running as a script from tools/ while sharing the dashboard's modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from include_graph import build_include_graph, include_dirs
+
+
+def scan_project(project_path, workers=None, incdirs=()):
+    """Builds the resolved IncludeGraph for project_path."""
+    dirs = [os.path.abspath(d) for d in incdirs]
+    dirs += [d for d in include_dirs(project_path) if d not in dirs]
+    return build_include_graph(project_path, incdirs=dirs, workers=workers)
+
+
+def print_mapping(graph):
+    mapping = graph.mapping()
     if not mapping:
         print('No `include` directives found.')
         return
     for included, uses in sorted(mapping.items()):
-        print(f'Included file: {included}')
+        resolved = {graph.resolve(rel, included) for rel, _, _ in uses}
+        resolved.discard(None)
+        print(f'Included file: {included}' + (f' -> {", ".join(sorted(resolved))}' if resolved else ' (unresolved)'))
         for rel, lineno, line in uses:
             print(f'  - {rel}:{lineno}: {line.strip()}')
         print()
 
 
+def find_file(graph, name):
+    """The graph key FILE names; exits with an error if it names none or several."""
+    keys = graph.find(name)
+    if len(keys) == 1:
+        return keys[0]
+    if not keys:
+        print(f'File not found: {name}')
+    else:
+        print(f'{name} is ambiguous: ' + ', '.join(keys))
+    sys.exit(2)
+
+
+def print_files(title, files):
+    print(title)
+    if not files:
+        print('  (none)')
+    for f in sorted(files):
+        print(f'  - {f}')
+
+
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print('Usage: python3 find_includes.py /path/to/project')
-        sys.exit(2)
-    proj = sys.argv[1]
+    parser = argparse.ArgumentParser(description='Map and query `include directives in a project.')
+    parser.add_argument('project')
+    parser.add_argument('--incdir', action='append', default=[], help='extra include search directory')
+    parser.add_argument('--who-includes', metavar='FILE', help='files that include FILE directly or transitively')
+    parser.add_argument('--pulls-in', metavar='FILE', help='files FILE includes directly or transitively')
+    parser.add_argument('--cycles', action='store_true', help='report include cycles')
+    args = parser.parse_args()
+    proj = os.path.abspath(args.project)
     if not os.path.isdir(proj):
-        print('Project path not found:', proj)
+        print('Project path not found:', args.project)
         sys.exit(2)
-    mapping = scan_project(proj)
-    print_mapping(mapping)
+    graph = scan_project(proj, incdirs=args.incdir)
+    if args.who_includes:
+        key = find_file(graph, args.who_includes)
+        print_files(f'Files including {key}:', graph.transitive_includers(key))
+    if args.pulls_in:
+        key = find_file(graph, args.pulls_in)
+        print_files(f'Files pulled in by {key}:', graph.pulls_in(key))
+    if args.cycles:
+        cycles = graph.cycles()
+        print('No include cycles found.' if not cycles else 'Include cycles:')
+        for cycle in cycles:
+            print('  - ' + ', '.join(cycle))
+    if not (args.who_includes or args.pulls_in or args.cycles):
+        print_mapping(graph)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+select_tests.py
+
+Lists the UVM tests that must rerun after an edit, following the include,
+instantiation and usage graph from the changed files to the test classes.
+
+Usage:
+    python3 select_tests.py /path/to/project file1.sv [file2.svh ...]
+    python3 select_tests.py /path/to/project --git [REV]      # changes against REV (default HEAD)
+    python3 select_tests.py /path/to/project --git --make     # print `make run TEST=...` lines
+"""
+import os
+import sys
+import argparse
+
+# Allow running as a script from tools/ while sharing the dashboard's modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from impact import analyze_impact, changed_files_from_git
+from include_graph import build_include_graph
+from scanner import scan_project_tree
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Select the UVM tests affected by changed files.')
+    parser.add_argument('project')
+    parser.add_argument('files', nargs='*', help='changed files, relative to the project')
+    parser.add_argument('--git', nargs='?', const='HEAD', metavar='REV', help='take changed files from git diff REV')
+    parser.add_argument('--make', action='store_true', help='print make commands instead of test names')
+    args = parser.parse_args()
+    proj = os.path.abspath(args.project)
+    if not os.path.isdir(proj):
+        print('Project path not found:', args.project)
+        sys.exit(2)
+
+    changed = list(args.files)
+    if args.git:
+        try:
+            changed += changed_files_from_git(proj, args.git)
+        except Exception as e:
+            print('git diff failed:', e)
+            sys.exit(2)
+    snapshot = scan_project_tree(proj)
+    result = analyze_impact(snapshot, changed, build_include_graph(proj, snapshot))
+
+    if not args.make:
+        print(f"Changed files: {', '.join(result['changed']) or '(none)'}")
+        if result['all_tests_reason']:
+            print(f"All tests selected: {result['all_tests_reason']}")
+    for test in result['tests']:
+        print(f'make run TEST={test}' if args.make else f'  - {test}')
+    if not result['tests'] and not args.make:
+        print('No tests affected.')
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+stub_simv.py
+
+Stand-in for a compiled VCS `simv` so the regression runner can be exercised
+without simulator licenses. It accepts the same plusargs the runner passes and
+writes a VCS/UVM-style log that sim_results.py parses like a real one.
+
+Usage:
+    python3 stub_simv.py +UVM_TESTNAME=<test> [+ntb_random_seed=<seed>] [-l sim.log]
+
+Behaviour knobs (plusargs):
+    +STUB_RUNTIME=<seconds>    sleep before finishing (exercise timeouts)
+    +STUB_FAIL_SEEDS=<n>       seeds divisible by n report a UVM_ERROR
+    +STUB_FATAL                end with UVM_FATAL and a non-zero exit code
+Tests whose name contains "fail" always report a UVM_ERROR.
+"""
+import sys
+import time
+from datetime import datetime
+
+
+def main(argv):
+    plusargs, log_path = {}, None
+    args = iter(argv)
+    for arg in args:
+        if arg == '-l':
+            log_path = next(args, None)
+        elif arg.startswith('+'):
+            key, _, value = arg[1:].partition('=')
+            plusargs[key] = value
+    test = plusargs.get('UVM_TESTNAME', 'unknown_test')
+    seed = int(plusargs.get('ntb_random_seed', 1) or 1)
+    fail_every = int(plusargs.get('STUB_FAIL_SEEDS', 0) or 0)
+    fatal = 'STUB_FATAL' in plusargs
+    error = 'fail' in test or (fail_every and seed % fail_every == 0)
+
+    start = datetime.now()
+    time.sleep(float(plusargs.get('STUB_RUNTIME', 0) or 0))
+    sim_time = 1000 + (seed % 97) * 5000
+    counts = {'UVM_INFO': 2, 'UVM_WARNING': 0, 'UVM_ERROR': int(bool(error) and not fatal), 'UVM_FATAL': int(fatal)}
+    lines = [
+        'Command: ' + ' '.join(['./simv'] + argv),
+        'Chronologic VCS simulator copyright 1991-2023 (stub)',
+        'Compiler version stub; Runtime version stub;  ' + start.strftime('%b %d %H:%M %Y'),
+        f'UVM_INFO @ 0: reporter [RNTST] Running test {test}...',
+        f'UVM_INFO stub_simv.py(1) @ 0: reporter [SEED] Random seed {seed}',
+    ]
+    if counts['UVM_ERROR']:
+        lines.append(f'UVM_ERROR stub_simv.py(2) @ {sim_time // 2}: uvm_test_top [STUB] Mismatch for seed {seed}')
+    if fatal:
+        lines.append(f'UVM_FATAL stub_simv.py(3) @ {sim_time // 2}: uvm_test_top [STUB] Fatal error for seed {seed}')
+    lines += [
+        '',
+        '--- UVM Report Summary ---',
+        '',
+        '** Report counts by severity',
+    ] + [f'{sev} :    {n}' for sev, n in counts.items()] + [
+        '** Report counts by id',
+        '[RNTST]     1',
+        '[SEED]     1',
+    ]
+    if not fatal:
+        lines += [
+            f'$finish at simulation time               {sim_time}',
+            '           V C S   S i m u l a t i o n   R e p o r t ',
+            f'Time: {sim_time} ps',
+            f'CPU Time:      {time.process_time():.3f} seconds;       Data structure size:   0.0Mb',
+            datetime.now().strftime('%a %b %d %H:%M:%S %Y'),
+        ]
+    text = '\n'.join(lines) + '\n'
+    sys.stdout.write(text)
+    if log_path:
+        with open(log_path, 'w') as f:
+            f.write(text)
+    return 1 if fatal else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""
+usage_finder.py
+
+Linear-time component usage lookup. Files are tokenized into identifiers once
+and each token is checked against a hash set of component names, which is
+equivalent to a \\b(name1|name2|...)\\b search but does not degrade as the
+number of components grows.
+"""
+import re
+from collections import Counter
+from functools import partial
+
+from metrics import count, phase
+from scanner import USAGE_EXTS, decode_cursor, encode_cursor, scan_project_tree
+from workers import parallel_map
+
+IDENT_RE = re.compile(r'\w+')
+
+
+def _read(path):
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def _count_file(names, path):
+    content = _read(path)
+    if not content:
+        return {}
+    tokens = Counter(IDENT_RE.findall(content))
+    return {name: tokens[name] for name in names.intersection(tokens)}
+
+
+def count_component_usages(project_path, component_names, snapshot=None, workers=None):
+    """Counts word-boundary occurrences of component names per file.
+
+    Returns dict: component_name -> {file: hit_count}. Matching lines are not
+    kept, so memory stays proportional to the number of (component, file) pairs.
+    """
+    names = set(component_names)
+    counts = {name: {} for name in names}
+    if not names:
+        return counts
+    if snapshot is None:
+        snapshot = scan_project_tree(project_path, parse_components=False)
+    files = list(snapshot.iter_files(USAGE_EXTS))
+    with phase('usages'):
+        per_file = parallel_map(partial(_count_file, names), [entry['path'] for _, entry in files],
+                                kind='io', workers=workers)
+    count('bytes_read', sum(entry['size'] for _, entry in files))
+    for (rel, _), file_counts in zip(files, per_file):
+        for name, n in file_counts.items():
+            counts[name][rel] = n
+    return counts
+
+
+def dependent_page(snapshot, name, cursor=None, limit=100):
+    """Returns (lines, next_cursor) for one page of the design-graph edges pointing at `name`.
+
+    Edges come from the parsed declarations (snapshot.graph), so comments,
+    strings and unrelated identifiers with the same text are never reported.
+    Only the files on the returned page are read for their line content.
+    """
+    after = decode_cursor(cursor)
+    seen, edges = set(), []
+    with phase('graph'):
+        dependents = sorted(snapshot.graph.dependents(name), key=lambda e: (e[3], e[4]))
+    for kind, source, _, rel, line in dependents:
+        if (rel, line) in seen or (after is not None and (rel, line) <= after):
+            continue
+        seen.add((rel, line))
+        edges.append({'file': rel, 'line_num': line, 'kind': kind, 'source': source})
+    page = edges[:limit]
+    texts = {}
+    with phase('usages'):
+        for item in page:
+            if item['file'] not in texts:
+                entry = snapshot.files.get(item['file'])
+                content = _read(entry['path']) if entry else None
+                texts[item['file']] = content.split('\n') if content else []
+                count('bytes_read', len(content or ''))
+            lines = texts[item['file']]
+            item['line_content'] = lines[item['line_num'] - 1] if item['line_num'] <= len(lines) else ''
+    next_cursor = encode_cursor(page[-1]) if len(edges) > limit else None
+    return page, next_cursor
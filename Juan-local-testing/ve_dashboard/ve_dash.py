@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+ve_dash.py
+
+`ve-dash`: headless queries against an environment's caches, for scripts and
+dashboard.sh. Each subcommand answers from the snapshot published in the
+shared store (shared_cache.py) and the persistent search, component and
+include indexes, so repeated calls do not walk or re-parse the project.
+
+Only os, sys, argparse and json are imported up front. Every subcommand
+imports the modules it needs when it runs, so there is no Flask or tkinter,
+and no multiprocessing unless a pool is actually started. The interpreter
+starts and answers in a few tens of milliseconds, which makes it cheap to
+call in a loop.
+
+Usage:
+    ve-dash envs
+    ve-dash search 'fifo_if' [--regex] [--case] [--limit N]
+    ve-dash components [--type class] [--name 'fifo_*']
+    ve-dash deps [COMPONENT] [--transitive]
+    ve-dash includes [FILE] [--reverse] [--cycles] [--unresolved]
+    ve-dash report [--format md|json|html] [-o FILE]
+
+`envs` lists the configured environments as id, path and name separated by
+tabs. Every other subcommand takes --env ID or --project PATH. Without them, the
+configured environment containing the current directory is used, else the
+first one in config.json. --json prints machine-readable output. A published
+snapshot is used while it is at most --max-age seconds old (default: the
+`cli_snapshot_max_age` setting), and --refresh rescans first. The exit status
+is 0 when something was found, 1 when nothing was and 2 on errors, as with
+grep.
+"""
+import os
+import sys
+import json
+import argparse
+
+
+def resolve_environment(args, config):
+    """(env_id, project_path) from --env, --project, the current directory or the first configured environment."""
+    from settings import environment_for_path
+    environments = config.get('environments', [])
+    if args.env:
+        for env in environments:
+            if env['id'] == args.env:
+                return env['id'], env['path']
+        raise SystemExit(f've-dash: unknown environment: {args.env}')
+    if args.project:
+        project_path = os.path.abspath(args.project)
+        return environment_for_path(project_path, config), project_path
+    cwd = os.getcwd()
+    for env in environments:
+        path = os.path.abspath(env.get('path', ''))
+        if cwd == path or cwd.startswith(path + os.sep):
+            return env['id'], path
+    if environments:
+        return environments[0]['id'], environments[0]['path']
+    raise SystemExit('ve-dash: no environments in config.json; use --project PATH')
+
+
+def load_snapshot(args, env_id, project_path, config):
+    from settings import get_setting
+    from shared_cache import shared_snapshot
+    if args.refresh:
+        max_age = 0
+    elif args.max_age is not None:
+        max_age = args.max_age
+    else:
+        max_age = float(get_setting('cli_snapshot_max_age', config) or 0)
+    return shared_snapshot(env_id, project_path, config, max_age)
+
+
+def emit(args, data, lines):
+    """Prints data as JSON with --json, else the given text lines."""
+    if args.json:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for line in lines:
+            print(line)
+
+
+def cmd_envs(args, config):
+    environments = [{'id': env['id'], 'path': env['path'], 'name': env.get('name', env['id'])}
+                    for env in config.get('environments', [])]
+    emit(args, environments, (f"{e['id']}\t{e['path']}\t{e['name']}" for e in environments))
+    return 0 if environments else 1
+
+
+def cmd_search(args, env_id, snapshot, config):
+    from itertools import islice
+    from scanner import compile_query, iter_text_search
+    from search_index import environment_candidates
+    regex, error = compile_query(args.query, args.regex, args.case)
+    if error:
+        print(f've-dash: {error}', file=sys.stderr)
+        return 2
+    candidates = environment_candidates(env_id, snapshot, args.query, args.regex, config)
+    matches = list(islice(iter_text_search(snapshot, regex, candidates), args.limit or None))
+    emit(args, matches, (f"{m['file']}:{m['line_num']}:{m['line_content']}" for m in matches))
+    return 0 if matches else 1
+
+
+def cmd_components(args, env_id, snapshot, config):
+    from fnmatch import fnmatchcase
+    components = sorted(({'type': comp['type'], 'name': comp['name'], 'file': rel, 'line': comp.get('line')}
+                         for rel, comps in snapshot.components_by_file.items() for comp in comps
+                         if (not args.type or comp['type'].lower() == args.type.lower())
+                         and (not args.name or fnmatchcase(comp['name'], args.name))),
+                        key=lambda c: (c['file'], c['line'] or 0, c['name']))
+    emit(args, components, (f"{c['type']}\t{c['name']}\t{c['file']}:{c['line']}" for c in components))
+    return 0 if components else 1
+
+
+def cmd_deps(args, env_id, snapshot, config):
+    graph = snapshot.graph
+    if not args.component:
+        counts = sorted(graph.dependent_counts().items(), key=lambda item: (-item[1], item[0]))
+        data = [{'name': name, 'file': graph.nodes[name]['path'], 'dependents': n} for name, n in counts]
+        emit(args, data, (f"{d['name']}\t{d['file']}\t{d['dependents']}" for d in data))
+        return 0 if data else 1
+    if args.component not in graph.nodes:
+        print(f"ve-dash: component '{args.component}' not found", file=sys.stderr)
+        return 1
+    if args.transitive:
+        names = sorted(graph.transitive_dependents(args.component))
+        emit(args, names, names)
+        return 0 if names else 1
+    edges = sorted(graph.dependents(args.component), key=lambda e: (e[3], e[4]))
+    data = [{'kind': kind, 'source': source, 'file': rel, 'line_num': line} for kind, source, _, rel, line in edges]
+    emit(args, data, (f"{d['kind']}\t{d['source']}\t{d['file']}:{d['line_num']}" for d in data))
+    return 0 if data else 1
+
+
+def cmd_includes(args, env_id, snapshot, config):
+    from include_graph import environment_include_graph
+    graph = environment_include_graph(env_id, snapshot, config)
+    if args.cycles:
+        cycles = graph.cycles()
+        emit(args, cycles, (' -> '.join(cycle) for cycle in cycles))
+        return 0 if cycles else 1
+    if args.unresolved:
+        data = {name: [{'file': rel, 'line_num': line} for rel, line, _ in uses]
+                for name, uses in sorted(graph.unresolved.items())}
+        emit(args, data, (f"{name}\t{u['file']}:{u['line_num']}" for name, uses in data.items() for u in uses))
+        return 0 if data else 1
+    if args.file:
+        keys = graph.find(args.file)
+        if not keys:
+            print(f"ve-dash: file '{args.file}' not found", file=sys.stderr)
+            return 1
+        if len(keys) > 1:
+            print(f"ve-dash: '{args.file}' is ambiguous: {', '.join(keys)}", file=sys.stderr)
+            return 2
+        files = sorted(graph.transitive_includers(keys[0]) if args.reverse else graph.pulls_in(keys[0]))
+        emit(args, files, files)
+        return 0 if files else 1
+    data = [{'file': key, 'line_num': line, 'includes': target}
+            for key, edges in sorted(graph.includes.items()) for target, line, _ in edges]
+    emit(args, data, (f"{d['file']}:{d['line_num']}\t{d['includes']}" for d in data))
+    return 0 if data else 1
+
+
+def cmd_report(args, env_id, snapshot, config):
+    from report import build_report, render
+    text = render(build_report(env_id, snapshot, config), 'json' if args.json else args.format)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--env', help='id of an environment in config.json')
+    common.add_argument('--project', help='project directory (need not be configured)')
+    common.add_argument('--refresh', action='store_true', help='rescan before answering')
+    common.add_argument('--max-age', type=float,
+                        help='seconds a published snapshot is reused (default: cli_snapshot_max_age)')
+    common.add_argument('--json', action='store_true', help='print JSON')
+
+    parser = argparse.ArgumentParser(prog='ve-dash', description='Query a verification environment from the shell.')
+    sub = parser.add_subparsers(dest='command', metavar='COMMAND')
+    sub.required = True
+
+    p = sub.add_parser('envs', help='configured environments: id, path and name')
+    p.add_argument('--json', action='store_true', help='print JSON')
+    p.set_defaults(func=cmd_envs)
+
+    p = sub.add_parser('search', parents=[common], help='text search narrowed by the trigram index')
+    p.add_argument('query')
+    p.add_argument('--regex', action='store_true', help='treat the query as a regular expression')
+    p.add_argument('--case', action='store_true', help='case-sensitive match')
+    p.add_argument('--limit', type=int, default=0, help='stop after N matches (default: all)')
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser('components', parents=[common], help='declared modules, interfaces, classes, ...')
+    p.add_argument('--type', help='only this declaration type (module, class, ...)')
+    p.add_argument('--name', help='only names matching this glob')
+    p.set_defaults(func=cmd_components)
+
+    p = sub.add_parser('deps', parents=[common], help='dependent counts, or the dependents of one component')
+    p.add_argument('component', nargs='?')
+    p.add_argument('--transitive', action='store_true', help='every component that reaches COMPONENT')
+    p.set_defaults(func=cmd_deps)
+
+    p = sub.add_parser('includes', parents=[common], help='resolved `include edges, cycles and unresolved names')
+    p.add_argument('file', nargs='?', help='list what FILE (a path or basename) pulls in, or with --reverse who includes it')
+    p.add_argument('--reverse', action='store_true', help='files that include FILE directly or transitively')
+    p.add_argument('--cycles', action='store_true', help='only include cycles')
+    p.add_argument('--unresolved', action='store_true', help='only includes that resolve to no file')
+    p.set_defaults(func=cmd_includes)
+
+    p = sub.add_parser('report', parents=[common], help='full project report (see report.py)')
+    p.add_argument('--format', choices=('md', 'json', 'html'), default='md')
+    p.add_argument('-o', '--output', help='file to write instead of stdout')
+    p.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from settings import load_config
+    config = load_config()
+    if args.func is cmd_envs:
+        return cmd_envs(args, config)
+    env_id, project_path = resolve_environment(args, config)
+    if not os.path.isdir(project_path):
+        print(f've-dash: project path not found: {project_path}', file=sys.stderr)
+        return 2
+    snapshot = load_snapshot(args, env_id, project_path, config)
+    return args.func(args, env_id, snapshot, config)
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # `ve-dash ... | head` closed the pipe early; keep the exit flush from raising again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
@@ -0,0 +1,267 @@
+"""
+watcher.py
+
+Keeps an environment's ProjectSnapshot current without rescanning the tree.
+A background thread collects touched paths, either from inotify (local disks,
+Linux only, via ctypes) or by polling a stat-only scan (NFS and everything
+else), and reprocesses only those files: their entries are re-stat'ed and
+SystemVerilog files are re-parsed. Each batch of changes is applied to a copy
+of the snapshot which then replaces the current one, so readers never see a
+half-updated snapshot. Given the environment's component index, the watcher
+also writes the re-parsed files back to it, so the next cold scan (after a
+restart or an eviction) finds them current.
+
+Selected with the `watch_backend` setting: off, auto, inotify or poll.
+"""
+import os
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+
+from component_index import scan_environment
+from scanner import SV_EXTS, file_entry, scan_project_tree, try_parse_sv_file, walk_files
+from settings import get_setting
+
+NETWORK_FS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afs', 'lustre', 'gpfs', 'fuse.sshfs', '9p'}
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def filesystem_type(path):
+    """Returns the fstype of the mount containing path from /proc/mounts, or None."""
+    path = os.path.realpath(path)
+    best, fstype = '', None
+    try:
+        with open('/proc/mounts') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount = parts[1].replace('\\040', ' ')
+                if (path == mount or path.startswith(mount.rstrip('/') + '/')) and len(mount) > len(best):
+                    best, fstype = mount, parts[2]
+    except OSError:
+        return None
+    return fstype
+
+
+def choose_backend(project_path, requested='auto'):
+    """Resolves 'auto' to inotify on local Linux disks and poll everywhere else."""
+    if requested in ('inotify', 'poll'):
+        return requested
+    if _libc() is None or filesystem_type(project_path) in NETWORK_FS:
+        return 'poll'
+    return 'inotify'
+
+
+_LIBC = []
+
+
+def _libc():
+    if not _LIBC:
+        libc = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            libc.inotify_init1
+        except (OSError, AttributeError, TypeError):
+            libc = None
+        _LIBC.append(libc)
+    return _LIBC[0]
+
+
+class _Inotify:
+    """Minimal recursive inotify reader reporting touched files and directories."""
+
+    def __init__(self, project_path):
+        self.project_path = project_path
+        self.libc = _libc()
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dirs = {}
+        self.add_tree(project_path)
+
+    def add_tree(self, top):
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = path
+            try:
+                with os.scandir(path) as it:
+                    stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+            except OSError:
+                pass
+
+    def read(self, timeout):
+        """Returns (touched_paths, touched_dirs, overflow) for events seen within timeout."""
+        files, dirs, overflow = set(), set(), False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return files, dirs, overflow
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name:
+                continue
+            full = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                dirs.add(full)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(full)
+            else:
+                files.add(full)
+        return files, dirs, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SnapshotWatcher:
+    """Background thread that keeps `snapshot` up to date for one environment."""
+
+    def __init__(self, env_id, project_path, backend='auto', interval=2.0, snapshot=None, index=None):
+        self.env_id = env_id
+        self.project_path = project_path
+        self.interval = interval
+        self.index = index
+        self.backend = choose_backend(project_path, backend)
+        self.snapshot = snapshot if snapshot is not None else scan_environment(env_id, project_path)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+        if self.backend == 'inotify':
+            try:
+                self._inotify = _Inotify(project_path)
+            except OSError:
+                self.backend = 'poll'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f'watch-{self.env_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._inotify is not None:
+                    files, dirs, overflow = self._inotify.read(self.interval)
+                    if overflow:
+                        dirs = {self.project_path}
+                else:
+                    self._stop.wait(self.interval)
+                    files, dirs = self._poll(), set()
+                if files or dirs:
+                    self.apply(files, dirs)
+            except Exception:
+                # Keep watching; the next poll or event batch will catch up
+                self._stop.wait(self.interval)
+
+    def _poll(self):
+        """Stat-only scan; returns full paths that were added, removed or changed."""
+        current = scan_project_tree(self.project_path, parse_components=False)
+        known = self.snapshot.files
+        touched = {e['path'] for rel, e in current.files.items()
+                   if rel not in known or (known[rel]['mtime'], known[rel]['size']) != (e['mtime'], e['size'])}
+        touched.update(e['path'] for rel, e in known.items() if rel not in current.files)
+        return touched
+
+    def notify(self, paths, dirs=()):
+        """Processes files and directory subtrees right away, e.g. after the dashboard deleted them."""
+        # os.path.join keeps absolute paths as they are
+        self.apply({os.path.join(self.project_path, p) for p in paths},
+                   {os.path.join(self.project_path, d) for d in dirs})
+
+    def apply(self, files, dirs=()):
+        """Reprocesses touched files and directory subtrees, then swaps in the new snapshot."""
+        prefix_len = len(os.path.join(self.project_path, ''))
+        with self._lock:
+            snapshot = self.snapshot.copy()
+            for top in dirs:
+                rel_top = top[prefix_len:] if top != self.project_path else ''
+                for rel in [r for r in snapshot.files if not rel_top or r.startswith(rel_top + os.sep)]:
+                    snapshot.remove_file(rel)
+                for root, entry in walk_files(top):
+                    files.add(entry.path)
+            # A reprocessed file's earlier errors are replaced by whatever reading it now reports
+            reprocessed = tuple(f'{full}: ' for full in files) + tuple(os.path.join(top, '') for top in dirs)
+            snapshot.errors = [e for e in snapshot.errors if not e.startswith(reprocessed)]
+            parsed = []
+            for full in sorted(files):
+                rel = full[prefix_len:]
+                try:
+                    st = os.stat(full)
+                    if not os.path.isfile(full):
+                        raise FileNotFoundError(full)
+                except OSError:
+                    snapshot.remove_file(rel)
+                    continue
+                name = os.path.basename(full)
+                snapshot.add_file(rel, file_entry(os.path.dirname(full), name, full, st))
+                if name.endswith(SV_EXTS):
+                    components, error = try_parse_sv_file(full)
+                    if error:
+                        snapshot.errors.append(error)
+                    else:
+                        parsed.append((rel, st, components))
+                    snapshot.set_components(rel, components)
+            self.snapshot = snapshot
+            self.generation += 1
+            if self.index is not None:
+                for rel, st, components in parsed:
+                    self.index.store(rel, st.st_mtime, st.st_size, components)
+                self.index.sync(snapshot.files)
+
+
+def watcher_settings(config=None):
+    return get_setting('watch_backend', config), float(get_setting('watch_interval', config))
+
+
+def start_watcher(env_id, project_path, config=None, snapshot=None, index=None):
+    """Starts a watcher per the config.json settings, or returns None when watching is off.
+
+    index is the environment's ComponentIndex to keep current; the caller
+    still owns it and closes it after stopping the watcher.
+    """
+    backend, interval = watcher_settings(config)
+    if not backend or backend == 'off':
+        return None
+    return SnapshotWatcher(env_id, project_path, backend, interval, snapshot, index).start()
+
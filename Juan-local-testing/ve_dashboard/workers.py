@@ -0,0 +1,45 @@
+"""
+workers.py
+
+Bounded worker pools for per-file work. I/O-bound reads (searching, usage
+scanning on NFS) fan out over threads; regex-heavy parsing fans out over
+processes. Results always come back in input order so merged output is
+deterministic regardless of the worker count.
+
+Worker counts come from `io_workers` and `cpu_workers` in config.json; a
+value of 0 or 1 runs the work serially in the calling thread.
+"""
+from functools import lru_cache
+
+from settings import get_setting
+
+# Below this many items the pool start-up cost outweighs the parallelism
+MIN_PARALLEL_ITEMS = 32
+
+
+@lru_cache(maxsize=None)
+def default_workers(kind):
+    return int(get_setting('cpu_workers' if kind == 'cpu' else 'io_workers') or 0)
+
+
+def parallel_map(func, items, kind='io', workers=None, min_items=MIN_PARALLEL_ITEMS):
+    """Applies func to every item and returns the results in input order.
+
+    kind is 'io' for a thread pool or 'cpu' for a process pool; func must be
+    a picklable module-level function for the latter. Lower min_items when
+    each item is itself expensive (e.g. removing a whole directory tree).
+    """
+    items = list(items)
+    if workers is None:
+        workers = default_workers(kind)
+    if workers <= 1 or len(items) < max(2, min_items):
+        return [func(item) for item in items]
+    # Imported here: concurrent.futures pulls in multiprocessing, which the serial path
+    # (and the ve-dash start-up time) does not need
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    if kind == 'cpu':
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, items, chunksize=chunksize))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))